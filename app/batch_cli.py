@@ -0,0 +1,134 @@
+# filename: batch_cli.py
+"""Offline Batch Processor for Shipment Messages.
+
+Streams a JSONL file of shipment messages (the /submit-batch item format, see
+src/batch_runner.py) through `full_agent` with a pool of asyncio workers and appends one
+result line per item to an output JSONL file.
+
+Finished item indexes are appended to a progress file as they complete, so a run that
+crashed or was stopped resumes where it left off when started again with the same
+arguments. Items whose turn failed are not recorded there and run again on resume; their
+error lines stay in the output, the last line of an index is its final result.
+
+Usage (from the app directory, like main.py):
+    python batch_cli.py shipments.jsonl --output results.jsonl --workers 8
+"""
+
+import sys
+
+sys.path.append('../')
+
+import time
+import json
+import asyncio
+import argparse
+import statistics
+from pathlib import Path
+from typing_extensions import Iterator, Set
+
+from src.full_agent import full_agent
+from src.checkpointer import get_checkpointer
+from src.mcp_pool import mcp_session_pool
+from src.startup import warm_up
+from src.model_factory import model_factory
+from src.batch_runner import BATCH_CONCURRENCY, BatchItem, BatchItemResult, parse_batch_item, run_batch_item
+
+# ===== PROGRESS FILE =====
+
+def load_progress(progress_path: Path) -> Set[int]:
+    """Indexes of the items finished by previous runs."""
+    if not progress_path.exists():
+        return set()
+    with open(progress_path, "r", encoding="utf-8") as progress_file:
+        return {int(line) for line in progress_file if line.strip().isdigit()}
+
+def read_items(input_path: Path, done: Set[int]) -> Iterator[BatchItem]:
+    """Lazily parse the input JSONL, skipping blank lines and finished items."""
+    with open(input_path, "r", encoding="utf-8") as input_file:
+        index = 0
+        for line in input_file:
+            if not line.strip():
+                continue
+            if index not in done:
+                try:
+                    yield parse_batch_item(index, json.loads(line))
+                except json.JSONDecodeError as e:
+                    yield BatchItem(index=index, error=f"invalid JSON: {e}")
+            index += 1
+
+# ===== WORKER POOL =====
+
+async def process_file(input_path: Path, output_path: Path, progress_path: Path, workers: int) -> dict:
+    """Run every unfinished item of `input_path` and return the run's counters."""
+    done = load_progress(progress_path)
+    queue = asyncio.Queue(maxsize=workers * 2)        # bounded, so the input is read as workers free up
+    latencies = []
+    counters = {"skipped": len(done), "ok": 0, "error": 0}
+
+    with open(output_path, "a", encoding="utf-8") as output_file, open(progress_path, "a", encoding="utf-8") as progress_file:
+
+        def record(result: BatchItemResult):
+            output_file.write(result.model_dump_json() + "\n")
+            output_file.flush()
+            counters[result.status] += 1
+            if result.status == "ok" or result.thread_id is None:     # parse errors are final, failed turns are retried on resume
+                progress_file.write(f"{result.index}\n")
+                progress_file.flush()
+            if result.status == "ok":
+                latencies.append(result.seconds)
+
+        async def worker():
+            while (item := await queue.get()) is not None:
+                record(await run_batch_item(full_agent, item))
+
+        async def producer():
+            for item in read_items(input_path, done):
+                await queue.put(item)
+            for _ in range(workers):
+                await queue.put(None)
+
+        await warm_up()                               # model client and MCP sessions before the first item
+        try:
+            await asyncio.gather(producer(), *(worker() for _ in range(workers)))
+        finally:
+            await mcp_session_pool.close()
+            await model_factory.aclose()
+            if hasattr(get_checkpointer(), "flush"):
+                get_checkpointer().flush()
+
+    counters["latency_p50"] = statistics.median(latencies) if latencies else 0.0
+    counters["latency_p95"] = statistics.quantiles(latencies, n=20)[-1] if len(latencies) >= 2 else counters["latency_p50"]
+    return counters
+
+def main():
+    parser = argparse.ArgumentParser(description="Run a JSONL file of shipment messages through full_agent")
+    parser.add_argument("input", type=Path, help="JSONL file, one shipment message per line")
+    parser.add_argument("--output", type=Path, help="Result JSONL (default: <input>.results.jsonl)")
+    parser.add_argument("--progress", type=Path, help="Progress file (default: <output>.progress)")
+    parser.add_argument("--workers", type=int, default=BATCH_CONCURRENCY, help="Concurrent turns")
+    parser.add_argument("--restart", action="store_true", help="Ignore previous progress and start over")
+    args = parser.parse_args()
+
+    output_path = args.output or args.input.with_suffix(".results.jsonl")
+    progress_path = args.progress or output_path.with_name(output_path.name + ".progress")
+    if args.restart:
+        output_path.unlink(missing_ok=True)
+        progress_path.unlink(missing_ok=True)
+
+    start = time.perf_counter()
+    counters = asyncio.run(process_file(args.input, output_path, progress_path, max(1, args.workers)))
+    elapsed = time.perf_counter() - start
+
+    processed = counters["ok"] + counters["error"]
+    print(f"{'processed':<14}{processed:>10}")
+    print(f"{'ok':<14}{counters['ok']:>10}")
+    print(f"{'errors':<14}{counters['error']:>10}")
+    print(f"{'resumed past':<14}{counters['skipped']:>10}")
+    print(f"{'wall time (s)':<14}{elapsed:>10.2f}")
+    print(f"{'items/s':<14}{processed / elapsed if elapsed else 0.0:>10.1f}")
+    print(f"{'p50 turn (s)':<14}{counters['latency_p50']:>10.2f}")
+    print(f"{'p95 turn (s)':<14}{counters['latency_p95']:>10.2f}")
+    print(f"results: {output_path}")
+
+if __name__ == "__main__":
+    main()
@@ -3,26 +3,142 @@ import sys
 
 sys.path.append('../')
 
+import asyncio
 import uvicorn
-from fastapi import FastAPI
+from contextlib import asynccontextmanager
+from typing_extensions import List, Optional
+from fastapi import FastAPI, HTTPException, Query, Request, Response
+from fastapi.responses import JSONResponse, StreamingResponse
 from pydantic import BaseModel
-from langchain_core.messages import HumanMessage
+from langchain_core.messages import AnyMessage
 from  src.full_agent import full_agent
+from  src.mcp_pool import mcp_session_pool
+from  src.checkpointer import get_checkpointer
+from  src.prompt_cache import prompt_cache_stats
+from  src.llm_cache import llm_cache
+from  src.turn_stream import stream_turn, format_sse, new_turn_message, turn_messages
+from  src.batch_runner import BATCH_CONCURRENCY, parse_batch, run_batch
+from  src.concurrency import ThreadBusyError, thread_locks
+from  src.model_gateway import model_gateway
+from  src.model_factory import model_factory
+from  src.startup import start_warm_up, startup_status
+from  src.schema_registry import schema_registry
 
 # Define the request body schemaad
 class UserRequest(BaseModel):
       usermessage : str
       username    : str
 
+# Response bodies, serialized straight to JSON bytes by pydantic-core (see json_response)
+class TurnResponse(BaseModel):
+      message       : List[AnyMessage]      # messages of this turn, or the whole history when requested
+      message_count : int                   # length of the thread's history after this turn
+
+class HistoryPage(BaseModel):
+      messages    : List[AnyMessage]
+      cursor      : int                     # index of the first message of this page
+      next_cursor : Optional[int]           # cursor of the next page, None on the last page
+      total       : int
+
+def json_response(body: BaseModel) -> Response:
+    """Serialize a response body with pydantic-core, bypassing FastAPI's jsonable_encoder."""
+    return Response(content=body.model_dump_json(), media_type="application/json")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Create the model client and open the MCP sessions once, before or alongside serving (STARTUP_MODE)
+    warm_up_task = await start_warm_up()
+    yield
+    if warm_up_task is not None:
+        warm_up_task.cancel()
+        await asyncio.gather(warm_up_task, return_exceptions=True)
+    await mcp_session_pool.close()
+    await model_factory.aclose()
+    # Commit batched checkpoint writes before the process exits
+    if hasattr(get_checkpointer(), "flush"):
+        get_checkpointer().flush()
+
 # Initialize FastAPI app
-app = FastAPI()
+app = FastAPI(lifespan=lifespan)
 
 # Define the POST endpoint
 @app.post("/submit-message")
-async def submit_message(request: UserRequest):
+async def submit_message(request: UserRequest, include_history: bool = False):
+    thread = {"configurable":{"thread_id":request.username}}
+    turn_message = new_turn_message(request.usermessage)
+    try:
+        async with thread_locks.hold(request.username):        # a user's turns run one at a time, in order
+            result = await full_agent.ainvoke({"messages":[turn_message]} , config=thread)
+    except ThreadBusyError as e:
+        raise HTTPException(status_code=429, detail=str(e))
+    messages = result["messages"] if include_history else turn_messages(result["messages"], turn_message.id)
+    return json_response(TurnResponse(message=messages, message_count=len(result["messages"])))
+
+# Bulk ingestion: a JSONL or JSON array body of shipment messages, one thread per item,
+# answered as NDJSON with one result line per item as soon as it finishes
+@app.post("/submit-batch")
+async def submit_batch(request: Request, concurrency: int = Query(BATCH_CONCURRENCY, ge=1)):
+    try:
+        items = parse_batch((await request.body()).decode("utf-8"))
+    except (UnicodeDecodeError, ValueError) as e:
+        raise HTTPException(status_code=400, detail=f"Invalid batch body: {e}")
+
+    async def result_lines():
+        async for result in run_batch(full_agent, items, concurrency=concurrency):
+            yield result.model_dump_json() + "\n"
+
+    return StreamingResponse(result_lines(), media_type="application/x-ndjson", headers={"X-Batch-Size": str(len(items))})
+
+# Conversation history of a user, oldest first, one page per call
+@app.get("/threads/{username}/messages")
+async def get_history(username: str, cursor: int = Query(0, ge=0), limit: int = Query(50, ge=1, le=500)):
+    state = await full_agent.aget_state({"configurable":{"thread_id":username}})
+    messages = state.values.get("messages", [])
+    next_cursor = cursor + limit if cursor + limit < len(messages) else None
+    return json_response(HistoryPage(messages=messages[cursor:cursor + limit], cursor=cursor, next_cursor=next_cursor, total=len(messages)))
+
+# Streaming variant: node progress and reply tokens as Server-Sent Events while the turn runs
+@app.post("/submit-message/stream")
+async def submit_message_stream(request: UserRequest):
     thread = {"configurable":{"thread_id":request.username}}
-    result = await full_agent.ainvoke({"messages":[HumanMessage(content=request.usermessage)]} , config=thread)
-    return {"message": result["messages"]}
+
+    async def event_stream():
+        async for event, data in stream_turn(full_agent, request.usermessage, thread):
+            yield format_sse(event, data)
+
+    return StreamingResponse(event_stream(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+# Readiness probe: 503 until the startup warm-up has finished
+@app.get("/ready")
+async def ready():
+    status = startup_status.snapshot()
+    return status if status["ready"] else JSONResponse(status_code=503, content=status)
+
+# Checkpointer metrics: resident threads and bytes per thread (memory backend) or DB size (sqlite backend)
+@app.get("/metrics/checkpointer")
+async def checkpointer_metrics():
+    return get_checkpointer().metrics()
+
+# Prompt-cache usage per prompt: calls, input tokens and tokens read from the provider's cache
+@app.get("/metrics/prompt-cache")
+async def prompt_cache_metrics():
+    return prompt_cache_stats.snapshot()
+
+# Per-thread turn queues, the model gateway's rate limiting, retries and adaptive concurrency, and the model clients
+@app.get("/metrics/concurrency")
+async def concurrency_metrics():
+    return {"threads": thread_locks.metrics(), "llm": model_gateway.metrics(), "models": model_factory.metrics()}
+
+# LLM response cache hit/miss counters
+@app.get("/metrics/llm-cache")
+async def llm_cache_metrics():
+    return llm_cache.stats() if llm_cache is not None else {"enabled": False}
+
+# IBL schema version and the token counts of the field table / field list rendered into the prompts
+@app.get("/metrics/schema")
+async def schema_metrics():
+    return schema_registry.metrics()
 
 if __name__ == "__main__":
      uvicorn.run(app, host="127.0.0.1", port=8000)
\ No newline at end of file
@@ -0,0 +1,92 @@
+"""Concurrency Benchmark for the Full Agent.
+
+Runs many independent conversations through `full_agent` at once with the chat model
+replaced by `ScriptedChatModel`, and compares two modes:
+- blocking: every model call blocks the event loop (the behaviour of the former
+            synchronous nodes calling `model.invoke`)
+- async:    every model call is awaited (the async nodes calling `model.ainvoke`)
+
+Usage (from the benchmarks directory, like app/main.py):
+    python concurrency_benchmark.py --conversations 200 --latency 0.05
+"""
+
+import sys
+
+sys.path.append('../')
+
+import os
+import time
+import uuid
+import asyncio
+import argparse
+import tempfile
+from pathlib import Path
+
+os.environ.setdefault("OPENAI_API_KEY", "benchmark")
+os.environ.setdefault("CHECKPOINT_DB_PATH", str(Path(tempfile.mkdtemp(prefix="checkpoints-benchmark-")) / "checkpoints.sqlite3"))
+
+from langchain_core.messages import HumanMessage
+from benchmarks.fake_chat_model import ScriptedChatModel
+from src.supervisor_schema import ClarifyWithUser, NextAgent
+import src.supervisor_agent as supervisor_module
+import src.logistics_agent as logistics_module
+import src.forwarder_agent as forwarder_module
+from src.full_agent import full_agent
+
+USER_MESSAGE = "AWB/BL: 12345, Shipment Mode: Air"
+
+LOGISTICS_BRIEF = """[FIELD DATA]
+AWB/BL: 12345
+Shipment Mode: Air
+
+[STATUS]
+Confirmation: not confirmed
+Skip optional: not requested
+
+[USER CONTEXT]
+None"""
+
+def build_fake_model(latency: float, blocking: bool) -> ScriptedChatModel:
+    """Fake model routing every message to the logistics agent with a structured brief."""
+    return ScriptedChatModel(
+        latency  = latency,
+        blocking = blocking,
+        reply    = lambda messages: LOGISTICS_BRIEF,
+        structured_responders = {
+            "ClarifyWithUser": lambda messages: ClarifyWithUser(question    = "",
+                                                                delegate_to = [NextAgent.LOGISTICS_AGENT],
+                                                                agent_brief = "AWB/BL: 12345, Shipment Mode: Air"),
+        },
+    )
+
+def install_model(model: ScriptedChatModel):
+    """Point every agent module at the fake model."""
+    supervisor_module.model = model
+    supervisor_module.model_with_tools = model
+    logistics_module.model = model
+    forwarder_module.model = model
+
+async def run_conversations(conversations: int) -> float:
+    """Run `conversations` single-turn conversations concurrently and return the wall time."""
+    async def one_conversation():
+        thread = {"configurable": {"thread_id": str(uuid.uuid4())}}
+        await full_agent.ainvoke({"messages": [HumanMessage(content=USER_MESSAGE)]}, config=thread)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one_conversation() for _ in range(conversations)))
+    return time.perf_counter() - start
+
+def main():
+    parser = argparse.ArgumentParser(description="Concurrency benchmark for full_agent")
+    parser.add_argument("--conversations", type=int, default=200, help="Concurrent conversations per mode")
+    parser.add_argument("--latency", type=float, default=0.05, help="Simulated seconds per model call")
+    args = parser.parse_args()
+
+    print(f"{'mode':<10}{'conversations':>15}{'wall time (s)':>16}{'turns/s':>12}")
+    for mode in ["blocking", "async"]:
+        install_model(build_fake_model(latency=args.latency, blocking=(mode == "blocking")))
+        elapsed = asyncio.run(run_conversations(args.conversations))
+        print(f"{mode:<10}{args.conversations:>15}{elapsed:>16.2f}{args.conversations / elapsed:>12.1f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""Scripted Fake Chat Model for Offline Benchmarks.
+
+A drop-in stand-in for the OpenAI chat model used by the agents. It answers with
+canned text and canned structured outputs after a configurable latency, so the
+graph can be exercised without network access or LLM cost.
+"""
+
+import time
+import asyncio
+from typing_extensions import Any, Callable, Dict, List, Optional
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+from langchain_core.runnables import RunnableLambda
+
+class ScriptedChatModel(BaseChatModel):
+    """
+    Fake chat model with simulated latency.
+
+    Attributes:
+        latency: Seconds every call takes
+        blocking: When True, async calls sleep with `time.sleep`, blocking the event
+                  loop exactly like a synchronous `model.invoke` inside a node does
+        reply: Callable building the text reply from the input messages
+        structured_responders: Schema class name → callable building the structured
+                               output from the input messages
+        calls: Number of calls answered so far, text and structured
+    """
+    latency: float = 0.05
+    blocking: bool = False
+    reply: Callable[[List[BaseMessage]], str] = lambda messages: "OK"
+    structured_responders: Dict[str, Callable[[List[BaseMessage]], Any]] = {}
+    calls: int = 0
+
+    @property
+    def _llm_type(self) -> str:
+        return "scripted-fake"
+
+    def _generate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None, run_manager=None, **kwargs) -> ChatResult:
+        self.calls += 1
+        time.sleep(self.latency)
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=self.reply(messages)))])
+
+    async def _agenerate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None, run_manager=None, **kwargs) -> ChatResult:
+        self.calls += 1
+        await self._asleep()
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=self.reply(messages)))])
+
+    async def _asleep(self):
+        if self.blocking:
+            time.sleep(self.latency)
+        else:
+            await asyncio.sleep(self.latency)
+
+    def bind_tools(self, tools, **kwargs):
+        return self
+
+    def with_structured_output(self, schema, **kwargs):
+        responder = self.structured_responders[schema.__name__]
+
+        def invoke(messages):
+            self.calls += 1
+            time.sleep(self.latency)
+            return responder(messages)
+
+        async def ainvoke(messages):
+            self.calls += 1
+            await self._asleep()
+            return responder(messages)
+
+        return RunnableLambda(invoke, afunc=ainvoke)
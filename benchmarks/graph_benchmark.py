@@ -0,0 +1,191 @@
+"""Offline Benchmark of the Full Agent Graph.
+
+Replays the multi-turn scenarios of notebooks/full_agent.ipynb (see scenarios.py)
+through `full_agent` with no network access:
+- the chat model of every agent is a `ScriptedChatModel` answering with canned routing
+  decisions, briefs and `LogisticsSchema` / `ForwarderSchema` responses after
+  --latency seconds
+- the UpdateDB MCP server is replaced by its tools running in-process on a scratch
+  database (local_tools.py)
+
+and reports turns per second, turn latency, the time spent in every graph node and the
+time spent in the checkpointer. With --latency 0 the numbers are the graph's own
+overhead. --min-turns-per-second makes the run exit with status 1 below a floor, to catch
+regressions in CI.
+
+Usage (from the benchmarks directory, like app/main.py):
+    python graph_benchmark.py --conversations 20 --latency 0.02
+    CHECKPOINTER_BACKEND=memory python graph_benchmark.py --latency 0 --min-turns-per-second 50
+"""
+
+import sys
+
+sys.path.append('../')
+
+import os
+import time
+import uuid
+import asyncio
+import argparse
+import tempfile
+import statistics
+from pathlib import Path
+from collections import defaultdict
+from typing_extensions import Any, Dict, List
+
+os.environ.setdefault("OPENAI_API_KEY", "benchmark")
+os.environ.setdefault("CHECKPOINT_DB_PATH", str(Path(tempfile.mkdtemp(prefix="checkpoints-benchmark-")) / "checkpoints.sqlite3"))
+
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.messages import HumanMessage
+from benchmarks.fake_chat_model import ScriptedChatModel
+from benchmarks.local_tools import LocalToolPool
+from benchmarks.scenarios import SCENARIOS, build_scenario_model, conversation_messages
+import src.supervisor_agent as supervisor_module
+import src.logistics_agent as logistics_module
+import src.forwarder_agent as forwarder_module
+from src.checkpointer import CHECKPOINTER_BACKEND, get_checkpointer
+from src.full_agent import full_agent
+
+# ===== INSTRUMENTATION =====
+
+def percentile(values: List[float], fraction: float) -> float:
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(fraction * len(values)))]
+
+class NodeTimer(BaseCallbackHandler):
+    """Wall time of every graph node run, by node path (e.g. "LogisticsAgent/logistics_agent")."""
+
+    def __init__(self):
+        self.started: Dict[Any, tuple] = {}
+        self.seconds: Dict[str, List[float]] = defaultdict(list)
+
+    def on_chain_start(self, serialized, inputs, *, run_id, metadata=None, **kwargs):
+        node = (metadata or {}).get("langgraph_node")
+        if node is not None and kwargs.get("name") == node:
+            namespace = [part.split(":")[0] for part in metadata.get("langgraph_checkpoint_ns", "").split("|") if part]
+            path = "/".join(namespace if namespace and namespace[-1] == node else namespace + [node])
+            self.started[run_id] = (path, time.perf_counter())
+
+    def on_chain_end(self, outputs, *, run_id, **kwargs):
+        if run_id in self.started:
+            path, start = self.started.pop(run_id)
+            self.seconds[path].append(time.perf_counter() - start)
+
+    def on_chain_error(self, error, *, run_id, **kwargs):
+        self.on_chain_end(None, run_id=run_id)
+
+class CheckpointTimer:
+    """Wraps the async methods of the shared checkpointer to time every call."""
+
+    METHODS = ("aget_tuple", "aput", "aput_writes")
+
+    def __init__(self, checkpointer):
+        self.seconds: Dict[str, List[float]] = defaultdict(list)
+        for method_name in self.METHODS:
+            setattr(checkpointer, method_name, self._timed(method_name, getattr(checkpointer, method_name)))
+
+    def _timed(self, method_name: str, method):
+        async def timed(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return await method(*args, **kwargs)
+            finally:
+                self.seconds[method_name].append(time.perf_counter() - start)
+        return timed
+
+    def reset(self):
+        self.seconds.clear()
+
+def install(model: ScriptedChatModel, tool_pool: LocalToolPool):
+    """Point every agent module at the fake model and the in-process DB tools."""
+    supervisor_module.model = model
+    supervisor_module.model_with_tools = model
+    logistics_module.model = model
+    forwarder_module.model = model
+    logistics_module.mcp_session_pool = tool_pool
+    forwarder_module.mcp_session_pool = tool_pool
+
+# ===== SCENARIO RUNNER =====
+
+async def run_conversation(user_messages: List[str], node_timer: NodeTimer, turn_seconds: List[float]):
+    """Play one scenario as a new conversation thread, one turn per user message."""
+    config = {"configurable": {"thread_id": str(uuid.uuid4())}, "callbacks": [node_timer]}
+    for turn in range(len(user_messages)):
+        conversation_messages.set(user_messages[:turn + 1])
+        start = time.perf_counter()
+        await full_agent.ainvoke({"messages": [HumanMessage(content=user_messages[turn])]}, config=config)
+        turn_seconds.append(time.perf_counter() - start)
+
+async def run_scenarios(scenario_names: List[str], conversations: int, node_timer: NodeTimer) -> tuple:
+    """Run `conversations` copies of every scenario concurrently; returns (wall seconds, turn latencies)."""
+    turn_seconds = []
+    start = time.perf_counter()
+    await asyncio.gather(*(run_conversation(SCENARIOS[name], node_timer, turn_seconds)
+                           for name in scenario_names for _ in range(conversations)))
+    return time.perf_counter() - start, turn_seconds
+
+# ===== REPORT =====
+
+def print_report(elapsed: float, turn_seconds: List[float], node_timer: NodeTimer, checkpoint_timer: CheckpointTimer,
+                 model: ScriptedChatModel, tool_pool: LocalToolPool) -> float:
+    turns = len(turn_seconds)
+    turns_per_second = turns / elapsed if elapsed else 0.0
+    total_turn_seconds = sum(turn_seconds)
+
+    print(f"{'node':<42}{'runs':>7}{'mean (ms)':>11}{'p95 (ms)':>10}{'total (s)':>11}")
+    for path, seconds in sorted(node_timer.seconds.items(), key=lambda item: sum(item[1]), reverse=True):
+        print(f"{path:<42}{len(seconds):>7}{statistics.mean(seconds) * 1000:>11.2f}{percentile(seconds, 0.95) * 1000:>10.2f}{sum(seconds):>11.2f}")
+    print()
+
+    print(f"{'checkpointer (' + CHECKPOINTER_BACKEND + ')':<42}{'calls':>7}{'mean (ms)':>11}{'p95 (ms)':>10}{'total (s)':>11}")
+    checkpoint_seconds = 0.0
+    for method_name, seconds in checkpoint_timer.seconds.items():
+        checkpoint_seconds += sum(seconds)
+        print(f"{method_name:<42}{len(seconds):>7}{statistics.mean(seconds) * 1000:>11.2f}{percentile(seconds, 0.95) * 1000:>10.2f}{sum(seconds):>11.2f}")
+    print()
+
+    print(f"{'turns':<34}{turns:>10}")
+    print(f"{'wall time (s)':<34}{elapsed:>10.2f}")
+    print(f"{'turns/s':<34}{turns_per_second:>10.1f}")
+    print(f"{'p50 turn (ms)':<34}{percentile(turn_seconds, 0.5) * 1000:>10.1f}")
+    print(f"{'p95 turn (ms)':<34}{percentile(turn_seconds, 0.95) * 1000:>10.1f}")
+    print(f"{'checkpoint ms per turn':<34}{checkpoint_seconds / turns * 1000 if turns else 0.0:>10.2f}")
+    print(f"{'checkpoint share of turn time':<34}{checkpoint_seconds / total_turn_seconds * 100 if total_turn_seconds else 0.0:>9.1f}%")
+    print(f"{'model calls per turn':<34}{model.calls / turns if turns else 0.0:>10.2f}")
+    print(f"{'records committed (failed)':<34}{tool_pool.calls - tool_pool.failed:>10} ({tool_pool.failed})")
+    return turns_per_second
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline benchmark of full_agent over multi-turn scenarios")
+    parser.add_argument("--conversations", type=int, default=10, help="Concurrent copies of every scenario")
+    parser.add_argument("--scenario", action="append", choices=list(SCENARIOS), help="Scenario to run (default: all)")
+    parser.add_argument("--latency", type=float, default=0.02, help="Simulated seconds per model call")
+    parser.add_argument("--tool-latency", type=float, default=0.0, help="Simulated seconds per UpdateDB round trip")
+    parser.add_argument("--llm-extraction", action="store_true", help="Send sub agent briefs through the structured-output call instead of the pre-extractor")
+    parser.add_argument("--min-turns-per-second", type=float, default=0.0, help="Exit with status 1 below this throughput")
+    args = parser.parse_args()
+
+    scenario_names = args.scenario or list(SCENARIOS)
+    model = build_scenario_model(latency=args.latency, force_llm_extraction=args.llm_extraction)
+    tool_pool = LocalToolPool(latency=args.tool_latency)
+    install(model, tool_pool)
+    node_timer = NodeTimer()
+    checkpoint_timer = CheckpointTimer(get_checkpointer())
+
+    async def run():
+        await run_scenarios(scenario_names, 1, NodeTimer())          # warm-up: schema snapshot, prompts, DB tables
+        model.calls, tool_pool.calls, tool_pool.failed = 0, 0, 0
+        checkpoint_timer.reset()
+        return await run_scenarios(scenario_names, max(1, args.conversations), node_timer)
+
+    elapsed, turn_seconds = asyncio.run(run())
+    turns_per_second = print_report(elapsed, turn_seconds, node_timer, checkpoint_timer, model, tool_pool)
+    if turns_per_second < args.min_turns_per_second:
+        print(f"FAIL: {turns_per_second:.1f} turns/s is below the floor of {args.min_turns_per_second:.1f}")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,45 @@
+"""In-Process Stand-In for the IBL Database MCP Server.
+
+Runs the tools of src/ibl_database_update.py (`UpdateDB`, ...) in the benchmark's own
+process, on a throwaway SQLite file, instead of through MCP sessions to a spawned server
+process. Records are still validated and written exactly like the real server does, so
+the commit nodes keep their cost without the stdio transport's noise.
+"""
+
+import os
+import json
+import time
+import asyncio
+import tempfile
+from pathlib import Path
+from typing_extensions import Any, Dict
+
+# The server module opens its store at import; point it at a scratch database first
+os.environ.setdefault("IBL_DB_PATH", str(Path(tempfile.mkdtemp(prefix="ibl-benchmark-")) / "ibl_database.sqlite3"))
+
+import src.ibl_database_update as ibl_database_server
+
+class LocalToolPool:
+    """Drop-in for `mcp_session_pool` calling the DB server's tools in-process."""
+
+    def __init__(self, latency: float = 0.0):
+        self.latency = latency                         # simulated transport round trip per call
+        self.tools = {"UpdateDB"      : ibl_database_server.UpdateDB,
+                      "UpdateDBBatch" : ibl_database_server.UpdateDBBatch,
+                      "GetRecordByAWB": ibl_database_server.GetRecordByAWB}
+        self.calls = 0
+        self.failed = 0                                # calls answered with status "False"
+        self.seconds = 0.0
+
+    async def list_tools(self):
+        return list(self.tools)
+
+    async def ainvoke_tool(self, tool_name: str, args: Dict[str, Any]) -> Any:
+        start = time.perf_counter()
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        result = await self.tools[tool_name](**args)
+        self.calls += 1
+        self.failed += result.get("status") == "False"
+        self.seconds += time.perf_counter() - start
+        return json.dumps(result, default=str)     # MCP tools answer with text content
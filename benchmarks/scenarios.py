@@ -0,0 +1,189 @@
+"""Multi-Turn Scenarios and Scripted Model Behaviour.
+
+The conversations of notebooks/full_agent.ipynb, and the deterministic answers a
+`ScriptedChatModel` gives during them in place of the LLM:
+
+- routing (`ClarifyWithUser`): the agents whose fields the latest user message names
+- briefs (build and update): `Field: value` lines for every field named so far in the
+  conversation, with the confirmation and skip flags read from the user's words
+- agent extraction (`LogisticsSchema` / `ForwarderSchema`): the response the
+  deterministic pre-extractor computes from that brief
+
+The conversation a model call belongs to is read from `conversation_messages`, a context
+variable the scenario runner sets before each turn; LangGraph runs every node in a copy
+of the caller's context, so concurrent conversations do not see each other's messages.
+"""
+
+import re
+from contextvars import ContextVar
+from typing_extensions import Any, Dict, List, Optional, Tuple
+
+from langchain_core.messages import BaseMessage, SystemMessage
+from benchmarks.fake_chat_model import ScriptedChatModel
+from src.supervisor_schema import ClarifyWithUser, NextAgent
+from src.field_extractor import normalize_field_key, pre_extract_agent_response
+from src.schema_registry import AGENT_SPECS, schema_registry
+import src.supervisor_agent as supervisor_module
+
+# ===== SCENARIOS =====
+# User messages of each conversation, from notebooks/full_agent.ipynb. Like there, the
+# logistics conversations that never give the mandatory fields end waiting for them.
+
+SCENARIOS: Dict[str, List[str]] = {
+    "logistics_step_by_step": [
+        "I want to enter the AWB/BL 12345 and AWB Date",
+        "Skip",
+        "Please continue",
+        "AWB/BL Date is 2025-09-30",
+        "Shipment Mode is Air",
+        "Skip and Confirm",
+    ],
+    "forwarder_dates": [
+        "I want to enter the Shipment Readiness Date is 2025-09-30",
+        "I want to enter the Shipment Readiness Date is 2025-09-30 and Pick up date is 2025-08-30",
+        "skip",
+        "confirm",
+    ],
+    "logistics_one_shot": [
+        "I want to enter the AWB/BL 12345, AWB/BL Date 2025-09-24 and Shipment Mode Air, skip, yes, proceed without providing it",
+        "Confirm",
+    ],
+    "forwarder_labeled": [
+        "Shipping Line: HAPAG lIOYD - HAPAG lIOYD , Shipment Readiness Date is 2025-09-30 , Pick up Date is 2025-10-30 , "
+        "Port Of Destination : JISP - JEDDAH SEAPORT , ETA: 2026-07-15 , Clearing Number : 161143 , Country Of Origin : LOCAL",
+        "Shipping Line/Airline: HAPAG lIOYD - HAPAG lIOYD",
+        "skip",
+        "confirm",
+    ],
+    "both_agents_full_record": [
+        "Add this record. Division_Name: PHARMA SERVICE, Organization_Name: PJO - PHARMA JEDDAH OPERATIONS, "
+        "Supplier_Name: 13992-CARE FOR PHARMACEUTICAL AND MEDICAL DISTRIBUTION, AWB/BL: AWB123456, AWB/BL Date: 2025-01-15, "
+        "Forwarder: ARAMEX , Incoterm: CIF, Product Temperature: 2-8ºC, Packing: Cartons, Shipping Temp: Ambient, "
+        "Gel Pack Expiry Date: 2025-12-30, Handover to Clearance: 2025-01-16, Aggregation: Batch A, Notified FF Date: 2025-01-14, "
+        "Green light – Date: 2025-01-13, Shipment Mode: AIR, Logistic Comment: Handle with care, Remark: Priority shipment, "
+        "and ASN Importation Date: 2025-01-17\n"
+        "Shipping Line: HAPAG lIOYD - HAPAG lIOYD , Shipment Readiness Date is 2025-09-30 , Pick up Date is 2025-10-30 , "
+        "Port Of Destination : JISP - JEDDAH SEAPORT , ETA: 2026-07-15 , Clearing Number : 161143 , Country Of Origin : LOCAL",
+        "confirm",
+    ],
+    # The record above with seeded values for every field, so both agents commit
+    "both_agents_commit": [
+        "Add this record. Division_Name: PHARMA SERVICE, Organization_Name: PJO - PHARMA JEDDAH OPERATIONS, "
+        "Supplier_Name: 13992-CARE FOR PHARMACEUTICAL AND MEDICAL DISTRIBUTION, AWB/BL: AWB123456, AWB/BL Date: 2025-01-15, "
+        "Forwarder: ARAMEX , Incoterm: CIF, Product Temperature: 2-8ºC, Packing: Passive, Shipping Temp: 2-8ºC, "
+        "Gel Pack Expiry Date: 2025-12-30, Handover to Clearance: 2025-01-16, Aggregation: yes, Notified FF Date: 2025-01-14, "
+        "Green light – Date: 2025-01-13, Shipment Mode: AIR, Logistic Comment: Handle with care, Remark: Priority shipment, "
+        "and ASN Importation Date: 2025-01-17\n"
+        "Shipping Line: HAPAG lIOYD - HAPAG lIOYD , Shipment Readiness Date is 2025-09-30 , Pick up Date is 2025-10-30 , "
+        "Port Of Destination : JISP - JEDDAH SEAPORT , ETA: 2026-07-15 , Clearing Number : 161143 , Country Of Origin : LOCAL",
+        "skip and confirm",
+    ],
+}
+
+# User messages of the conversation the current turn belongs to, oldest first
+conversation_messages: ContextVar[List[str]] = ContextVar("conversation_messages", default=[])
+
+SEGMENT_PATTERN = re.compile(r"[,;\n]")
+AND_PATTERN = re.compile(r"(\band\b)", re.IGNORECASE)
+PAIR_PATTERN = re.compile(r"^(.+?)\s*(?::|=|\bis\b)\s*(.+)$", re.IGNORECASE)
+FILLER_PATTERN = re.compile(r"^\s*(?:add this record\.?|i want to enter(?: the)?|please)\s*", re.IGNORECASE)
+CONFIRM_PATTERN = re.compile(r"\b(confirm|confirmed|yes|proceed)\b", re.IGNORECASE)
+SKIP_PATTERN = re.compile(r"\bskip\b", re.IGNORECASE)
+
+# ===== SCRIPTED UNDERSTANDING =====
+
+def _field_pair(segment: str, alias_map: Dict[str, str]) -> Optional[Tuple[str, str]]:
+    """(field, value) of a `Label: value`, `Label is value` or `Label value` segment, None if it names no field."""
+    segment = FILLER_PATTERN.sub("", segment).strip()
+    pair = PAIR_PATTERN.match(segment)
+    if pair and normalize_field_key(pair.group(1)) in alias_map:
+        return (alias_map[normalize_field_key(pair.group(1))], pair.group(2).strip())
+    words = segment.split()
+    for length in range(len(words), 0, -1):                 # longest field name, followed by its value if any
+        label = normalize_field_key(" ".join(words[:length]))
+        if label in alias_map:
+            return (alias_map[label], " ".join(words[length:]))
+    return None
+
+def scan_fields(text: str, agent_name: str) -> Dict[str, str]:
+    """`field → value` for every segment of `text` naming a field of the agent."""
+    alias_map = schema_registry.agent(agent_name).alias_map
+    values = {}
+    for segment in SEGMENT_PATTERN.split(text):
+        # "A is 1 and B is 2" holds two fields, "PHARMACEUTICAL AND MEDICAL" is one value
+        tokens = AND_PATTERN.split(segment)
+        parts = tokens[:1]
+        for conjunction, part in zip(tokens[1::2], tokens[2::2]):
+            if _field_pair(part, alias_map) is None:
+                parts[-1] += conjunction + part
+            else:
+                parts.append(part)
+        for part in parts:
+            pair = _field_pair(part, alias_map)
+            if pair is not None and pair[1]:                  # "AWB Date" names a field without a value
+                values[pair[0]] = pair[1]
+    return values
+
+def instruction_text(message: str) -> str:
+    """The segments of a user message naming no field of any agent ("skip", "yes, proceed", ...)."""
+    alias_maps = [schema_registry.agent(agent_name).alias_map for agent_name in AGENT_SPECS]
+    return ", ".join(segment for segment in SEGMENT_PATTERN.split(message)
+                     if not any(_field_pair(segment, alias_map) for alias_map in alias_maps))
+
+def scripted_brief(agent_name: str, user_messages: List[str], user_context: str = "None") -> str:
+    """The brief a supervisor would write for the agent from the user's messages so far."""
+    values = {}
+    for message in user_messages:
+        values.update(scan_fields(message, agent_name))
+    latest = instruction_text(user_messages[-1]) if user_messages else ""
+    field_lines = "\n".join(f"{field_name}: {value}" for field_name, value in values.items()) or "None"
+    return (f"[FIELD DATA]\n{field_lines}\n\n"
+            f"[STATUS]\n"
+            f"Confirmation: {'confirmed' if CONFIRM_PATTERN.search(latest) else 'not confirmed'}\n"
+            f"Skip optional: {'requested' if any(SKIP_PATTERN.search(instruction_text(message)) for message in user_messages) else 'not requested'}\n\n"
+            f"[USER CONTEXT]\n{user_context}")
+
+def scripted_routing(messages: List[BaseMessage]) -> ClarifyWithUser:
+    user_messages = conversation_messages.get()
+    latest = user_messages[-1] if user_messages else ""
+    agent_names = schema_registry.current().routing_index.route(latest) or \
+                  [agent_name for agent_name in AGENT_SPECS if scan_fields(latest, agent_name)]
+    return ClarifyWithUser(question    = "" if agent_names else "Which shipment details would you like to enter?",
+                           delegate_to = [NextAgent(agent_name) for agent_name in agent_names],
+                           agent_brief = latest)
+
+def scripted_agent_response(agent_name: str):
+    """Structured response of a sub agent: what the pre-extractor reads from the scripted brief."""
+    schema = schema_registry.agent(agent_name)
+    response = pre_extract_agent_response(agent_brief     = scripted_brief(agent_name, conversation_messages.get()),
+                                          fields          = schema.fields,
+                                          alias_map       = schema.alias_map,
+                                          seeded_indexes  = schema.seeded_indexes,
+                                          response_schema = schema.response_schema)
+    if response is None:
+        response = schema.response_schema(missing_mandatory_fields = schema.mandatory_fields,
+                                          missing_optional_fields  = schema.optional_fields,
+                                          shipment                 = schema.shipment_model())
+    return response
+
+def scripted_reply(messages: List[BaseMessage], force_llm_extraction: bool = False) -> str:
+    """Text answers: agent briefs for the supervisor's brief prompts, a short summary otherwise."""
+    system_content = messages[0].content if messages and isinstance(messages[0], SystemMessage) else None
+    prompts = supervisor_module.static_prompts()
+    for agent_name in AGENT_SPECS:
+        if system_content in (prompts["build_brief"][agent_name].content, prompts["update_brief"][agent_name].content):
+            # A non-empty USER CONTEXT makes the sub agent fall back to its structured-output call
+            return scripted_brief(agent_name, conversation_messages.get(),
+                                  user_context = "Entered from a benchmark scenario." if force_llm_extraction else "None")
+    return "The user is entering shipment records."
+
+def build_scenario_model(latency: float, force_llm_extraction: bool = False) -> ScriptedChatModel:
+    """Fake model answering every prompt of the agents as scripted above."""
+    structured_responders: Dict[str, Any] = {"ClarifyWithUser": scripted_routing}
+    for agent_name, spec in AGENT_SPECS.items():
+        structured_responders[spec.response_name] = lambda messages, agent_name=agent_name: scripted_agent_response(agent_name)
+    return ScriptedChatModel(
+        latency               = latency,
+        reply                 = lambda messages: scripted_reply(messages, force_llm_extraction),
+        structured_responders = structured_responders,
+    )
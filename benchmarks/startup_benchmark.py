@@ -0,0 +1,92 @@
+"""Cold-Start Import Benchmark.
+
+Imports a module in fresh interpreters with `-X importtime`, reports the median import
+time and the slowest imports, and exits with status 1 when the median is over budget or
+when a module that should only load on first use (the provider SDK, the MCP client, the
+optional ML packages) was imported. Meant to run in CI, so a change that makes new pods
+slower to take traffic fails the build.
+
+Usage (from the benchmarks directory, like app/main.py):
+    python startup_benchmark.py --module src.full_agent --budget 2.0 --runs 5
+    python startup_benchmark.py --module main --cwd ../app
+"""
+
+import os
+import sys
+import argparse
+import statistics
+import subprocess
+from pathlib import Path
+from typing_extensions import Dict, List, Tuple
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+
+STARTUP_BUDGET_SECONDS = float(os.getenv("STARTUP_BUDGET_SECONDS", "2.0"))
+
+# Loaded on first use or by the startup warm-up, never by importing the app
+LAZY_MODULES = ["langchain_openai", "openai", "langchain_mcp_adapters", "mcp", "transformers", "langchain_huggingface", "ddgs"]
+
+IMPORT_SCRIPT = """
+import sys, time
+sys.path.append({root!r})
+start = time.perf_counter()
+import {module}
+print("IMPORT_SECONDS", time.perf_counter() - start)
+print("LOADED", " ".join(name for name in {lazy_modules!r} if name in sys.modules))
+"""
+
+def import_once(module: str, cwd: Path) -> Tuple[float, List[str], Dict[str, int]]:
+    """Import `module` in a new interpreter; returns the seconds, lazy modules loaded and cumulative µs per module."""
+    script = IMPORT_SCRIPT.format(root=str(ROOT_DIR), module=module, lazy_modules=LAZY_MODULES)
+    env = {**os.environ, "OPENAI_API_KEY": os.environ.get("OPENAI_API_KEY", "benchmark")}
+    completed = subprocess.run([sys.executable, "-X", "importtime", "-c", script],
+                               cwd=cwd, env=env, capture_output=True, text=True)
+    if completed.returncode != 0:
+        raise RuntimeError(f"Importing {module} failed:\n{completed.stderr[-2000:]}")
+
+    seconds, loaded = 0.0, []
+    for line in completed.stdout.splitlines():
+        if line.startswith("IMPORT_SECONDS"):
+            seconds = float(line.split()[1])
+        elif line.startswith("LOADED"):
+            loaded = line.split()[1:]
+
+    cumulative = {}
+    for line in completed.stderr.splitlines():
+        if line.startswith("import time:") and not line.endswith("| imported package"):
+            _, _, cumulative_us, name = [part.strip() for part in line.replace("import time:", "|", 1).split("|")]
+            if cumulative_us.isdigit():
+                cumulative[name] = int(cumulative_us)
+    return seconds, loaded, cumulative
+
+def main():
+    parser = argparse.ArgumentParser(description="Cold-start import time benchmark with a budget")
+    parser.add_argument("--module", default="src.full_agent", help="Module to import")
+    parser.add_argument("--cwd", type=Path, default=Path("."), help="Working directory of the interpreter")
+    parser.add_argument("--runs", type=int, default=5, help="Fresh interpreters to time")
+    parser.add_argument("--budget", type=float, default=STARTUP_BUDGET_SECONDS, help="Maximum median import seconds")
+    parser.add_argument("--top", type=int, default=10, help="Slowest top-level imports to list")
+    args = parser.parse_args()
+
+    runs = [import_once(args.module, args.cwd) for _ in range(max(1, args.runs))]
+    median_seconds = statistics.median(seconds for seconds, _, _ in runs)
+    loaded = sorted(set().union(*(set(names) for _, names, _ in runs)))
+    _, _, cumulative = runs[-1]
+
+    print(f"{'module':<40}{'cumulative (ms)':>16}")
+    for name, cumulative_us in sorted(cumulative.items(), key=lambda item: item[1], reverse=True)[:args.top]:
+        print(f"{name:<40}{cumulative_us / 1000:>16.1f}")
+    print()
+    print(f"{'import ' + args.module:<40}{median_seconds:>15.2f}s  (median of {len(runs)}, budget {args.budget:.2f}s)")
+
+    failures = []
+    if median_seconds > args.budget:
+        failures.append(f"import time {median_seconds:.2f}s is over the {args.budget:.2f}s budget")
+    if loaded:
+        failures.append(f"modules meant to load on first use were imported: {', '.join(loaded)}")
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    sys.exit(1 if failures else 0)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+"""Batch Runner for Bulk Shipment Ingestion.
+
+Runs many shipment messages through `full_agent`, each in its own conversation thread,
+with at most BATCH_CONCURRENCY turns in flight. Results are yielded in completion order
+and a failing item only produces an error result, it never stops the rest of the batch.
+
+A batch is either a JSON array or JSONL (one item per line). An item is a message string
+or an object such as {"id": "...", "usermessage": "...", "username": "..."}; "message" and
+"body" are accepted for the text and "request_id" for the id. Items without a username
+get a fresh thread.
+"""
+
+import os
+import json
+import uuid
+import asyncio
+from dotenv import load_dotenv
+from typing_extensions import Any, AsyncIterator, Iterable, List, Optional
+
+from pydantic import BaseModel
+from langchain_core.messages import AnyMessage
+from src.turn_stream import new_turn_message, turn_messages
+from src.concurrency import thread_locks
+
+# Load environment variables
+load_dotenv()
+
+# ===== BATCH CONFIGURATION =====
+BATCH_CONCURRENCY     = int(os.getenv("BATCH_CONCURRENCY", "8"))       # default turns in flight per batch
+BATCH_MAX_CONCURRENCY = int(os.getenv("BATCH_MAX_CONCURRENCY", "64"))  # upper bound a caller may ask for
+
+MESSAGE_KEYS = ("usermessage", "message", "body")
+ID_KEYS      = ("id", "request_id")
+
+class BatchItem(BaseModel):
+    index    : int
+    id       : Optional[str] = None
+    message  : str = ""
+    username : Optional[str] = None
+    error    : Optional[str] = None        # set when the item could not be parsed
+
+class BatchItemResult(BaseModel):
+    index     : int
+    id        : Optional[str] = None
+    thread_id : Optional[str] = None
+    status    : str                        # "ok" or "error"
+    messages  : List[AnyMessage] = []      # messages produced by the item's turn
+    error     : Optional[str] = None
+    seconds   : float = 0.0
+
+# ===== PARSING =====
+
+def parse_batch_item(index: int, value: Any) -> BatchItem:
+    """Build a BatchItem from one decoded array element or JSONL line."""
+    if isinstance(value, str):
+        return BatchItem(index=index, message=value)
+    if not isinstance(value, dict):
+        return BatchItem(index=index, error=f"expected a string or an object, got {type(value).__name__}")
+
+    item_id = next((str(value[key]) for key in ID_KEYS if value.get(key) is not None), None)
+    message = next((value[key] for key in MESSAGE_KEYS if isinstance(value.get(key), str) and value[key].strip()), None)
+    if message is None:
+        return BatchItem(index=index, id=item_id, error=f"missing message text (one of {', '.join(MESSAGE_KEYS)})")
+    return BatchItem(index=index, id=item_id, message=message, username=value.get("username") or value.get("thread_id"))
+
+def parse_batch(text: str) -> List[BatchItem]:
+    """
+    Split a request body into batch items.
+
+    A body starting with "[" is read as a JSON array, anything else as JSONL. A malformed
+    JSONL line becomes an item carrying its parse error, so the other lines still run.
+    """
+    text = text.strip()
+    if text.startswith("["):
+        return [parse_batch_item(index, value) for index, value in enumerate(json.loads(text))]
+
+    items = []
+    for index, line in enumerate(line for line in text.splitlines() if line.strip()):
+        try:
+            items.append(parse_batch_item(index, json.loads(line)))
+        except json.JSONDecodeError as e:
+            items.append(BatchItem(index=index, error=f"invalid JSON: {e}"))
+    return items
+
+# ===== EXECUTION =====
+
+async def run_batch_item(graph, item: BatchItem) -> BatchItemResult:
+    """Run one item as a turn of its own thread, turning any failure into an error result."""
+    if item.error:
+        return BatchItemResult(index=item.index, id=item.id, status="error", error=item.error)
+
+    thread_id = item.username or f"batch-{uuid.uuid4()}"
+    turn_message = new_turn_message(item.message)
+    start = asyncio.get_running_loop().time()
+    try:
+        async with thread_locks.hold(thread_id):           # items sharing a username run in order
+            result = await graph.ainvoke({"messages": [turn_message]}, config={"configurable": {"thread_id": thread_id}})
+    except Exception as e:
+        print(f"Error in batch item {item.index}: {e}")
+        return BatchItemResult(index=item.index, id=item.id, thread_id=thread_id, status="error", error=str(e),
+                               seconds=asyncio.get_running_loop().time() - start)
+    return BatchItemResult(index     = item.index,
+                           id        = item.id,
+                           thread_id = thread_id,
+                           status    = "ok",
+                           messages  = turn_messages(result["messages"], turn_message.id),
+                           seconds   = asyncio.get_running_loop().time() - start)
+
+async def run_batch(graph, items: Iterable[BatchItem], concurrency: int = BATCH_CONCURRENCY) -> AsyncIterator[BatchItemResult]:
+    """
+    Run batch items concurrently and yield their results as they finish.
+
+    Args:
+        graph: The compiled full agent
+        items: Items to run
+        concurrency: Maximum number of turns in flight, capped at BATCH_MAX_CONCURRENCY
+
+    Yields:
+        One BatchItemResult per item, in completion order
+    """
+    semaphore = asyncio.Semaphore(max(1, min(concurrency, BATCH_MAX_CONCURRENCY)))
+
+    async def bounded(item: BatchItem) -> BatchItemResult:
+        async with semaphore:
+            return await run_batch_item(graph, item)
+
+    tasks = [asyncio.create_task(bounded(item)) for item in items]
+    try:
+        for next_result in asyncio.as_completed(tasks):
+            yield await next_result
+    finally:
+        for task in tasks:          # the consumer stopped early (e.g. the client disconnected)
+            task.cancel()
@@ -0,0 +1,458 @@
+"""Shared Checkpointer for the Inbound MultiAgent System.
+
+Every graph (full agent, supervisor and sub agents) compiles against the single
+checkpointer returned by `get_checkpointer()`, so a conversation is stored once
+and survives restarts. The backend is selected with CHECKPOINTER_BACKEND:
+
+- "sqlite" (default): durable SQLite file with WAL, batched commits and retention
+- "memory": process-local store bounded by a byte cap and an idle TTL per thread,
+  optionally spilling evicted threads to disk
+"""
+
+import os
+import time
+import pickle
+import hashlib
+import asyncio
+import sqlite3
+import threading
+from pathlib import Path
+from contextlib import contextmanager
+from collections import OrderedDict, defaultdict
+from dotenv import load_dotenv
+from typing_extensions import Any, AsyncIterator, Iterator, Optional, Sequence
+
+from langchain_core.runnables import RunnableConfig
+from langgraph.checkpoint.base import BaseCheckpointSaver, ChannelVersions, Checkpoint, CheckpointMetadata, CheckpointTuple
+from langgraph.checkpoint.memory import InMemorySaver
+from langgraph.checkpoint.sqlite import SqliteSaver
+
+# Load environment variables
+load_dotenv()
+
+# ===== CHECKPOINTER CONFIGURATION =====
+ROOT_DIR = Path(__file__).resolve().parent.parent
+
+CHECKPOINTER_BACKEND       = os.getenv("CHECKPOINTER_BACKEND", "sqlite")
+CHECKPOINT_DB_PATH         = os.getenv("CHECKPOINT_DB_PATH", str(ROOT_DIR / "checkpoints.sqlite3"))
+CHECKPOINT_MAX_PER_THREAD  = int(os.getenv("CHECKPOINT_MAX_PER_THREAD", "20"))       # conversation checkpoints kept per thread
+CHECKPOINT_THREAD_TTL_DAYS = float(os.getenv("CHECKPOINT_THREAD_TTL_DAYS", "30"))    # idle threads older than this are deleted
+CHECKPOINT_PRUNE_EVERY     = int(os.getenv("CHECKPOINT_PRUNE_EVERY", "100"))         # checkpoints saved between retention passes
+CHECKPOINT_COMMIT_INTERVAL = float(os.getenv("CHECKPOINT_COMMIT_INTERVAL", "1.0"))   # max seconds pending writes stay uncommitted
+
+CHECKPOINT_MEMORY_MAX_MB      = float(os.getenv("CHECKPOINT_MEMORY_MAX_MB", "256"))     # resident checkpoint bytes before LRU eviction
+CHECKPOINT_MEMORY_TTL_MINUTES = float(os.getenv("CHECKPOINT_MEMORY_TTL_MINUTES", "60")) # idle threads are evicted after this
+CHECKPOINT_SPILL_DIR          = os.getenv("CHECKPOINT_SPILL_DIR", "")                   # evicted threads are spilled here when set
+
+# ===== SQLITE CHECKPOINTER =====
+
+class DurableSqliteSaver(SqliteSaver):
+    """
+    SqliteSaver tuned for a long-running multi-user service.
+
+    - WAL journal with synchronous=NORMAL, so a commit does not fsync
+    - pending task writes are batched into the transaction of the next checkpoint,
+      or committed by a timer once they are CHECKPOINT_COMMIT_INTERVAL old
+    - retention: only the latest `max_per_thread` checkpoints of a thread's conversation
+      are kept, along with the sub agent checkpoints written since the oldest of them,
+      and threads idle for longer than `thread_ttl_days` are deleted; both run as one
+      batched pass every `prune_every` saved checkpoints
+    - async methods run the sync implementation in a worker thread, so the
+      saver works under `ainvoke` without blocking the event loop
+    """
+
+    def __init__(self, conn: sqlite3.Connection, *,
+                 max_per_thread: int = CHECKPOINT_MAX_PER_THREAD,
+                 thread_ttl_days: float = CHECKPOINT_THREAD_TTL_DAYS,
+                 prune_every: int = CHECKPOINT_PRUNE_EVERY,
+                 commit_interval: float = CHECKPOINT_COMMIT_INTERVAL):
+        super().__init__(conn)
+        self.max_per_thread = max_per_thread
+        self.thread_ttl_seconds = thread_ttl_days * 24 * 3600
+        self.prune_every = max(1, prune_every)
+        self.commit_interval = commit_interval
+        self._local = threading.local()
+        self._pending_since: Optional[float] = None
+        self._touched: dict = {}            # thread_id → last activity
+        self._puts_since_prune = 0
+
+    @classmethod
+    def from_path(cls, path: str, **kwargs) -> "DurableSqliteSaver":
+        return cls(sqlite3.connect(path, check_same_thread=False), **kwargs)
+
+    def setup(self) -> None:
+        if self.is_setup:
+            return
+        super().setup()
+        self.conn.executescript(
+            """
+            PRAGMA synchronous=NORMAL;
+            PRAGMA busy_timeout=5000;
+            CREATE TABLE IF NOT EXISTS thread_activity (
+                thread_id TEXT PRIMARY KEY,
+                last_seen REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_thread_activity_last_seen ON thread_activity (last_seen);
+            """
+        )
+
+    @contextmanager
+    def cursor(self, transaction: bool = True) -> Iterator[sqlite3.Cursor]:
+        with self.lock:
+            self.setup()
+            cur = self.conn.cursor()
+            try:
+                yield cur
+            finally:
+                if transaction:
+                    now = time.monotonic()
+                    if not getattr(self._local, "defer_commit", False):
+                        self.conn.commit()
+                        self._pending_since = None
+                    elif self._pending_since is None:
+                        self._pending_since = now
+                        self._schedule_commit()
+                    elif now - self._pending_since >= self.commit_interval:
+                        self.conn.commit()
+                        self._pending_since = None
+                cur.close()
+
+    def _schedule_commit(self) -> None:
+        """Commit deferred writes after `commit_interval`, even when no other call follows them."""
+        timer = threading.Timer(max(0.0, self.commit_interval), self._commit_pending)
+        timer.daemon = True
+        timer.start()
+
+    def _commit_pending(self) -> None:
+        with self.lock:
+            if self._pending_since is not None:
+                self.conn.commit()
+                self._pending_since = None
+
+    def flush(self) -> None:
+        """Commit pending writes and run a retention pass."""
+        self.prune()
+        with self.lock:
+            self.conn.commit()
+            self._pending_since = None
+
+    # ----- writes -----
+
+    def put(self, config: RunnableConfig, checkpoint: Checkpoint, metadata: CheckpointMetadata,
+            new_versions: ChannelVersions) -> RunnableConfig:
+        saved_config = super().put(config, checkpoint, metadata, new_versions)
+        configurable = saved_config["configurable"]
+        with self.lock:
+            self._touched[str(configurable["thread_id"])] = time.time()
+            self._puts_since_prune += 1
+            prune_due = self._puts_since_prune >= self.prune_every
+        if prune_due:
+            self.prune()
+        return saved_config
+
+    def put_writes(self, config: RunnableConfig, writes: Sequence[tuple[str, Any]], task_id: str,
+                   task_path: str = "") -> None:
+        # Task writes ride along with the next checkpoint's commit
+        self._local.defer_commit = True
+        try:
+            super().put_writes(config, writes, task_id, task_path)
+        finally:
+            self._local.defer_commit = False
+
+    def delete_thread(self, thread_id: str) -> None:
+        super().delete_thread(thread_id)
+        with self.cursor() as cur:
+            cur.execute("DELETE FROM thread_activity WHERE thread_id = ?", (str(thread_id),))
+
+    # ----- retention -----
+
+    def prune(self) -> None:
+        """Trim old checkpoints of recently active threads and delete expired threads."""
+        with self.lock:
+            touched, self._touched, self._puts_since_prune = self._touched, {}, 0
+        with self.cursor() as cur:
+            for thread_id in touched:
+                # The conversation itself: keep its latest `max_per_thread` checkpoints
+                cur.execute(
+                    "DELETE FROM checkpoints WHERE thread_id = ? AND checkpoint_ns = '' AND checkpoint_id NOT IN ("
+                    "SELECT checkpoint_id FROM checkpoints WHERE thread_id = ? AND checkpoint_ns = '' "
+                    "ORDER BY checkpoint_id DESC LIMIT ?)",
+                    (thread_id, thread_id, self.max_per_thread),
+                )
+                # Sub agents get a new namespace per call (e.g. "LogisticsAgent:<task id>") that is never read
+                # again once the call ended; checkpoint ids are time ordered, so a sub agent checkpoint older than
+                # the oldest conversation checkpoint kept belongs to a finished call
+                cur.execute(
+                    "DELETE FROM checkpoints WHERE thread_id = ? AND checkpoint_ns != '' AND checkpoint_id < ("
+                    "SELECT MIN(checkpoint_id) FROM checkpoints WHERE thread_id = ? AND checkpoint_ns = '')",
+                    (thread_id, thread_id),
+                )
+                cur.execute(
+                    "DELETE FROM writes WHERE thread_id = ? AND NOT EXISTS ("
+                    "SELECT 1 FROM checkpoints WHERE checkpoints.thread_id = writes.thread_id "
+                    "AND checkpoints.checkpoint_ns = writes.checkpoint_ns AND checkpoints.checkpoint_id = writes.checkpoint_id)",
+                    (thread_id,),
+                )
+            cur.executemany(
+                "INSERT INTO thread_activity (thread_id, last_seen) VALUES (?, ?) "
+                "ON CONFLICT(thread_id) DO UPDATE SET last_seen = MAX(last_seen, excluded.last_seen)",
+                list(touched.items()),
+            )
+            if self.thread_ttl_seconds > 0:
+                expired = "SELECT thread_id FROM thread_activity WHERE last_seen < ?"
+                cutoff = time.time() - self.thread_ttl_seconds
+                cur.execute(f"DELETE FROM checkpoints WHERE thread_id IN ({expired})", (cutoff,))
+                cur.execute(f"DELETE FROM writes WHERE thread_id IN ({expired})", (cutoff,))
+                cur.execute("DELETE FROM thread_activity WHERE last_seen < ?", (cutoff,))
+
+    # ----- async API -----
+
+    async def aget_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        return await asyncio.to_thread(self.get_tuple, config)
+
+    async def alist(self, config: Optional[RunnableConfig], *, filter: Optional[dict[str, Any]] = None,
+                    before: Optional[RunnableConfig] = None, limit: Optional[int] = None) -> AsyncIterator[CheckpointTuple]:
+        checkpoints = await asyncio.to_thread(lambda: list(self.list(config, filter=filter, before=before, limit=limit)))
+        for checkpoint_tuple in checkpoints:
+            yield checkpoint_tuple
+
+    async def aput(self, config: RunnableConfig, checkpoint: Checkpoint, metadata: CheckpointMetadata,
+                   new_versions: ChannelVersions) -> RunnableConfig:
+        return await asyncio.to_thread(self.put, config, checkpoint, metadata, new_versions)
+
+    async def aput_writes(self, config: RunnableConfig, writes: Sequence[tuple[str, Any]], task_id: str,
+                          task_path: str = "") -> None:
+        await asyncio.to_thread(self.put_writes, config, writes, task_id, task_path)
+
+    async def adelete_thread(self, thread_id: str) -> None:
+        await asyncio.to_thread(self.delete_thread, thread_id)
+
+    def metrics(self) -> dict:
+        """Stored thread count and database size."""
+        with self.cursor(transaction=False) as cur:
+            threads = cur.execute("SELECT COUNT(DISTINCT thread_id) FROM checkpoints").fetchone()[0]
+            page_count = cur.execute("PRAGMA page_count").fetchone()[0]
+            page_size = cur.execute("PRAGMA page_size").fetchone()[0]
+        return {"backend": "sqlite", "threads": threads, "db_bytes": page_count * page_size}
+
+# ===== BOUNDED IN-MEMORY CHECKPOINTER =====
+
+class BoundedInMemorySaver(InMemorySaver):
+    """
+    InMemorySaver that evicts whole threads instead of growing forever.
+
+    Threads are kept in LRU order with the serialized size of their checkpoints,
+    writes and channel blobs. A thread is evicted when it has been idle for longer
+    than `idle_ttl_seconds` or when the resident total exceeds `max_bytes`
+    (least recently used first, never the thread being served). With `spill_dir`
+    set an evicted thread is pickled to disk and loaded back on its next access,
+    so a returning user picks up where they left off. Without it an evicted thread is
+    gone as a whole: when it is evicted in the middle of a turn, the rest of that turn's
+    checkpoints and writes are dropped (see `_is_orphaned`) and its next turn starts empty.
+    """
+
+    def __init__(self, *, max_bytes: int = int(CHECKPOINT_MEMORY_MAX_MB * 1024 * 1024),
+                 idle_ttl_seconds: float = CHECKPOINT_MEMORY_TTL_MINUTES * 60,
+                 spill_dir: Optional[str] = CHECKPOINT_SPILL_DIR or None, serde: Any = None):
+        super().__init__(serde=serde)
+        self.max_bytes = max_bytes
+        self.idle_ttl_seconds = idle_ttl_seconds
+        self.spill_dir = Path(spill_dir) if spill_dir else None
+        if self.spill_dir is not None:
+            self.spill_dir.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.RLock()
+        self._threads: OrderedDict = OrderedDict()   # thread_id → [last access, bytes], least recent first
+        self._write_keys = defaultdict(set)           # thread_id → keys into self.writes
+        self._blob_keys = defaultdict(set)            # thread_id → keys into self.blobs
+        self._resident_bytes = 0
+        self._evictions = 0
+        self._reloads = 0
+        self._orphaned = 0                            # puts and writes dropped for threads evicted mid-turn
+
+    # ----- bookkeeping -----
+
+    def _touch(self, thread_id: str, delta: int = 0) -> None:
+        entry = self._threads.pop(thread_id, [0.0, 0])
+        entry[0] = time.monotonic()
+        entry[1] += delta
+        self._threads[thread_id] = entry
+        self._resident_bytes += delta
+
+    def _spill_path(self, thread_id: str) -> Path:
+        return self.spill_dir / f"{hashlib.sha256(str(thread_id).encode()).hexdigest()}.pkl"
+
+    def _drop(self, thread_id: str) -> dict:
+        """Remove a thread from memory and return its data."""
+        data = {
+            "storage": {ns: dict(checkpoints) for ns, checkpoints in self.storage.pop(thread_id, {}).items()},
+            "writes" : {key: self.writes.pop(key) for key in self._write_keys.pop(thread_id, ()) if key in self.writes},
+            "blobs"  : {key: self.blobs.pop(key) for key in self._blob_keys.pop(thread_id, ()) if key in self.blobs},
+        }
+        entry = self._threads.pop(thread_id, None)
+        if entry is not None:
+            self._resident_bytes -= entry[1]
+        return data
+
+    def _evict(self, thread_id: str) -> None:
+        data = self._drop(thread_id)
+        self._evictions += 1
+        if self.spill_dir is not None and data["storage"]:
+            path = self._spill_path(thread_id)
+            with open(path.with_suffix(".tmp"), "wb") as spill_file:
+                pickle.dump(data, spill_file, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(path.with_suffix(".tmp"), path)
+
+    def _ensure_resident(self, thread_id: str) -> None:
+        """Load a spilled thread back into memory."""
+        if thread_id in self._threads or self.spill_dir is None:
+            return
+        path = self._spill_path(thread_id)
+        if not path.exists():
+            return
+        with open(path, "rb") as spill_file:
+            data = pickle.load(spill_file)
+        path.unlink()
+        self.storage[thread_id] = defaultdict(dict, data["storage"])
+        self.writes.update(data["writes"])
+        self.blobs.update(data["blobs"])
+        self._write_keys[thread_id] = set(data["writes"])
+        self._blob_keys[thread_id] = set(data["blobs"])
+        size = sum(len(checkpoint[1]) + len(metadata[1])
+                   for checkpoints in data["storage"].values() for checkpoint, metadata, _ in checkpoints.values())
+        size += sum(len(write[2][1]) for writes in data["writes"].values() for write in writes.values())
+        size += sum(len(blob[1]) for blob in data["blobs"].values())
+        self._touch(thread_id, size)
+        self._reloads += 1
+
+    def _enforce_limits(self, keep: Optional[str] = None) -> None:
+        """Evict idle threads and, beyond the byte cap, the least recently used ones."""
+        now = time.monotonic()
+        for thread_id in list(self._threads):
+            last_access, _ = self._threads[thread_id]
+            idle = self.idle_ttl_seconds > 0 and now - last_access > self.idle_ttl_seconds
+            if thread_id == keep or not (idle or self._resident_bytes > self.max_bytes):
+                break
+            self._evict(thread_id)
+
+    def _is_orphaned(self, thread_id: str, checkpoint_ns: str, parent_id: Optional[str]) -> bool:
+        """
+        Whether a put continues a history that is no longer in memory.
+
+        Only a thread evicted mid-turn without a spill directory gets here: a checkpoint
+        whose parent is gone, or a sub agent's first checkpoint in a thread without root
+        checkpoints. Storing it would bring back a partial thread holding only this
+        turn's new channels (e.g. agent_status without messages).
+        """
+        namespaces = self.storage.get(thread_id, {})
+        if parent_id:
+            return parent_id not in namespaces.get(checkpoint_ns, {})
+        return checkpoint_ns != "" and not namespaces.get("")
+
+    def _writes_size(self, outer_key: tuple) -> int:
+        return sum(len(write[2][1]) for write in self.writes.get(outer_key, {}).values())
+
+    # ----- checkpointer API -----
+
+    def get_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        thread_id = config["configurable"]["thread_id"]
+        with self._lock:
+            self._ensure_resident(thread_id)
+            checkpoint_tuple = super().get_tuple(config)
+            if thread_id in self._threads:
+                self._touch(thread_id)
+            elif not any(self.storage.get(thread_id, {}).values()):
+                self.storage.pop(thread_id, None)   # lookups of unknown threads must not leave entries behind
+            self._enforce_limits(keep=thread_id)
+            return checkpoint_tuple
+
+    def list(self, config: Optional[RunnableConfig], *, filter: Optional[dict[str, Any]] = None,
+             before: Optional[RunnableConfig] = None, limit: Optional[int] = None) -> Iterator[CheckpointTuple]:
+        with self._lock:
+            if config is not None:
+                self._ensure_resident(config["configurable"]["thread_id"])
+            return iter(list(super().list(config, filter=filter, before=before, limit=limit)))
+
+    def put(self, config: RunnableConfig, checkpoint: Checkpoint, metadata: CheckpointMetadata,
+            new_versions: ChannelVersions) -> RunnableConfig:
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"]["checkpoint_ns"]
+        with self._lock:
+            self._ensure_resident(thread_id)
+            if self._is_orphaned(thread_id, checkpoint_ns, config["configurable"].get("checkpoint_id")):
+                self._orphaned += 1
+                return {"configurable": {"thread_id": thread_id, "checkpoint_ns": checkpoint_ns, "checkpoint_id": checkpoint["id"]}}
+            previous = self.storage.get(thread_id, {}).get(checkpoint_ns, {}).get(checkpoint["id"])
+            saved_config = super().put(config, checkpoint, metadata, new_versions)
+            saved = self.storage[thread_id][checkpoint_ns][checkpoint["id"]]
+            delta = len(saved[0][1]) + len(saved[1][1])
+            if previous is not None:
+                delta -= len(previous[0][1]) + len(previous[1][1])
+            for channel, version in new_versions.items():
+                blob_key = (thread_id, checkpoint_ns, channel, version)
+                if blob_key not in self._blob_keys[thread_id]:
+                    self._blob_keys[thread_id].add(blob_key)
+                    delta += len(self.blobs[blob_key][1])
+            self._touch(thread_id, delta)
+            self._enforce_limits(keep=thread_id)
+            return saved_config
+
+    def put_writes(self, config: RunnableConfig, writes: Sequence[tuple[str, Any]], task_id: str,
+                   task_path: str = "") -> None:
+        thread_id = config["configurable"]["thread_id"]
+        outer_key = (thread_id, config["configurable"].get("checkpoint_ns", ""), config["configurable"]["checkpoint_id"])
+        with self._lock:
+            self._ensure_resident(thread_id)
+            if self._is_orphaned(*outer_key):
+                self._orphaned += 1
+                return
+            before = self._writes_size(outer_key)
+            super().put_writes(config, writes, task_id, task_path)
+            self._write_keys[thread_id].add(outer_key)
+            self._touch(thread_id, self._writes_size(outer_key) - before)
+            self._enforce_limits(keep=thread_id)
+
+    def delete_thread(self, thread_id: str) -> None:
+        with self._lock:
+            self._drop(thread_id)
+            if self.spill_dir is not None:
+                self._spill_path(thread_id).unlink(missing_ok=True)
+
+    def metrics(self, top: int = 10) -> dict:
+        """Resident thread count, bytes per thread and eviction counters."""
+        with self._lock:
+            self._enforce_limits()
+            sizes = {str(thread_id): entry[1] for thread_id, entry in self._threads.items()}
+            return {
+                "backend"          : "memory",
+                "resident_threads" : len(sizes),
+                "resident_bytes"   : self._resident_bytes,
+                "max_bytes"        : self.max_bytes,
+                "idle_ttl_seconds" : self.idle_ttl_seconds,
+                "bytes_per_thread" : {
+                    "avg": self._resident_bytes // len(sizes) if sizes else 0,
+                    "max": max(sizes.values(), default=0),
+                },
+                "largest_threads"  : sorted(sizes.items(), key=lambda item: item[1], reverse=True)[:top],
+                "spilled_threads"  : sum(1 for _ in self.spill_dir.glob("*.pkl")) if self.spill_dir is not None else 0,
+                "evictions"        : self._evictions,
+                "reloads"          : self._reloads,
+                "orphaned_writes"  : self._orphaned,
+            }
+
+# ===== SHARED INSTANCE =====
+
+_checkpointer: Optional[BaseCheckpointSaver] = None
+_checkpointer_lock = threading.Lock()
+
+def get_checkpointer() -> BaseCheckpointSaver:
+    """Return the process-wide checkpointer for the configured backend."""
+    global _checkpointer
+    with _checkpointer_lock:
+        if _checkpointer is None:
+            if CHECKPOINTER_BACKEND == "sqlite":
+                _checkpointer = DurableSqliteSaver.from_path(CHECKPOINT_DB_PATH)
+            elif CHECKPOINTER_BACKEND == "memory":
+                _checkpointer = BoundedInMemorySaver()
+            else:
+                raise ValueError(f"Unknown CHECKPOINTER_BACKEND '{CHECKPOINTER_BACKEND}', expected 'sqlite' or 'memory'")
+        return _checkpointer
@@ -0,0 +1,63 @@
+"""Request Serialization per Conversation Thread.
+
+- Turns of the same conversation thread must not overlap: two concurrent turns of one
+  `thread_id` read the same checkpoint and the later write silently drops the other's
+  `agent_status`/`list_of_agents` changes. `thread_locks` hands out one FIFO lock per
+  thread, so a user's turns are applied one after the other, in arrival order.
+- LLM_MAX_CONCURRENCY sizes the process-wide limit of model calls in flight to the
+  provider limits; it is enforced, and adapted to observed 429s, by `src.model_gateway`.
+
+asyncio primitives belong to the event loop they are first used on, so the locks are kept
+per running loop (the server, the batch CLI and tests each run their own).
+"""
+
+import os
+import asyncio
+import weakref
+from contextlib import asynccontextmanager
+from dotenv import load_dotenv
+from typing_extensions import AsyncIterator, Dict, List
+
+# Load environment variables
+load_dotenv()
+
+# ===== CONCURRENCY CONFIGURATION =====
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "16"))  # upper bound of model calls in flight per process
+THREAD_QUEUE_LIMIT  = int(os.getenv("THREAD_QUEUE_LIMIT", "8"))    # turns of one thread allowed to wait
+
+class ThreadBusyError(Exception):
+    """Raised when too many turns of one thread are already waiting."""
+
+# ===== PER-THREAD LOCKS =====
+
+class ThreadLocks:
+    """One FIFO lock per conversation thread, dropped once no turn holds or waits for it."""
+
+    def __init__(self, queue_limit: int = THREAD_QUEUE_LIMIT):
+        self.queue_limit = queue_limit
+        self._by_loop = weakref.WeakKeyDictionary()      # event loop → {thread_id: [lock, turns holding or waiting]}
+
+    def _locks(self) -> Dict[str, List]:
+        return self._by_loop.setdefault(asyncio.get_running_loop(), {})
+
+    @asynccontextmanager
+    async def hold(self, thread_id: str) -> AsyncIterator[None]:
+        """Wait for the thread's earlier turns to finish, then run this turn alone."""
+        locks = self._locks()
+        entry = locks.setdefault(thread_id, [asyncio.Lock(), 0])
+        if entry[1] > self.queue_limit:
+            raise ThreadBusyError(f"Thread {thread_id} already has {entry[1]} turns in progress or queued")
+        entry[1] += 1
+        try:
+            async with entry[0]:
+                yield
+        finally:
+            entry[1] -= 1
+            if entry[1] == 0:
+                del locks[thread_id]
+
+    def metrics(self) -> dict:
+        locks = self._by_loop.get(asyncio.get_running_loop(), {})
+        return {"active_threads": len(locks), "queued_turns": sum(entry[1] - 1 for entry in locks.values())}
+
+thread_locks = ThreadLocks()
@@ -0,0 +1,290 @@
+"""Deterministic Field Pre-Extraction.
+
+This module parses agent briefs that already carry clean `Field: value` pairs
+(the [FIELD DATA] / [STATUS] / [USER CONTEXT] layout produced by the supervisor)
+and fills the agent's structured schema locally. When every value it finds is
+unambiguous the structured-output LLM call can be skipped entirely; otherwise
+`pre_extract_agent_response` returns None and the caller falls back to the LLM.
+"""
+
+import re
+from datetime import datetime
+from typing_extensions import Optional, List, Dict, Tuple, Type
+
+from pydantic import BaseModel, ValidationError
+from src.seeded_values import SeededValueIndex
+
+# ===== FIELD ALIASES =====
+# Alternative names operators use for the IBL_SCHEMA.json fields. Aliases are only
+# applied to fields that exist in the agent's schema, so an alias can never route a
+# value to the wrong agent.
+FIELD_ALIASES = {
+    # logistics_agent
+    "Division_Name"           : ["division", "division name"],
+    "Organization_Name"       : ["organization", "organisation", "organization name", "organisation name", "org"],
+    "Supplier_Name"           : ["supplier", "supplier name", "manufacturer"],
+    "AWB/BL"                  : ["awb", "awb no", "awb number", "air waybill", "air waybill number", "airway bill",
+                                 "airway bill number", "bl", "bl no", "bl number", "bill of lading",
+                                 "bill of lading number", "awb bl number", "awb bl no"],
+    "AWB/BL Date"             : ["awb date", "bl date", "air waybill date", "bill of lading date", "awb bl issue date"],
+    "Forwarder"               : ["freight forwarder", "forwarder name"],
+    "Incoterm"                : ["incoterms", "inco term", "inco terms"],
+    "Product Temperature"     : ["product temp", "temperature", "product temperature range"],
+    "Packing"                 : ["packing type", "packaging"],
+    "Shipping Temp"           : ["shipping temperature", "transit temperature"],
+    "Gel Pack Expiry Date"    : ["gel pack expiry", "gel pack expiration date"],
+    "Handover to Clearance"   : ["handover to clearance date", "clearance handover", "handover date"],
+    "Notified FF Date"        : ["notified ff", "ff notified date", "notified forwarder date"],
+    "Green light - Date"      : ["green light", "green light date", "greenlight date"],
+    "Shipment Mode"           : ["mode", "shipping mode", "transport mode", "mode of transport"],
+    "Logistic Comment"        : ["logistics comment", "logistic comments", "logistics comments"],
+    "Remark"                  : ["remarks"],
+    "ASN Importation Date"    : ["asn date", "asn import date", "asn importation"],
+    # forwarder_agent
+    "Clearing Number"         : ["clearing no", "clearing num", "clearing"],
+    "Shipment Readiness Date" : ["readiness date", "ready date", "cargo readiness date", "shipment ready date"],
+    "Pick Up Date"            : ["pickup date", "pickup", "pick up", "collection date"],
+    "No. of Pallets"          : ["pallets", "number of pallets", "pallet count"],
+    "No.of Containers"        : ["containers", "number of containers", "container count"],
+    "Commodity Description"   : ["commodity", "goods description"],
+    "Country Of Origin (loading_port)" : ["country of origin", "coo", "origin country", "origin"],
+    "AirPort/SeaPort name"    : ["airport", "seaport", "port name", "airport name", "seaport name", "port of loading"],
+    "Shipping Line/Airline"   : ["shipping line", "airline", "carrier"],
+    "Port Of Destination"     : ["destination port", "port of discharge", "pod"],
+    "Actual ATA - FF"         : ["actual ata", "ata", "ata ff"],
+    "Gross weight (KG)"       : ["gross weight", "gross weight kg", "gw"],
+    "CBM"                     : ["volume", "cubic meter", "cubic meters"],
+    "ETD"                     : ["estimated time of departure", "departure date"],
+    "Chargable Weight(KG)"    : ["chargable weight", "chargeable weight", "chargeable weight kg"],
+    "Freight Cost"            : ["freight charges", "freight charge"],
+    "Total values of Goods"   : ["total value of goods", "goods value", "total goods value"],
+    "Freight Invoice Number"  : ["freight invoice", "freight invoice no", "invoice number"],
+    "ETA"                     : ["estimated time of arrival", "arrival date"],
+    "Freight Comment"         : ["freight comments", "forwarder comment"],
+}
+
+# Values that mean "no value provided" rather than a literal value
+NULL_MARKERS = {"", "none", "null", "n/a", "na", "-", "not provided", "missing", "not specified", "unknown", "tbd"}
+
+# Accepted date layouts. Day/month orderings that cannot be told apart (e.g. 05/03/2025)
+# are deliberately left out so they go to the LLM instead of being guessed.
+DATE_FORMATS = ["%Y-%m-%d", "%Y/%m/%d", "%d %b %Y", "%d %B %Y", "%b %d, %Y", "%B %d, %Y", "%b %d %Y", "%B %d %Y"]
+
+SECTION_PATTERN = re.compile(r"^\s*\[(FIELD DATA|STATUS|USER CONTEXT)\]\s*$", re.IGNORECASE | re.MULTILINE)
+BULLET_PATTERN  = re.compile(r"^\s*(?:[-*•]|\d+[.)])\s+")
+NEGATION_PATTERN = re.compile(r"\bnot\b|\bno\b|n't|\bunconfirmed\b|\bpending\b")
+LABELED_PATTERN  = re.compile(r"^\s*[A-Za-z][^:]{0,59}:")          # a segment written as `Key: value`
+
+# ===== UTILITY FUNCTIONS =====
+
+def normalize_field_key(key: str) -> str:
+    """Normalize a field name or alias for lookup (case, separators and punctuation insensitive)."""
+    key = re.sub(r"[_\-\u2013\u2014/().:\[\]]", " ", key.lower())
+    return re.sub(r"\s+", " ", key).strip()
+
+def build_alias_map(fields: List[dict]) -> Dict[str, str]:
+    """
+    Build the normalized name/alias → canonical field lookup for one agent.
+
+    Args:
+        fields: The agent's field definitions from IBL_SCHEMA.json
+
+    Returns:
+        Dictionary mapping every normalized name and alias to its schema field name.
+        Aliases claimed by more than one field of the same agent are dropped.
+    """
+    alias_map = {}
+    ambiguous = set()
+    for field_item in fields:
+        field_name = field_item["field"]
+        names = [field_name, re.sub(r"\(.*?\)", "", field_name)] + FIELD_ALIASES.get(field_name, [])
+        for name in names:
+            key = normalize_field_key(name)
+            if key in alias_map and alias_map[key] != field_name:
+                ambiguous.add(key)
+            alias_map.setdefault(key, field_name)
+    for key in ambiguous:
+        del alias_map[key]
+    return alias_map
+
+def parse_date_value(value: str) -> Optional[str]:
+    """Parse a date written in one of the unambiguous `DATE_FORMATS` into ISO format."""
+    cleaned = re.sub(r"(\d)(st|nd|rd|th)\b", r"\1", value.strip())
+    for date_format in DATE_FORMATS:
+        try:
+            return datetime.strptime(cleaned, date_format).date().isoformat()
+        except ValueError:
+            continue
+    return None
+
+def _split_sections(agent_brief: str) -> Dict[str, str]:
+    """Split a supervisor brief into its [FIELD DATA], [STATUS] and [USER CONTEXT] sections."""
+    sections = {}
+    matches = list(SECTION_PATTERN.finditer(agent_brief))
+    for index, match in enumerate(matches):
+        end = matches[index + 1].start() if index + 1 < len(matches) else len(agent_brief)
+        sections[match.group(1).upper()] = agent_brief[match.end():end].strip()
+    return sections
+
+def _clean_value(value: str) -> str:
+    return value.strip().strip(",;").strip().strip("\"'`").strip()
+
+def _split_pairs(line: str, alias_map: Dict[str, str]) -> Optional[List[Tuple[str, str]]]:
+    """
+    Split one line into (field, value) pairs.
+
+    A line may carry several pairs separated by commas or semicolons
+    ("AWB/BL: X, Shipment Mode: Air"); the split is only applied when every
+    segment starts with a known field, so values containing commas stay intact.
+    Returns None when the line cannot be mapped unambiguously, including a line of
+    several `Key: value` segments that are not all known fields ("AWB/BL: X, Foo: bar").
+    """
+    segments = re.split(r"[,;]\s*", line)
+    if len(segments) > 1:
+        split = [segment.partition(":") for segment in segments]
+        labeled = [segment for segment in segments if LABELED_PATTERN.match(segment)]
+        if len(labeled) == len(segments) and all(normalize_field_key(key) in alias_map for key, _, _ in split):
+            return [(alias_map[normalize_field_key(key)], _clean_value(value)) for key, _, value in split]
+        if len(labeled) > 1:
+            return None
+
+    key, separator, value = line.partition(":")
+    if not separator or normalize_field_key(key) not in alias_map:
+        return None
+    return [(alias_map[normalize_field_key(key)], _clean_value(value))]
+
+def _coerce_value(field_item: dict, value: str, seeded_index: Optional[SeededValueIndex]) -> Tuple[Optional[bool], Optional[str]]:
+    """
+    Coerce a raw value to the field's dataType and seeded values.
+
+    Returns:
+        (ok, value) where ok is True for a clean value, None for a value that does not
+        resolve to a seeded value with enough confidence (the user has to be asked),
+        and False when the value is ambiguous for this field (the LLM has to decide)
+    """
+    if field_item.get("dataType") == "date":
+        parsed = parse_date_value(value)
+        return (parsed is not None, parsed)
+
+    if seeded_index is not None:
+        match = seeded_index.resolve(value)
+        return (True, match.value) if match.value is not None else (None, None)
+
+    return (True, value)
+
+def _parse_flag(value: str, positive_words: List[str]) -> Optional[bool]:
+    value = value.lower()
+    if NEGATION_PATTERN.search(value):
+        return False
+    if any(word in value for word in positive_words):
+        return True
+    return None
+
+def _parse_status(status_text: str) -> Optional[Tuple[bool, bool]]:
+    """Read the (confirmed, skip_optional) flags from the [STATUS] section."""
+    confirmed = skip_optional = None
+    for line in status_text.splitlines():
+        key, separator, value = BULLET_PATTERN.sub("", line).partition(":")
+        if not separator:
+            continue
+        key = normalize_field_key(key)
+        if key.startswith("confirm"):
+            confirmed = _parse_flag(value, ["confirm"])
+        elif key.startswith("skip"):
+            skip_optional = _parse_flag(value, ["skip", "requested"])
+    if confirmed is None or skip_optional is None:
+        return None
+    return (confirmed, skip_optional)
+
+# ===== PRE-EXTRACTION =====
+
+def extract_field_values(field_data: str, fields: List[dict], alias_map: Dict[str, str],
+                         seeded_indexes: Dict[str, SeededValueIndex]) -> Optional[Tuple[Dict[str, str], List[str]]]:
+    """
+    Extract field values from `Field: value` lines.
+
+    Args:
+        field_data: Text holding one or more `Field: value` lines
+        fields: The agent's field definitions from IBL_SCHEMA.json
+        alias_map: Lookup built by `build_alias_map(fields)`
+        seeded_indexes: Similarity indexes built by `build_seeded_value_indexes(fields)`
+
+    Returns:
+        (values, unresolved) where values maps field name → coerced value and unresolved
+        lists the fields whose value matched no seeded value confidently; None if any
+        line is ambiguous
+    """
+    fields_by_name = {field_item["field"]: field_item for field_item in fields}
+    values = {}
+    unresolved = []
+    for line in field_data.splitlines():
+        line = BULLET_PATTERN.sub("", line).strip()
+        if line.lower() in NULL_MARKERS:
+            continue
+        pairs = _split_pairs(line, alias_map)
+        if pairs is None:
+            return None
+        for field_name, value in pairs:
+            if value.lower() in NULL_MARKERS:
+                continue
+            ok, value = _coerce_value(fields_by_name[field_name], value, seeded_indexes.get(field_name))
+            if ok is None:
+                unresolved.append(field_name)
+                continue
+            if not ok or values.get(field_name, value) != value:
+                return None
+            values[field_name] = value
+    unresolved = [field_name for field_name in dict.fromkeys(unresolved) if field_name not in values]
+    return (values, unresolved)
+
+def pre_extract_agent_response(agent_brief: str, fields: List[dict], alias_map: Dict[str, str],
+                               seeded_indexes: Dict[str, SeededValueIndex], response_schema: Type[BaseModel]) -> Optional[BaseModel]:
+    """
+    Fill the agent's response schema from a structured brief without calling the LLM.
+
+    Args:
+        agent_brief: The brief built by the supervisor for this agent
+        fields: The agent's field definitions from IBL_SCHEMA.json
+        alias_map: Lookup built by `build_alias_map(fields)`
+        seeded_indexes: Similarity indexes built by `build_seeded_value_indexes(fields)`
+        response_schema: `LogisticsSchema` or `ForwarderSchema`
+
+    Returns:
+        A populated `response_schema` instance, or None when the brief is not fully
+        structured or holds anything ambiguous (the caller should then use the LLM).
+        Values that match no seeded value confidently are reported as missing so the
+        user is asked for them again.
+    """
+    sections = _split_sections(agent_brief or "")
+    if "FIELD DATA" not in sections or "STATUS" not in sections:
+        return None
+
+    # Free-form questions or instructions need the LLM to interpret them
+    if _clean_value(sections.get("USER CONTEXT", "")).lower().rstrip(".") not in NULL_MARKERS:
+        return None
+
+    status = _parse_status(sections["STATUS"])
+    if status is None:
+        return None
+    confirmed, skip_optional = status
+
+    extracted = extract_field_values(sections["FIELD DATA"], fields, alias_map, seeded_indexes)
+    if extracted is None:
+        return None
+    values, unresolved = extracted
+
+    missing_mandatory_fields = [item["field"] for item in fields if item.get("required") is True and item["field"] not in values]
+    missing_optional_fields  = [item["field"] for item in fields if item.get("required") is False and item["field"] not in values]
+
+    shipment_model = response_schema.model_fields["shipment"].annotation
+    try:
+        return response_schema(
+            missing_mandatory_fields = missing_mandatory_fields,
+            missing_optional_fields  = missing_optional_fields,
+            ask_for_optional_fields  = bool(missing_optional_fields) and (not skip_optional or any(
+                                           field_name in missing_optional_fields for field_name in unresolved)),
+            needs_user_confirmation  = bool(missing_mandatory_fields) or not confirmed,
+            shipment                 = shipment_model.model_validate(values),
+        )
+    except ValidationError:
+        return None
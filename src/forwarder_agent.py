@@ -6,16 +6,21 @@ from dotenv import load_dotenv
 from datetime import datetime
 from typing_extensions import Literal
 
-from langchain.chat_models import init_chat_model
 from langchain_core.messages import SystemMessage , ToolMessage , HumanMessage, AIMessage, get_buffer_string
 from langgraph.graph import StateGraph, START, END
 from langgraph.types import Command
-from langgraph.checkpoint.memory import InMemorySaver
-from langchain_mcp_adapters.client import MultiServerMCPClient
-from src.prompt import missing_mandatory_fields_prompt, missing_optional_fields_prompt, \
-                        user_confirmation_prompt, forwarder_agent_tasks
-from src.forwarder_schema import ForwarderSchema , ForwarderState
-from src.ibl_data_source import ibl_data_source
+from src.prompt import forwarder_agent_tasks, forwarder_agent_request, commit_failed_template
+from src.prompt_cache import prompt_call_config
+from src.supervisor_schema import SubAgentInputState, SubAgentOutputState
+from src.forwarder_schema import ForwarderState
+from src.field_extractor import pre_extract_agent_response
+from src.seeded_values import normalize_seeded_values
+from src.reply_renderer import render_agent_reply
+from src.schema_registry import schema_registry, SchemaSnapshot
+from src.mcp_pool import mcp_session_pool, parse_tool_result
+from src.checkpointer import get_checkpointer
+from src.model_gateway import model_gateway
+from src.model_factory import model_for
 
 # Load environment variables
 load_dotenv()
@@ -25,89 +30,66 @@ def get_today_str() -> str:
     """Get current date in a human-readable format."""
     return datetime.now().strftime("%a %b %#d, %Y")
 
-# ===== Import forwarder Fields ("Mandatory","Optional") =====
-import_forwarder_schema = ibl_data_source("../IBL_SCHEMA.json","forwarder_agent")
+# ===== Forwarder Fields =====
+# Field definitions, models, alias map and seeded value indexes come from the schema registry,
+# which recompiles them when IBL_SCHEMA.json changes
 
-forwarder_fields = [
-    item for item in import_forwarder_schema
-]
-mandatory_fields = [
-    item['field'] for item in import_forwarder_schema if item.get('required') is True
-]
-optional_fields = [
-    item['field'] for item in import_forwarder_schema if item.get('required') is False
-]
-
-def get_selected_field_details(all_fields, missed_fields):
-    """
-    """
-
-    return [ fields for fields in all_fields if fields['field'] in missed_fields]
-
-# ===== MCP Configuration =====
-mcp_config = None
-
-try:
-    with open ("../mcp_servers.json" , "r") as mcp_file:
-        mcp_config = json.load(mcp_file)
-except FileNotFoundError:
-    print("Error: mcp_servers.json not found. Please create it.")
-    exit()
-
-# Global client variable - will be initialized lazily
-_client = None
-
-def get_mcp_client():
-    """Get or initialize MCP client lazily to avoid issues with LangGraph Platform."""
-    global _client
-    if _client is None:
-        _client = MultiServerMCPClient(mcp_config)
-    return _client
+def build_forwarder_system_message(snapshot: SchemaSnapshot) -> SystemMessage:
+    """Static instructions with the compact field table, rendered once per schema version so every call shares a byte-identical prefix."""
+    return SystemMessage(content = forwarder_agent_tasks.format(fields_details = snapshot.agents["forwarder_agent"].schema_prompt.field_table))
 
 # Initialize model
-model = init_chat_model(model="openai:gpt-5.4-mini", temperature=0.0)
+model = model_for("forwarder")           # shared connection pool, called through model_gateway
 summarize_model = model
 
-def forwarder_agent(state: ForwarderState) -> Command[Literal["forwarder_tools", "ConfirmWithUser", "CommitForwarderTransaction" , "__end__"]]:
+async def forwarder_agent(state: ForwarderState) -> Command[Literal["forwarder_tools", "ConfirmWithUser", "CommitForwarderTransaction" , "__end__"]]:
     """
        Forwarder Agent assesses whether the received data is adequate to make deterministic decisions 
        about committing the data to the forwarder database.
     """
-    # Set up structured output model
-    structured_output_model = model.with_structured_output(ForwarderSchema)
-
-    # Invoke the model
-    response = structured_output_model.invoke([
-               HumanMessage(content = forwarder_agent_tasks.format(
-                                      agent_brief = state.get("agent_briefs", {}).get("forwarder_agent", ""),
-                                      date = get_today_str(),
-                                      fields_details = forwarder_fields,
-                                      mandatory_fields = mandatory_fields,
-                                      optional_fields = optional_fields
-               ))
-    ])
-
-    agent_brief_messages = [AIMessage(content = state.get("agent_briefs", {}).get("forwarder_agent", ""))]
+    agent_brief = state.get("agent_briefs", {}).get("forwarder_agent", "")
+    snapshot = schema_registry.current()
+    schema = snapshot.agents["forwarder_agent"]
+
+    # Try the deterministic extractor first; only ambiguous briefs need the LLM
+    response = pre_extract_agent_response(agent_brief     = agent_brief,
+                                          fields          = schema.fields,
+                                          alias_map       = schema.alias_map,
+                                          seeded_indexes  = schema.seeded_indexes,
+                                          response_schema = schema.response_schema)
+    if response is None:
+        # Set up structured output model
+        structured_output_model = model.with_structured_output(schema.response_schema)
+
+        # Invoke the model
+        response = await model_gateway.ainvoke(structured_output_model, [
+                   snapshot.derive("forwarder_system_message", build_forwarder_system_message),  # static, cacheable prefix
+                   HumanMessage(content = forwarder_agent_request.format(
+                                          agent_brief = agent_brief,
+                                          date = get_today_str()
+                   ))
+        ], config = prompt_call_config("forwarder_agent_tasks"))
+        response.shipment = normalize_seeded_values(response.shipment, schema.seeded_indexes)
+
+    agent_brief_messages = [AIMessage(content = agent_brief)]
 
     if response.missing_mandatory_fields:        # missing mandatory fields
         return Command(
                goto=END, 
-               update={"messages": agent_brief_messages + [model.invoke([AIMessage(content = missing_mandatory_fields_prompt.format(
-                                                                                   agent = "Forwarder" ,
-                                                                                   missing_mandatory_fields = response.missing_mandatory_fields,
-                                                                                   missing_mandatory_field_details = get_selected_field_details(all_fields = forwarder_fields,
-                                                                                                                                                missed_fields = response.missing_mandatory_fields))
-                                                     )])]}
+               update={"agent_response" : response , "messages": agent_brief_messages + [await render_agent_reply(model        = model,
+                                                                                                          reply_type   = "missing_mandatory_fields",
+                                                                                                          agent        = "Forwarder",
+                                                                                                          response     = response,
+                                                                                                          all_fields   = schema.fields)]}
         )
     elif response.missing_optional_fields and response.ask_for_optional_fields: # missing optional fields before confirmation
         return Command(
                goto=END, 
-               update={"messages": agent_brief_messages + [model.invoke([AIMessage(content = missing_optional_fields_prompt.format(
-                                                                                   agent = "Forwarder" ,
-                                                                                   missing_optional_fields = response.missing_optional_fields,
-                                                                                   missing_optional_field_details = get_selected_field_details(all_fields = forwarder_fields,
-                                                                                                                                               missed_fields = response.missing_optional_fields))
-                                                     )])]}
+               update={"agent_response" : response , "messages": agent_brief_messages + [await render_agent_reply(model        = model,
+                                                                                                          reply_type   = "missing_optional_fields",
+                                                                                                          agent        = "Forwarder",
+                                                                                                          response     = response,
+                                                                                                          all_fields   = schema.fields)]}
         )
     elif response.needs_user_confirmation: # missing confirmation
         return Command(
@@ -122,7 +104,7 @@ def forwarder_agent(state: ForwarderState) -> Command[Literal["forwarder_tools",
                          "messages" : agent_brief_messages}
         )
 
-def ConfirmWithUser(state: ForwarderState) -> Command[Literal["__end__"]]: 
+async def ConfirmWithUser(state: ForwarderState) -> Command[Literal["__end__"]]: 
     """ If there is anything that Forwarder Agent needs to confirm with the user """
     # first summarize 
     # system_message = summarize_logistics_system_prompt.format(date=get_today_str())
@@ -131,10 +113,14 @@ def ConfirmWithUser(state: ForwarderState) -> Command[Literal["__end__"]]:
     # Print the summary requesting confirmation
     return Command(
            goto=END, 
-           update={"messages": model.invoke([AIMessage(content = user_confirmation_prompt.format(agent = "Forwarder" , information_report = state["agent_response"].model_dump()))])}
+           update={"messages": await render_agent_reply(model        = model,
+                                                   reply_type   = "user_confirmation",
+                                                   agent        = "Forwarder",
+                                                   response     = state["agent_response"],
+                                                   all_fields   = schema_registry.agent("forwarder_agent").fields)}
     )
 
-def forwarder_tools(state: ForwarderState):
+async def forwarder_tools(state: ForwarderState):
     """
         Executes all tool calls from the forwarder Agent response.
         Returns updated state with tool execution results.
@@ -148,7 +134,7 @@ def forwarder_tools(state: ForwarderState):
     observations = []
     for tool_call in tool_calls:
         tool = tools_by_name[tool_call["name"]]
-        observations.append(tool.invoke(tool_call["args"]))
+        observations.append(await tool.ainvoke(tool_call["args"]))
 
     # Create tool message outputs
     tool_outputs = [
@@ -164,38 +150,32 @@ def forwarder_tools(state: ForwarderState):
 async def CommitForwarderTransaction(state: ForwarderState):
     """ Following the user's confirmation, the forwarder database will be updated with the received data """
 
-    # Get available tools from MCP server
-    client = get_mcp_client()
-    tools = await client.get_tools()
-    tools_by_name = {tool.name: tool for tool in tools}
-
-    # Get the update database tool
-    UpdateDB = tools_by_name["UpdateDB"]
-
-    # Initialize model with tool binding
-    # model_with_tools = model.bind_tools(UpdateDB)
-
     # get the last response which includes all the filled values after confirmation
     response = state["agent_response"]
 
     # Convert the response into dictionary and delete unnecessary fields
-    response_dict = response.model_dump()
+    response_dict = response.model_dump(mode="json")     # dates as ISO strings, so they sort and index in the DB
     shipment_only = {k:v for (k,v) in response_dict.items() if k not in ["missing_mandatory_fields", "missing_optional_fields",
                                                                          "ask_for_optional_fields", "needs_user_confirmation"]}
     # commit the forwarder transactions following the confirmation
-    confirmation_result = await UpdateDB.ainvoke({"record": shipment_only['shipment']})
+    # through the shared MCP session pool, which keeps the DB server process alive between commits
+    confirmation_result = await mcp_session_pool.ainvoke_tool("UpdateDB", {"record": shipment_only['shipment'], "record_type": "forwarder"})
 
-    d = state["agent_status"]
-    d["forwarder_agent"] = "completed"
-    return{
-            "messages" : [AIMessage(content=f"{confirmation_result}")]   ,   # confirm back
-            "list_of_agents" : list(state.get("list_of_agents", []))[1:] ,   # Update the pending agents removing the current one after being processed
-            "agent_status" : d
+    result = parse_tool_result(confirmation_result)
+    if result.get("status") != "True":
+        # Nothing was written: the agent stays pending, so the user can correct the record and confirm again
+        return{
+                "messages": [AIMessage(content=commit_failed_template.format(agent = "Forwarder", error = result.get("error", confirmation_result)))] ,
+                "agent_status" : {"forwarder_agent": "pending_response"}
+        }
 
+    return{
+            "messages": [AIMessage(content=f"{confirmation_result}")] ,     # confirm back
+            "agent_status" : {"forwarder_agent": "completed"}              # merged into the parent status by its reducer
     }
 
 # Build the scoping workflow
-forwarder_agent_builder = StateGraph(ForwarderState)
+forwarder_agent_builder = StateGraph(ForwarderState, input_schema=SubAgentInputState, output_schema=SubAgentOutputState)
 
 # Add workflow nodes
 forwarder_agent_builder.add_node("forwarder_agent", forwarder_agent)
@@ -210,5 +190,5 @@ forwarder_agent_builder.add_edge("ConfirmWithUser", END)
 forwarder_agent_builder.add_edge("CommitForwarderTransaction", END)
 
 # Compile the workflow
-checkpointer = InMemorySaver()
+checkpointer = get_checkpointer()     # shared with every other graph
 ForwarderAgent = forwarder_agent_builder.compile(checkpointer = checkpointer)
@@ -1,54 +1,27 @@
-
 """State Definitions and Pydantic Schemas for Forwarder Agent.
 
 This defines the state objects and structured schemas used for
 the Forwarder Agent scoping workflow, including Forwarder state management and output schemas.
-"""
 
-import operator
-from datetime import date
-from typing_extensions import Optional , List
+`ForwarderSchema` and its `DynamicShipmentFields` are compiled from IBL_SCHEMA.json by the
+schema registry and looked up on access, so they follow hot reloads of the schema file.
+"""
 
-from pydantic import BaseModel, Field , create_model
+from typing_extensions import Optional
+from pydantic import BaseModel
 from src.supervisor_schema import AgentState
-from src.ibl_data_source import ibl_data_source
-
-# Load forwarder fields dynamiclly
-forwarder_fields = ibl_data_source("../IBL_SCHEMA.json","forwarder_agent")
-
-# Dynamically create Pydantic model for shipment fields
-DynamicShipmentFields = create_model(
-    "DynamicShipmentFields",
-    **{
-        field_item["field"]: (
-            Optional[field_item["dataType"]],  # default type; could later map dataType
-            Field(None, description = field_item.get("description", ""))
-        )
-        for field_item in forwarder_fields
-    }
-)
+from src.schema_registry import schema_registry
 
 # ===== STRUCTURED OUTPUT SCHEMAS =====
-class ForwarderSchema(BaseModel):
-    """Schema for Logisticis Agent."""
-    missing_mandatory_fields: List[str] = Field(
-        description = "Fields required by the schema that are missing from the provided data"
-    )
-    missing_optional_fields: List[str] = Field(
-        description = "Optional fields that are missing from the provided data"
-    )
-    ask_for_optional_fields: bool = Field(
-        description = "Specifies whether the user should be prompted for optional fields",
-        default = True
-    )
-    needs_user_confirmation: bool = Field(
-        description = "Specifies whether user confirmation is required for the current record",
-        default = True
-    )
-
-    shipment : DynamicShipmentFields
+def __getattr__(name: str):
+    """Current `ForwarderSchema` / `DynamicShipmentFields` (also used when checkpoints are loaded)."""
+    if name == "ForwarderSchema":
+        return schema_registry.agent("forwarder_agent").response_schema
+    if name == "DynamicShipmentFields":
+        return schema_registry.agent("forwarder_agent").shipment_model
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 # ===== STATE DEFINITIONS =====
 class ForwarderState(AgentState):
-    """ State for the forwarder Agent """
-    agent_response: Optional[ForwarderSchema] = None
+    """ State for the Forwarder Agent """
+    agent_response: Optional[BaseModel] = None           # a ForwarderSchema instance
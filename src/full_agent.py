@@ -4,17 +4,18 @@
 import os
 from langchain_core.messages import HumanMessage, AIMessage, get_buffer_string
 from langgraph.graph import StateGraph, START, END
-from langgraph.checkpoint.memory import InMemorySaver
 
 from src.supervisor_schema import AgentState , AgentInputState
-from src.supervisor_agent import DelegateNextAgent, clarify_with_user, supervisor_agent, supervisor_tools
+from src.supervisor_agent import DelegateNextAgent, clarify_with_user, compact_conversation, supervisor_agent, supervisor_tools
 from src.logistics_agent import LogisticsAgent
 from src.forwarder_agent import ForwarderAgent
+from src.checkpointer import get_checkpointer
 
 # Build the scoping workflow
 full_agent_builder = StateGraph(AgentState ,  input_schema=AgentInputState)
 
 # Add workflow nodes
+full_agent_builder.add_node("compact_conversation", compact_conversation)
 full_agent_builder.add_node("supervisor_agent"  , supervisor_agent)
 full_agent_builder.add_node("supervisor_tools"  , supervisor_tools)
 full_agent_builder.add_node("clarify_with_user" , clarify_with_user)
@@ -22,7 +23,8 @@ full_agent_builder.add_node("LogisticsAgent"    , LogisticsAgent)
 full_agent_builder.add_node("ForwarderAgent"    , ForwarderAgent)
 
 # Add workflow edges
-full_agent_builder.add_edge(START, "supervisor_agent")
+full_agent_builder.add_edge(START, "compact_conversation")
+full_agent_builder.add_edge("compact_conversation", "supervisor_agent")
 full_agent_builder.add_conditional_edges(
     "supervisor_agent",
      DelegateNextAgent,
@@ -34,32 +36,12 @@ full_agent_builder.add_conditional_edges(
     },
 )
 
-full_agent_builder.add_conditional_edges(
-    "LogisticsAgent",
-     DelegateNextAgent,
-    {
-        "supervisor_tools"  : END , 
-        "clarify_with_user" : END, 
-        "logistics_agent"   : END   ,
-        "forwarder_agent"   : "ForwarderAgent"   ,
-        "__end__"           : END                ,
-    },
-)
-
-full_agent_builder.add_conditional_edges(
-    "ForwarderAgent",
-     DelegateNextAgent,
-    {
-        "supervisor_tools"  : END   , 
-        "clarify_with_user" : END   , 
-        "logistics_agent"   : END   ,
-        "forwarder_agent"   : END   ,
-        "__end__"           : END   ,
-    },
-)
+# Both sub agents run as parallel branches and finish the turn
+full_agent_builder.add_edge("LogisticsAgent", END)
+full_agent_builder.add_edge("ForwarderAgent", END)
 full_agent_builder.add_edge("supervisor_tools", "supervisor_agent")
 full_agent_builder.add_edge("clarify_with_user", END)
 
 # Compile the workflow
-checkpointer = InMemorySaver()
+checkpointer = get_checkpointer()     # shared with every other graph
 full_agent = full_agent_builder.compile(checkpointer = checkpointer)
@@ -1,33 +1,404 @@
-""" This code defines a tool to push records to IBL DB """
+""" This code defines the tools to push records to and read records from the IBL DB """
 
+import os
+import re
 import sys
-from typing import Dict, Any
-from mcp.server.fastmcp import FastMCP
+import json
+import sqlite3
 import asyncio
+import threading
+from pathlib import Path
+from datetime import date, datetime, timezone
+from typing import Dict, Any, List, Optional
+from dotenv import load_dotenv
+from pydantic import ConfigDict, Field, ValidationError, create_model
+from mcp.server.fastmcp import FastMCP
+
+# ===== DATABASE CONFIGURATION =====
+# stdio server processes do not inherit the caller's environment, so read .env here too
+load_dotenv()
+
+ROOT_DIR    = Path(__file__).resolve().parent.parent
+SCHEMA_PATH = Path(os.getenv("IBL_SCHEMA_PATH", ROOT_DIR / "IBL_SCHEMA.json"))
+IBL_DB_PATH = os.getenv("IBL_DB_PATH", str(ROOT_DIR / "ibl_database.sqlite3"))
+
+# record type → (schema section, table, key field)
+RECORD_TYPES = {
+    "logistics": ("logistics_agent", "logistics_records", "AWB/BL"),
+    "forwarder": ("forwarder_agent", "forwarder_records", "Clearing Number"),
+}
+
+# Records written per transaction by UpdateDBBatch
+BATCH_CHUNK_SIZE = int(os.getenv("IBL_DB_BATCH_CHUNK_SIZE", "1000"))
+
+# schema dataType → python type
+DATA_TYPES = {"str": str, "date": date}
+
+def column_name(field: str) -> str:
+    """SQL column name of a schema field, e.g. "AWB/BL Date" → "awb_bl_date"."""
+    return re.sub(r"[^0-9a-zA-Z]+", "_", field).strip("_").lower()
+
+def utc_now() -> str:
+    return datetime.now(timezone.utc).isoformat(timespec="seconds")
+
+# ===== STORE =====
+
+class IBLStore:
+    """
+    SQLite store for logistics and forwarder records.
+
+    - WAL journal, so lookups are not blocked by commits
+    - one table per record type with a column per schema field, keyed by AWB/BL
+      (logistics) or Clearing Number (forwarder), plus an index per date field
+    - upsert on the key field, so re-committing a record updates it in place
+    - SQL text is built once per table and reused, so sqlite3's statement cache
+      serves every call from an already prepared statement
+    - `load_schema` adds the columns of fields added to IBL_SCHEMA.json while running
+    """
+
+    def __init__(self, db_path: str, schema: dict):
+        self.connection = sqlite3.connect(db_path, check_same_thread=False, isolation_level=None, cached_statements=256)
+        self.connection.row_factory = sqlite3.Row
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self.connection.execute("PRAGMA busy_timeout=5000")
+        self.lock = threading.Lock()
+        self.tables = {}
+        self.load_schema(schema)
+
+    def load_schema(self, schema: dict):
+        """Create or extend the tables of every record type and swap in their statements."""
+        self.tables = {
+            record_type: self._ensure_table(table, key_field, schema.get(section, []))
+            for record_type, (section, table, key_field) in RECORD_TYPES.items()
+        }
+
+    def _ensure_table(self, table: str, key_field: str, fields: List[dict]) -> dict:
+        """Create or extend the table of one record type and build its statements."""
+        columns = {field_item["field"]: column_name(field_item["field"]) for field_item in fields}
+        date_fields = [field_item["field"] for field_item in fields if field_item.get("dataType") == "date"]
+
+        # Every pooled server process runs this at startup, so the DDL runs under the write lock
+        with self.lock:
+            self.connection.execute("BEGIN IMMEDIATE")
+            try:
+                self.connection.execute(
+                    f"CREATE TABLE IF NOT EXISTS {table} ("
+                    f"record_key TEXT PRIMARY KEY, record TEXT NOT NULL, created_at TEXT NOT NULL, updated_at TEXT NOT NULL)"
+                )
+                existing = {row["name"] for row in self.connection.execute(f"PRAGMA table_info({table})")}
+                for column in columns.values():
+                    if column not in existing:
+                        self.connection.execute(f"ALTER TABLE {table} ADD COLUMN {column}")
+                for field in date_fields:
+                    self.connection.execute(f"CREATE INDEX IF NOT EXISTS idx_{table}_{columns[field]} ON {table} ({columns[field]}, record_key)")
+                self.connection.execute("COMMIT")
+            except Exception:
+                self.connection.execute("ROLLBACK")
+                raise
+
+        column_list = ", ".join(columns.values())
+        placeholders = ", ".join("?" for _ in columns)
+        updates = ", ".join(f"{column} = excluded.{column}" for column in columns.values())
+        return {
+            "table"      : table,
+            "key_field"  : key_field,
+            "fields"     : list(columns),
+            "columns"    : columns,
+            "date_fields": date_fields,
+            "upsert_sql" : (
+                f"INSERT INTO {table} (record_key, record, created_at, updated_at, {column_list}) "
+                f"VALUES (?, ?, ?, ?, {placeholders}) "
+                f"ON CONFLICT(record_key) DO UPDATE SET record = excluded.record, updated_at = excluded.updated_at, {updates}"
+            ),
+            "get_sql"    : f"SELECT record, created_at, updated_at FROM {table} WHERE record_key = ?",
+        }
+
+    def table_for(self, record_type: str) -> dict:
+        if record_type not in self.tables:
+            raise ValueError(f"Unknown record type '{record_type}', expected one of {list(self.tables)}")
+        return self.tables[record_type]
+
+    def upsert_params(self, table_info: dict, record: Dict[str, Any], timestamp: str) -> tuple:
+        """Statement parameters of one record; raises ValueError when the key field is missing."""
+        key = record.get(table_info["key_field"])
+        if key in (None, ""):
+            raise ValueError(f"'{table_info['key_field']}' is required to store a record")
+        values = [record.get(field) for field in table_info["fields"]]
+        return (str(key), json.dumps(record, default=str), timestamp, timestamp, *values)
+
+    def upsert(self, record_type: str, record: Dict[str, Any]) -> str:
+        """Insert or update one record and return its key."""
+        table_info = self.table_for(record_type)
+        params = self.upsert_params(table_info, record, utc_now())
+        with self.lock:
+            self.connection.execute(table_info["upsert_sql"], params)
+        return params[0]
+
+    def upsert_many(self, record_type: str, records: List[Dict[str, Any]]) -> int:
+        """Insert or update a chunk of records in a single transaction; all or none are written."""
+        table_info = self.table_for(record_type)
+        timestamp = utc_now()
+        params = [self.upsert_params(table_info, record, timestamp) for record in records]
+        with self.lock:
+            self.connection.execute("BEGIN IMMEDIATE")
+            try:
+                self.connection.executemany(table_info["upsert_sql"], params)
+                self.connection.execute("COMMIT")
+            except Exception:
+                self.connection.execute("ROLLBACK")
+                raise
+        return len(params)
+
+    def get(self, record_type: str, key: str) -> Optional[Dict[str, Any]]:
+        """Fetch one record by its key field (primary key lookup)."""
+        table_info = self.table_for(record_type)
+        with self.lock:
+            row = self.connection.execute(table_info["get_sql"], (key,)).fetchone()
+        if row is None:
+            return None
+        return {"record": json.loads(row["record"]), "created_at": row["created_at"], "updated_at": row["updated_at"]}
+
+    def list_by_date_range(self, record_type: str, date_field: str, start_date: str, end_date: str,
+                           limit: int = 100, offset: int = 0) -> List[Dict[str, Any]]:
+        """List records whose `date_field` falls within [start_date, end_date], served from the field's index."""
+        table_info = self.table_for(record_type)
+        if date_field not in table_info["date_fields"]:
+            raise ValueError(f"'{date_field}' is not a date field of {record_type} records, expected one of {table_info['date_fields']}")
+        column = table_info["columns"][date_field]
+        with self.lock:
+            rows = self.connection.execute(
+                f"SELECT record FROM {table_info['table']} WHERE {column} BETWEEN ? AND ? ORDER BY {column}, record_key LIMIT ? OFFSET ?",
+                (start_date, end_date, limit, offset),
+            ).fetchall()
+        return [json.loads(row["record"]) for row in rows]
+
+def infer_record_type(record: Dict[str, Any]) -> str:
+    """Guess the record type from its key field when the caller did not pass one."""
+    for record_type, (_, _, key_field) in RECORD_TYPES.items():
+        if key_field in record:
+            return record_type
+    raise ValueError(f"Cannot infer the record type, pass record_type as one of {list(RECORD_TYPES)}")
+
+def compile_record_models(schema: dict) -> Dict[str, Any]:
+    """
+    Compile one pydantic model per record type from IBL_SCHEMA.json.
+
+    Required fields must be present and non-empty, dates must parse and unknown fields are rejected.
+    """
+    record_models = {}
+    for record_type, (section, _, _) in RECORD_TYPES.items():
+        record_models[record_type] = create_model(
+            f"{record_type.capitalize()}Record",
+            __config__ = ConfigDict(extra="forbid", str_strip_whitespace=True),
+            **{field_item["field"]: record_field(field_item) for field_item in schema.get(section, [])}
+        )
+    return record_models
+
+def record_field(field_item: dict) -> tuple:
+    """pydantic (type, default) definition of one schema field."""
+    data_type = DATA_TYPES.get(field_item["dataType"], str)
+    if not field_item.get("required"):
+        return (Optional[data_type], None)
+    if data_type is str:
+        return (str, Field(..., min_length=1))
+    return (data_type, ...)
+
+def validate_records(record_type: str, records: List[Dict[str, Any]]) -> tuple:
+    """
+    Validate records against the compiled model of their record type.
+
+    Returns:
+        (valid, results) where valid is a list of (position, normalized record) and
+        results holds a per-record status entry, already final for invalid records
+    """
+    record_model = record_models[record_type]
+    key_field = RECORD_TYPES[record_type][2]
+    valid, results = [], []
+    for position, record in enumerate(records):
+        key = record.get(key_field) if isinstance(record, dict) else None
+        try:
+            valid.append((position, record_model.model_validate(record).model_dump(mode="json")))
+            results.append({"index": position, "key": key, "status": "written"})
+        except ValidationError as e:
+            errors = [f"{'.'.join(map(str, error['loc']))}: {error['msg']}" for error in e.errors()]
+            results.append({"index": position, "key": key, "status": "invalid", "errors": errors})
+    return valid, results
+
+# ===== IBL SCHEMA =====
+def read_schema() -> tuple:
+    """(mtime, parsed content) of IBL_SCHEMA.json."""
+    mtime = SCHEMA_PATH.stat().st_mtime_ns
+    with open(SCHEMA_PATH, "r", encoding="utf-8") as schema_file:
+        return mtime, json.load(schema_file)
+
+try:
+    schema_mtime, ibl_schema = read_schema()
+except FileNotFoundError:
+    print("Error: IBL_SCHEMA.json not found. Please create it.", file=sys.stderr)
+    exit()
+
+store = IBLStore(IBL_DB_PATH, ibl_schema)
+record_models = compile_record_models(ibl_schema)
+schema_lock = threading.Lock()
+
+def refresh_schema():
+    """
+    Recompile the record models and extend the tables when IBL_SCHEMA.json changed.
+
+    The pooled server processes outlive schema edits, and the agents pick up new fields
+    from the schema registry right away, so every schema-dependent tool checks the
+    file's mtime first. An edit that does not parse or compile keeps the previous schema.
+    """
+    global schema_mtime, record_models
+    try:
+        mtime = SCHEMA_PATH.stat().st_mtime_ns
+    except OSError:
+        return
+    if mtime == schema_mtime:
+        return
+    with schema_lock:
+        if mtime == schema_mtime:
+            return
+        try:
+            with open(SCHEMA_PATH, "r", encoding="utf-8") as schema_file:
+                schema = json.load(schema_file)
+            models = compile_record_models(schema)
+            store.load_schema(schema)
+            record_models = models
+        except Exception as e:
+            print(f"Error reloading IBL_SCHEMA.json, keeping the previous schema: {e}", file=sys.stderr)
+        schema_mtime = mtime                             # a failed edit is not retried until the file changes again
 
 # Initialize FastMCP server
 mcp = FastMCP("db-server")
 
 @mcp.tool()
-async def UpdateDB(record: Dict[str, Any]) -> Dict[str, Any]:
+async def UpdateDB(record: Dict[str, Any], record_type: str = "") -> Dict[str, Any]:
     """
     Update the IBL database and confirm back.
 
     Args:
         record: Record details of dictionary type.
+        record_type: "logistics" or "forwarder"; inferred from the record's key field when empty.
 
     Returns:
-        A dictionary contains a success status and the new record
+        A dictionary contains a success status and the new record, as validated and
+        normalized against the IBL schema like the records of UpdateDBBatch
 
     """
     try:
+        refresh_schema()
+        record_type = record_type or infer_record_type(record)
+        store.table_for(record_type)
+        valid, results = validate_records(record_type, [record])
+        if not valid:
+            return {"status": "False", "error": "; ".join(results[0]["errors"])}
+        record = valid[0][1]
+        await asyncio.to_thread(store.upsert, record_type, record)
         success = True
         return {
                  "status" : f"{success}",
                  "record" : record
                }
     except Exception as e:
-        return str(e)
+        return {"status": "False", "error": str(e)}
+
+@mcp.tool()
+async def UpdateDBBatch(records: List[Dict[str, Any]], record_type: str, chunk_size: int = BATCH_CHUNK_SIZE) -> Dict[str, Any]:
+    """
+    Update the IBL database with many records of one type in bulk.
+
+    Records are validated against the IBL schema first; invalid ones are skipped and the
+    rest are written one transaction per chunk, so a failing chunk does not affect the others.
+
+    Args:
+        records: List of record dictionaries.
+        record_type: "logistics" or "forwarder".
+        chunk_size: Number of records written per transaction.
+
+    Returns:
+        A dictionary with the written/invalid/failed counts and a status per record
+    """
+    try:
+        refresh_schema()
+        store.table_for(record_type)
+        valid, results = await asyncio.to_thread(validate_records, record_type, records)
+        chunk_size = max(1, chunk_size)
+        for start in range(0, len(valid), chunk_size):
+            chunk = valid[start:start + chunk_size]
+            try:
+                await asyncio.to_thread(store.upsert_many, record_type, [record for _, record in chunk])
+            except Exception as e:
+                for position, _ in chunk:
+                    results[position].update(status="failed", errors=[str(e)])
+
+        counts = {status: sum(result["status"] == status for result in results) for status in ("written", "invalid", "failed")}
+        return {
+                 "status"  : f"{counts['written'] == len(results)}",
+                 **counts,
+                 "results" : results
+               }
+    except Exception as e:
+        return {"status": "False", "error": str(e)}
+
+@mcp.tool()
+async def GetRecordByAWB(awb: str) -> Dict[str, Any]:
+    """
+    Get a logistics record by its AWB/BL number.
+
+    Args:
+        awb: The Air Waybill or Bill of Lading number.
+
+    Returns:
+        A dictionary with a found status and the stored record
+    """
+    try:
+        result = await asyncio.to_thread(store.get, "logistics", awb)
+        return {"status": f"{result is not None}", **(result or {})}
+    except Exception as e:
+        return {"status": "False", "error": str(e)}
+
+@mcp.tool()
+async def GetRecordByClearingNumber(clearing_number: str) -> Dict[str, Any]:
+    """
+    Get a forwarder record by its Clearing Number.
+
+    Args:
+        clearing_number: The clearing number of the shipment.
+
+    Returns:
+        A dictionary with a found status and the stored record
+    """
+    try:
+        result = await asyncio.to_thread(store.get, "forwarder", clearing_number)
+        return {"status": f"{result is not None}", **(result or {})}
+    except Exception as e:
+        return {"status": "False", "error": str(e)}
+
+@mcp.tool()
+async def ListRecordsByDateRange(record_type: str, date_field: str, start_date: str, end_date: str,
+                                 limit: int = 100, offset: int = 0) -> Dict[str, Any]:
+    """
+    List records whose date field falls within a date range.
+
+    Args:
+        record_type: "logistics" or "forwarder".
+        date_field: A date field of the record type, e.g. "AWB/BL Date" or "ETA".
+        start_date: First date of the range (YYYY-MM-DD), inclusive.
+        end_date: Last date of the range (YYYY-MM-DD), inclusive.
+        limit: Maximum number of records to return.
+        offset: Number of records to skip, for paging.
+
+    Returns:
+        A dictionary with the matching records ordered by the date field
+    """
+    try:
+        refresh_schema()
+        records = await asyncio.to_thread(store.list_by_date_range, record_type, date_field, start_date, end_date, limit, offset)
+        return {"status": "True", "count": len(records), "records": records}
+    except Exception as e:
+        return {"status": "False", "error": str(e)}
 
 # Main execution
 if __name__ == "__main__":
@@ -0,0 +1,198 @@
+"""Exact-Match LLM Response Cache.
+
+Identical model calls recur: retries, "please continue" turns, or a supervisor brief that
+comes out the same as last turn all re-run the same extraction. This module provides a
+LangChain `BaseCache` that answers such calls without a provider round trip:
+
+- keyed on a hash of the rendered messages and the model's llm_string, which covers the
+  model name, its parameters and any bound tools / structured-output schema
+- a bounded LRU memory tier, optionally backed by a SQLite tier shared across restarts
+- entries expire after LLM_CACHE_TTL_SECONDS
+- only attached to temperature 0 models (see `llm_cache_for`), whose output is reproducible
+"""
+
+import os
+import time
+import uuid
+import sqlite3
+import asyncio
+import hashlib
+import warnings
+import threading
+from collections import OrderedDict
+from dotenv import load_dotenv
+from typing_extensions import Any, Optional, Sequence, Union
+
+from langchain_core.caches import BaseCache
+from langchain_core._api import LangChainBetaWarning
+from langchain_core.load import dumps, loads
+from langchain_core.outputs import ChatGeneration, Generation
+
+# Load environment variables
+load_dotenv()
+
+# ===== CACHE CONFIGURATION =====
+LLM_CACHE_ENABLED     = os.getenv("LLM_CACHE_ENABLED", "true").lower() in ("1", "true", "yes")
+LLM_CACHE_MAX_ENTRIES = int(os.getenv("LLM_CACHE_MAX_ENTRIES", "1024"))     # memory tier size
+LLM_CACHE_TTL_SECONDS = float(os.getenv("LLM_CACHE_TTL_SECONDS", "3600"))   # 0 disables expiry
+LLM_CACHE_DB_PATH     = os.getenv("LLM_CACHE_DB_PATH", "")                  # disk tier, disabled when empty
+
+# Marks generations served from this cache, so usage callbacks can tell them apart
+CACHE_HIT_METADATA_KEY = "from_llm_cache"
+
+def mark_cached(generation: Generation) -> Generation:
+    """Copy of a generation flagged as served from the cache."""
+    if isinstance(generation, ChatGeneration):
+        message = generation.message.model_copy(
+            update={"response_metadata": {**generation.message.response_metadata, CACHE_HIT_METADATA_KEY: True}}
+        )
+        return generation.model_copy(update={"message": message})
+    return generation
+
+def with_fresh_id(generation: Generation) -> Generation:
+    """Copy of a cached generation whose message gets a new id, so a repeated reply is appended rather than merged."""
+    if isinstance(generation, ChatGeneration):
+        message = generation.message.model_copy(update={"id": f"run-cached-{uuid.uuid4()}"})
+        return generation.model_copy(update={"message": message})
+    return generation
+
+# ===== TIERED CACHE =====
+
+class TieredLLMCache(BaseCache):
+    """LRU memory tier in front of an optional SQLite tier, with TTL and hit/miss counters."""
+
+    def __init__(self, max_entries: int = LLM_CACHE_MAX_ENTRIES, ttl_seconds: float = LLM_CACHE_TTL_SECONDS,
+                 db_path: Optional[str] = LLM_CACHE_DB_PATH or None):
+        self.max_entries = max(1, max_entries)
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self._memory: OrderedDict = OrderedDict()     # key → (expires_at, generations)
+        self._counters = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "updates": 0, "evictions": 0}
+        self._connection: Optional[sqlite3.Connection] = None
+        if db_path:
+            self._connection = sqlite3.connect(db_path, check_same_thread=False)
+            self._connection.executescript(
+                """
+                PRAGMA journal_mode=WAL;
+                PRAGMA synchronous=NORMAL;
+                CREATE TABLE IF NOT EXISTS llm_cache (
+                    key TEXT PRIMARY KEY,
+                    generations TEXT NOT NULL,
+                    expires_at REAL NOT NULL
+                );
+                """
+            )
+
+    @staticmethod
+    def cache_key(prompt: str, llm_string: str) -> str:
+        return hashlib.sha256(f"{llm_string}\x00{prompt}".encode()).hexdigest()
+
+    def _expires_at(self) -> float:
+        return time.time() + self.ttl_seconds if self.ttl_seconds > 0 else float("inf")
+
+    def _remember(self, key: str, expires_at: float, generations: list) -> None:
+        self._memory[key] = (expires_at, generations)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+            self._counters["evictions"] += 1
+
+    def _lookup_memory(self, key: str) -> Optional[list]:
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is None:
+                return None
+            if entry[0] < time.time():
+                del self._memory[key]
+                return None
+            self._memory.move_to_end(key)
+            self._counters["memory_hits"] += 1
+            return list(entry[1])
+
+    def _lookup_disk(self, key: str) -> Optional[list]:
+        if self._connection is None:
+            return None
+        with self._lock:
+            row = self._connection.execute("SELECT generations, expires_at FROM llm_cache WHERE key = ?", (key,)).fetchone()
+        if row is None or row[1] < time.time():
+            return None
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore", LangChainBetaWarning)
+            generations = loads(row[0], allowed_objects="core", secrets_from_env=False)
+        with self._lock:
+            self._remember(key, row[1], generations)
+            self._counters["disk_hits"] += 1
+        return list(generations)
+
+    def lookup(self, prompt: str, llm_string: str) -> Optional[Sequence[Generation]]:
+        key = self.cache_key(prompt, llm_string)
+        generations = self._lookup_memory(key) or self._lookup_disk(key)
+        if generations is None:
+            with self._lock:
+                self._counters["misses"] += 1
+            return None
+        return [with_fresh_id(generation) for generation in generations]
+
+    def update(self, prompt: str, llm_string: str, return_val: Sequence[Generation]) -> None:
+        key = self.cache_key(prompt, llm_string)
+        generations = [mark_cached(generation) for generation in return_val]
+        expires_at = self._expires_at()
+        with self._lock:
+            self._remember(key, expires_at, generations)
+            self._counters["updates"] += 1
+            if self._connection is not None:
+                self._connection.execute(
+                    "INSERT OR REPLACE INTO llm_cache (key, generations, expires_at) VALUES (?, ?, ?)",
+                    (key, dumps(generations), expires_at),
+                )
+                self._connection.commit()
+
+    def clear(self, **kwargs: Any) -> None:
+        with self._lock:
+            self._memory.clear()
+            if self._connection is not None:
+                self._connection.execute("DELETE FROM llm_cache")
+                self._connection.commit()
+
+    # Memory hits are answered on the event loop; only the disk tier runs in a worker thread
+    async def alookup(self, prompt: str, llm_string: str) -> Optional[Sequence[Generation]]:
+        key = self.cache_key(prompt, llm_string)
+        generations = self._lookup_memory(key)
+        if generations is None and self._connection is not None:
+            generations = await asyncio.to_thread(self._lookup_disk, key)
+        if generations is None:
+            with self._lock:
+                self._counters["misses"] += 1
+            return None
+        return [with_fresh_id(generation) for generation in generations]
+
+    async def aupdate(self, prompt: str, llm_string: str, return_val: Sequence[Generation]) -> None:
+        if self._connection is None:
+            self.update(prompt, llm_string, return_val)
+        else:
+            await asyncio.to_thread(self.update, prompt, llm_string, return_val)
+
+    async def aclear(self, **kwargs: Any) -> None:
+        await asyncio.to_thread(self.clear)
+
+    def stats(self) -> dict:
+        """Hit/miss counters and tier sizes."""
+        with self._lock:
+            lookups = self._counters["memory_hits"] + self._counters["disk_hits"] + self._counters["misses"]
+            hits = lookups - self._counters["misses"]
+            return {
+                **self._counters,
+                "hit_ratio"      : round(hits / lookups, 3) if lookups else 0.0,
+                "memory_entries" : len(self._memory),
+                "max_entries"    : self.max_entries,
+                "disk_tier"      : self._connection is not None,
+            }
+
+# Shared instance used by every temperature 0 model
+llm_cache = TieredLLMCache() if LLM_CACHE_ENABLED else None
+
+def llm_cache_for(temperature: float) -> Union[TieredLLMCache, bool]:
+    """The `cache` argument of a chat model: the shared cache for temperature 0, disabled otherwise."""
+    if llm_cache is not None and temperature == 0:
+        return llm_cache
+    return False
@@ -0,0 +1,209 @@
+"""Persistent MCP Session Pool.
+
+`MultiServerMCPClient.get_tools()` opens a new session for every tool call, which
+for the stdio servers in mcp_servers.json means spawning a fresh server process and
+redoing the MCP handshake per commit. This module keeps a small pool of long-lived
+sessions per server instead, caches their tools by name, and transparently
+reconnects a session whose server has crashed. One pool is shared by every agent.
+
+mcp_servers.json is read, and the MCP client libraries imported, when the pool starts
+rather than at import.
+"""
+
+import os
+import json
+import asyncio
+from typing_extensions import TYPE_CHECKING, Any, Dict, List, Optional
+
+from langchain_core.tools import BaseTool
+
+if TYPE_CHECKING:
+    from langchain_mcp_adapters.client import MultiServerMCPClient
+
+# Number of live sessions kept per MCP server
+MCP_POOL_SIZE = int(os.getenv("MCP_POOL_SIZE", "2"))
+
+# ===== MCP Configuration =====
+MCP_CONFIG_PATH = "../mcp_servers.json"
+
+def load_mcp_config(path: str = MCP_CONFIG_PATH) -> dict:
+    try:
+        with open (path , "r") as mcp_file:
+            return json.load(mcp_file)
+    except FileNotFoundError:
+        print("Error: mcp_servers.json not found. Please create it.")
+        raise
+
+def parse_tool_result(result: Any) -> Dict[str, Any]:
+    """The JSON object a tool answered with (as text or content blocks); {} when it is not one."""
+    if isinstance(result, dict):
+        return result
+    if isinstance(result, list):
+        result = "".join(block.get("text", "") if isinstance(block, dict) else str(block) for block in result)
+    try:
+        parsed = json.loads(result)
+    except (TypeError, ValueError):
+        return {}
+    return parsed if isinstance(parsed, dict) else {}
+
+# ===== SESSIONS =====
+
+def is_connection_error(error: BaseException) -> bool:
+    """Whether `error` means the session's server or transport is gone, rather than a failed call."""
+    import anyio
+    from mcp.shared.exceptions import McpError
+    from mcp.types import CONNECTION_CLOSED
+    if isinstance(error, McpError):
+        return error.error.code == CONNECTION_CLOSED
+    return isinstance(error, (anyio.ClosedResourceError, anyio.BrokenResourceError, anyio.EndOfStream,
+                              ConnectionError, EOFError))
+
+class MCPSession:
+    """
+    One long-lived session to an MCP server.
+
+    The session context is entered and exited by a dedicated background task, as the
+    underlying transports require, and stays open until `stop()` is called.
+    """
+
+    def __init__(self, client: "MultiServerMCPClient", server_name: str):
+        self.client = client
+        self.server_name = server_name
+        self.tools_by_name: Dict[str, BaseTool] = {}
+        self._task: Optional[asyncio.Task] = None
+        self._ready: Optional[asyncio.Event] = None
+        self._stopping: Optional[asyncio.Event] = None
+        self._error: Optional[BaseException] = None
+
+    @property
+    def is_alive(self) -> bool:
+        return self._task is not None and not self._task.done() and bool(self.tools_by_name)
+
+    async def start(self):
+        """Open the session and load its tools."""
+        self._ready, self._stopping, self._error = asyncio.Event(), asyncio.Event(), None
+        self._task = asyncio.create_task(self._run())
+        await self._ready.wait()
+        if self._error is not None:
+            raise self._error
+
+    async def _run(self):
+        from langchain_mcp_adapters.tools import load_mcp_tools
+        try:
+            async with self.client.session(self.server_name) as session:
+                self.tools_by_name = {tool.name: tool for tool in await load_mcp_tools(session)}
+                self._ready.set()
+                await self._stopping.wait()
+        except Exception as e:
+            self._error = e
+        finally:
+            self.tools_by_name = {}
+            self._ready.set()
+
+    async def stop(self):
+        """Close the session and stop its server process."""
+        if self._task is not None and not self._task.done():
+            self._stopping.set()
+            await asyncio.gather(self._task, return_exceptions=True)
+        self._task = None
+
+    async def restart(self):
+        await self.stop()
+        await self.start()
+
+# ===== SESSION POOL =====
+
+class MCPSessionPool:
+    """Pool of persistent MCP sessions with a cached tool registry."""
+
+    def __init__(self, config: Optional[dict] = None, size: int = MCP_POOL_SIZE):
+        self.config = config                             # None: read mcp_servers.json on start
+        self.size = max(1, size)
+        self.client: Optional["MultiServerMCPClient"] = None
+        self.server_by_tool: Dict[str, str] = {}
+        self._sessions: Dict[str, List[MCPSession]] = {}
+        self._idle: Dict[str, asyncio.Queue] = {}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._start_loop: Optional[asyncio.AbstractEventLoop] = None
+        self._start_lock: Optional[asyncio.Lock] = None
+
+    @property
+    def is_started(self) -> bool:
+        return self._loop is not None and self._loop is asyncio.get_running_loop()
+
+    async def start(self):
+        """Open `size` sessions per configured server (called once at app startup)."""
+        loop = asyncio.get_running_loop()
+        if self._start_loop is not loop:
+            # Sessions belong to the event loop that opened them; a new loop needs new ones
+            self._start_lock, self._start_loop = asyncio.Lock(), loop
+            self._sessions, self._idle, self._loop = {}, {}, None
+
+        async with self._start_lock:
+            if self.is_started:
+                return
+            if self.client is None:
+                from langchain_mcp_adapters.client import MultiServerMCPClient
+                if self.config is None:
+                    self.config = load_mcp_config()
+                self.client = MultiServerMCPClient(self.config)
+            for server_name in self.config:
+                sessions = [MCPSession(self.client, server_name) for _ in range(self.size)]
+                results = await asyncio.gather(*(session.start() for session in sessions), return_exceptions=True)
+                errors = [result for result in results if isinstance(result, BaseException)]
+                if errors:
+                    # Stop the sessions that did open, of this server and of the servers before it
+                    started = [session for server_sessions in self._sessions.values() for session in server_sessions]
+                    await asyncio.gather(*(session.stop() for session in started + sessions))
+                    self._sessions, self._idle, self.server_by_tool = {}, {}, {}
+                    raise errors[0]
+                self._sessions[server_name] = sessions
+                self._idle[server_name] = asyncio.Queue()
+                for session in sessions:
+                    self._idle[server_name].put_nowait(session)
+                for tool_name in sessions[0].tools_by_name:
+                    self.server_by_tool[tool_name] = server_name
+            self._loop = loop
+
+    async def close(self):
+        """Close every session (called at app shutdown)."""
+        if self.is_started:
+            await asyncio.gather(*(session.stop() for sessions in self._sessions.values() for session in sessions))
+        self._sessions, self._idle, self._loop = {}, {}, None
+
+    async def list_tools(self) -> List[str]:
+        """Return the names of the cached tools of all servers."""
+        if not self.is_started:
+            await self.start()
+        return list(self.server_by_tool)
+
+    async def ainvoke_tool(self, tool_name: str, args: Dict[str, Any]) -> Any:
+        """
+        Call a tool on one of the pooled sessions.
+
+        A session whose server went away is reconnected and the call retried once.
+        Any other error (reported by the tool, invalid arguments, ...) is raised unchanged.
+        """
+        if not self.is_started:
+            await self.start()
+        if tool_name not in self.server_by_tool:
+            raise ValueError(f"Unknown MCP tool '{tool_name}', expected one of {list(self.server_by_tool)}")
+
+        idle = self._idle[self.server_by_tool[tool_name]]
+        session = await idle.get()
+        try:
+            if not session.is_alive:
+                await session.restart()
+            try:
+                return await session.tools_by_name[tool_name].ainvoke(args)
+            except Exception as e:
+                if not is_connection_error(e):
+                    raise
+                # The server process crashed or the transport closed - reconnect and retry
+                await session.restart()
+                return await session.tools_by_name[tool_name].ainvoke(args)
+        finally:
+            idle.put_nowait(session)
+
+# Shared pool used by every agent
+mcp_session_pool = MCPSessionPool()
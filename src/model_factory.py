@@ -0,0 +1,185 @@
+"""Shared Chat Model Factory.
+
+Every node gets its chat model from `model_for(role)`. The models of all roles share one
+tuned HTTP connection pool, so connections (and their TLS sessions) are kept alive and
+reused across agents instead of each model client opening its own:
+
+- LLM_MODEL is the model of every role, overridden per role with LLM_MODEL_SUPERVISOR,
+  LLM_MODEL_LOGISTICS or LLM_MODEL_FORWARDER; roles naming the same model share one
+  instance
+- LLM_HTTP_MAX_CONNECTIONS / LLM_HTTP_MAX_KEEPALIVE size the pool, by default to
+  LLM_MAX_CONCURRENCY, the number of calls the gateway lets run at once
+- LLM_HTTP2 multiplexes the calls over HTTP/2 connections when the `h2` package is
+  installed (`httpx[http2]`)
+- LLM_CONNECT_TIMEOUT / LLM_READ_TIMEOUT / LLM_WRITE_TIMEOUT / LLM_POOL_TIMEOUT bound
+  each phase of a request
+
+Models are created on first use (see `LazyModel`), so importing the agents does not load
+the provider SDK, with the SDK's own retries disabled and with the gateway's rate limiter:
+`src.model_gateway` is the only retry and rate-limiting layer. The async HTTP client belongs to the event loop serving the app.
+"""
+
+import os
+import threading
+from dotenv import load_dotenv
+from typing_extensions import Any, Callable, Dict, Optional, Tuple
+
+import httpx
+from src.llm_cache import llm_cache_for
+from src.prompt_cache import prompt_cache_stats
+from src.concurrency import LLM_MAX_CONCURRENCY
+from src.model_gateway import model_gateway
+
+# Load environment variables
+load_dotenv()
+
+# ===== MODEL CLIENT CONFIGURATION =====
+MODEL_ROLES = ("supervisor", "logistics", "forwarder")
+
+LLM_MODEL         = os.getenv("LLM_MODEL", "openai:gpt-5.4-mini")
+LLM_MODEL_BY_ROLE = {role: os.getenv(f"LLM_MODEL_{role.upper()}", LLM_MODEL) for role in MODEL_ROLES}
+
+LLM_HTTP_MAX_CONNECTIONS  = int(os.getenv("LLM_HTTP_MAX_CONNECTIONS", str(LLM_MAX_CONCURRENCY)))
+LLM_HTTP_MAX_KEEPALIVE    = int(os.getenv("LLM_HTTP_MAX_KEEPALIVE", str(LLM_HTTP_MAX_CONNECTIONS)))
+LLM_HTTP_KEEPALIVE_EXPIRY = float(os.getenv("LLM_HTTP_KEEPALIVE_EXPIRY", "120"))   # seconds an idle connection is kept
+LLM_HTTP2                 = os.getenv("LLM_HTTP2", "true").lower() in ("1", "true", "yes")
+
+LLM_CONNECT_TIMEOUT = float(os.getenv("LLM_CONNECT_TIMEOUT", "5"))
+LLM_READ_TIMEOUT    = float(os.getenv("LLM_READ_TIMEOUT", "120"))
+LLM_WRITE_TIMEOUT   = float(os.getenv("LLM_WRITE_TIMEOUT", "30"))
+LLM_POOL_TIMEOUT    = float(os.getenv("LLM_POOL_TIMEOUT", "30"))
+
+# Providers whose LangChain model accepts `http_client` / `http_async_client`
+HTTP_CLIENT_PROVIDERS = {"openai", "azure_openai"}
+
+def http2_available() -> bool:
+    try:
+        import h2  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+# ===== LAZY MODELS =====
+
+class LazyModel:
+    """
+    Stand-in for a chat model (or a runnable built from one) that builds it on first use.
+
+    Attribute access is forwarded to the built model, so `with_structured_output`,
+    `bind_tools` and `ainvoke` work on the stand-in exactly as on the model itself.
+    The model is rebuilt once `model_factory.aclose()` has closed the clients it was built on.
+    """
+
+    def __init__(self, build: Callable[[], Any]):
+        self._build = build
+        self._model = None
+        self._generation = -1                            # model_factory.generation the model was built in
+        self._lock = threading.Lock()
+
+    @property
+    def is_built(self) -> bool:
+        return self._model is not None and self._generation == model_factory.generation
+
+    def get(self) -> Any:
+        generation = model_factory.generation
+        if self._model is None or self._generation != generation:
+            with self._lock:
+                if self._model is None or self._generation != generation:
+                    self._model = self._build()
+                    self._generation = generation
+        return self._model
+
+    # Defined here rather than forwarded, so graph compilation inspecting the nodes' globals does not build the model
+    def with_structured_output(self, *args, **kwargs):
+        return self.get().with_structured_output(*args, **kwargs)
+
+    def bind_tools(self, *args, **kwargs):
+        return self.get().bind_tools(*args, **kwargs)
+
+    async def ainvoke(self, *args, **kwargs):
+        return await self.get().ainvoke(*args, **kwargs)
+
+    def __getattr__(self, name: str) -> Any:
+        if name.startswith("__"):
+            raise AttributeError(name)                   # probes like hasattr(model, "__self__")
+        return getattr(self.get(), name)
+
+# ===== FACTORY =====
+
+class ModelFactory:
+    """Builds one chat model per distinct model name, all on a single HTTP connection pool."""
+
+    def __init__(self, model_by_role: Dict[str, str] = LLM_MODEL_BY_ROLE):
+        self.model_by_role = model_by_role
+        self.http2 = LLM_HTTP2 and http2_available()
+        self.timeout = httpx.Timeout(connect=LLM_CONNECT_TIMEOUT, read=LLM_READ_TIMEOUT,
+                                     write=LLM_WRITE_TIMEOUT, pool=LLM_POOL_TIMEOUT)
+        self.limits = httpx.Limits(max_connections           = LLM_HTTP_MAX_CONNECTIONS,
+                                   max_keepalive_connections = LLM_HTTP_MAX_KEEPALIVE,
+                                   keepalive_expiry          = LLM_HTTP_KEEPALIVE_EXPIRY)
+        self._models: Dict[str, Any] = {}                # model name → chat model
+        self._http_clients: Optional[Tuple[httpx.Client, httpx.AsyncClient]] = None
+        self.generation = 0                              # bumped by aclose(), so the LazyModel stand-ins rebuild
+        self._lock = threading.RLock()
+
+    def http_clients(self) -> Tuple[httpx.Client, httpx.AsyncClient]:
+        """The shared sync and async HTTP clients, created on first use."""
+        with self._lock:
+            if self._http_clients is None:
+                self._http_clients = (
+                    httpx.Client(http2=self.http2, limits=self.limits, timeout=self.timeout),
+                    httpx.AsyncClient(http2=self.http2, limits=self.limits, timeout=self.timeout),
+                )
+            return self._http_clients
+
+    def build(self, model_name: str):
+        from langchain.chat_models import init_chat_model   # loads the provider SDK, the bulk of the import time
+        provider = model_name.split(":", 1)[0] if ":" in model_name else "openai"
+        client_kwargs = {}
+        if provider in HTTP_CLIENT_PROVIDERS:
+            http_client, http_async_client = self.http_clients()
+            client_kwargs = {"http_client": http_client, "http_async_client": http_async_client, "timeout": self.timeout}
+        return init_chat_model(model=model_name, temperature=0.0, max_retries=0, rate_limiter=model_gateway.rate_limiter,
+                               cache=llm_cache_for(temperature=0.0), callbacks=[prompt_cache_stats], **client_kwargs)
+
+    def get(self, role: str):
+        """The chat model of `role`, shared with every role using the same model name."""
+        model_name = self.model_by_role[role]
+        with self._lock:
+            if model_name not in self._models:
+                self._models[model_name] = self.build(model_name)
+            return self._models[model_name]
+
+    def lazy(self, role: str) -> LazyModel:
+        return LazyModel(lambda: self.get(role))
+
+    def build_all(self):
+        """Build the models of every role (startup warm-up)."""
+        for role in self.model_by_role:
+            self.get(role)
+
+    async def aclose(self):
+        """Close the shared connection pool (app shutdown); models used afterwards are rebuilt on a new one."""
+        with self._lock:
+            http_clients, self._http_clients = self._http_clients, None
+            self._models.clear()                         # their clients are the closed ones
+            self.generation += 1
+        if http_clients is not None:
+            http_clients[0].close()
+            await http_clients[1].aclose()
+
+    def metrics(self) -> dict:
+        return {
+            "models"          : self.model_by_role,
+            "instances"       : len(self._models),
+            "http2"           : self.http2,
+            "max_connections" : LLM_HTTP_MAX_CONNECTIONS,
+            "max_keepalive"   : LLM_HTTP_MAX_KEEPALIVE,
+        }
+
+# One factory, and one connection pool, per process
+model_factory = ModelFactory()
+
+def model_for(role: str) -> LazyModel:
+    """Chat model of a node role ("supervisor", "logistics" or "forwarder"), built on first use."""
+    return model_factory.lazy(role)
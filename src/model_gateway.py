@@ -0,0 +1,247 @@
+"""Shared Chat Model Gateway.
+
+Every node reaches the provider through `model_gateway.ainvoke`, which wraps the call in:
+
+- token buckets for requests and tokens per minute (LLM_RPM, LLM_TPM), so bursts are
+  smoothed out before they turn into provider 429s
+- an adaptive concurrency limit (AIMD): halved on a 429, raised by one after a window of
+  successful calls, between LLM_MIN_CONCURRENCY and LLM_MAX_CONCURRENCY
+- retries with jittered exponential backoff on rate limits, timeouts, connection errors
+  and 5xx responses, honouring Retry-After when the provider sends one
+
+The chat models (see `src.model_factory`) are created with the SDK's own retries
+disabled, so the gateway is the only retry layer, and with the gateway's rate limiter.
+LangChain consults a model's rate limiter only once its response cache missed, so the
+token buckets and the concurrency slots are only taken by calls that reach the provider;
+calls answered by `src.llm_cache` pass straight through.
+"""
+
+import os
+import time
+import random
+import asyncio
+import weakref
+from contextvars import ContextVar
+from dotenv import load_dotenv
+from typing_extensions import Any, Optional
+
+from langchain_core.messages.utils import count_tokens_approximately
+from langchain_core.rate_limiters import BaseRateLimiter
+from src.concurrency import LLM_MAX_CONCURRENCY
+
+# Load environment variables
+load_dotenv()
+
+# ===== GATEWAY CONFIGURATION =====
+LLM_RPM                    = float(os.getenv("LLM_RPM", "0"))               # requests per minute of the account tier, 0 disables
+LLM_TPM                    = float(os.getenv("LLM_TPM", "0"))               # tokens per minute of the account tier, 0 disables
+LLM_EXPECTED_OUTPUT_TOKENS = int(os.getenv("LLM_EXPECTED_OUTPUT_TOKENS", "400"))
+LLM_MIN_CONCURRENCY        = int(os.getenv("LLM_MIN_CONCURRENCY", "1"))
+LLM_MAX_RETRIES            = int(os.getenv("LLM_MAX_RETRIES", "5"))
+LLM_BACKOFF_BASE_SECONDS   = float(os.getenv("LLM_BACKOFF_BASE_SECONDS", "0.5"))
+LLM_BACKOFF_MAX_SECONDS    = float(os.getenv("LLM_BACKOFF_MAX_SECONDS", "30"))
+
+RETRYABLE_STATUS_CODES = {408, 409, 429, 500, 502, 503, 504}
+RETRYABLE_ERROR_NAMES  = {"RateLimitError", "APIConnectionError", "APITimeoutError", "InternalServerError", "TimeoutError"}
+
+# ===== UTILITY FUNCTIONS =====
+
+def status_code_of(error: BaseException) -> Optional[int]:
+    """HTTP status of a provider error, if it carries one."""
+    status_code = getattr(error, "status_code", None) or getattr(getattr(error, "response", None), "status_code", None)
+    return status_code if isinstance(status_code, int) else None
+
+def is_rate_limit(error: BaseException) -> bool:
+    return status_code_of(error) == 429 or type(error).__name__ == "RateLimitError"
+
+def is_retryable(error: BaseException) -> bool:
+    return status_code_of(error) in RETRYABLE_STATUS_CODES or type(error).__name__ in RETRYABLE_ERROR_NAMES
+
+def retry_after_seconds(error: BaseException) -> float:
+    """Delay requested by the provider's Retry-After header, 0 when absent."""
+    headers = getattr(getattr(error, "response", None), "headers", None) or {}
+    try:
+        return float(headers.get("retry-after", 0))
+    except (TypeError, ValueError):
+        return 0.0
+
+def backoff_seconds(attempt: int) -> float:
+    """Full-jitter exponential backoff: uniform in [0, min(max, base * 2^attempt)]."""
+    return random.uniform(0, min(LLM_BACKOFF_MAX_SECONDS, LLM_BACKOFF_BASE_SECONDS * 2 ** attempt))
+
+# ===== RATE LIMITING =====
+
+class TokenBucket:
+    """
+    Reservation-based token bucket refilled at `per_minute / 60` per second.
+
+    `reserve` takes the amount right away and returns how long the caller must wait for
+    the bucket to cover it, so waiting callers are served in arrival order and the bucket
+    holds no event-loop state.
+    """
+
+    def __init__(self, per_minute: float):
+        self.rate = per_minute / 60.0
+        self.capacity = per_minute
+        self.level = per_minute
+        self.updated_at = time.monotonic()
+
+    def reserve(self, amount: float) -> float:
+        if self.rate <= 0:
+            return 0.0
+        now = time.monotonic()
+        self.level = min(self.capacity, self.level + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+        self.level -= min(amount, self.capacity)
+        return max(0.0, -self.level / self.rate)
+
+class AdaptiveLimit:
+    """AIMD concurrency limit: additive increase per window of successes, multiplicative decrease on 429."""
+
+    def __init__(self, minimum: int = LLM_MIN_CONCURRENCY, maximum: int = LLM_MAX_CONCURRENCY):
+        self.minimum = max(1, minimum)
+        self.maximum = max(self.minimum, maximum)
+        self.limit = float(self.maximum)
+        self.in_flight = 0
+        self.successes = 0
+        self.epoch = 0                                       # bumped on every decrease
+        self._conditions = weakref.WeakKeyDictionary()      # event loop → condition waiters sleep on
+
+    def _condition(self) -> asyncio.Condition:
+        loop = asyncio.get_running_loop()
+        if loop not in self._conditions:
+            self._conditions[loop] = asyncio.Condition()
+        return self._conditions[loop]
+
+    async def acquire(self) -> int:
+        """Wait for a free slot and return the epoch the call started in."""
+        condition = self._condition()
+        async with condition:
+            await condition.wait_for(lambda: self.in_flight < int(self.limit))
+            self.in_flight += 1
+            return self.epoch
+
+    async def release(self):
+        condition = self._condition()
+        async with condition:
+            self.in_flight -= 1
+            condition.notify_all()
+
+    def on_success(self):
+        self.successes += 1
+        if self.successes >= int(self.limit) and self.limit < self.maximum:
+            self.limit += 1
+            self.successes = 0
+
+    def on_rate_limit(self, started_epoch: int):
+        # Calls started before the last decrease belong to the burst that caused it; only halve once per burst
+        if started_epoch == self.epoch:
+            self.limit = max(self.minimum, self.limit / 2)
+            self.successes = 0
+            self.epoch += 1
+
+# ===== GATEWAY =====
+
+class GatewayCall:
+    """One attempt of a gateway call, shared with the model's rate limiter through `current_call`."""
+
+    def __init__(self, estimated_tokens: int):
+        self.estimated_tokens = estimated_tokens
+        self.started_epoch: Optional[int] = None       # set once the attempt holds a concurrency slot
+
+# Attempt in progress in this context; None for model calls made outside the gateway
+current_call: ContextVar[Optional[GatewayCall]] = ContextVar("current_call", default=None)
+
+class GatewayRateLimiter(BaseRateLimiter):
+    """Rate limiter of every chat model: takes the gateway's budgets and a concurrency slot after a cache miss."""
+
+    def __init__(self, gateway: "ModelGateway"):
+        self.gateway = gateway
+
+    def acquire(self, *, blocking: bool = True) -> bool:
+        # Synchronous calls do not go through the gateway; they only draw on its budgets
+        delay = self.gateway.reserve(LLM_EXPECTED_OUTPUT_TOKENS)
+        if delay > 0:
+            time.sleep(delay)
+        return True
+
+    async def aacquire(self, *, blocking: bool = True) -> bool:
+        call = current_call.get()
+        delay = self.gateway.reserve(call.estimated_tokens if call is not None else LLM_EXPECTED_OUTPUT_TOKENS)
+        if delay > 0:
+            await asyncio.sleep(delay)
+        if call is not None and call.started_epoch is None:
+            call.started_epoch = await self.gateway.concurrency.acquire()
+        return True
+
+class ModelGateway:
+    """Rate-limited, adaptively bounded and retrying entry point for every model call."""
+
+    def __init__(self):
+        self.requests = TokenBucket(LLM_RPM)
+        self.tokens = TokenBucket(LLM_TPM)
+        self.concurrency = AdaptiveLimit()
+        self.rate_limiter = GatewayRateLimiter(self)   # given to every chat model by src.model_factory
+        self._counters = {"calls": 0, "provider_calls": 0, "retries": 0, "rate_limited": 0, "failures": 0, "throttled_seconds": 0.0}
+
+    def reserve(self, estimated_tokens: int) -> float:
+        """Take one request and `estimated_tokens` from the buckets; returns the seconds to wait for them."""
+        delay = max(self.requests.reserve(1), self.tokens.reserve(estimated_tokens))
+        if delay > 0:
+            self._counters["throttled_seconds"] += delay
+        return delay
+
+    async def ainvoke(self, runnable, input: Any, config: Optional[dict] = None) -> Any:
+        """
+        Invoke a chat model (or a structured-output runnable built from one) through the gateway.
+
+        Args:
+            runnable: The model or runnable to call
+            input: Its input, usually a list of messages
+            config: Run config of the call, e.g. from `prompt_call_config`
+
+        Returns:
+            The runnable's output
+        """
+        self._counters["calls"] += 1
+        estimated_tokens = LLM_EXPECTED_OUTPUT_TOKENS
+        if isinstance(input, list):
+            estimated_tokens += count_tokens_approximately(input)
+        for attempt in range(LLM_MAX_RETRIES + 1):
+            call = GatewayCall(estimated_tokens)
+            call_token = current_call.set(call)
+            try:
+                result = await runnable.ainvoke(input, config=config)
+            except Exception as e:
+                if is_rate_limit(e) and call.started_epoch is not None:
+                    self._counters["rate_limited"] += 1
+                    self.concurrency.on_rate_limit(call.started_epoch)
+                if attempt == LLM_MAX_RETRIES or not is_retryable(e):
+                    self._counters["failures"] += 1
+                    raise
+                self._counters["retries"] += 1
+                delay = max(retry_after_seconds(e), backoff_seconds(attempt))
+                error_name = type(e).__name__
+            else:
+                if call.started_epoch is not None:        # None: answered by the LLM cache
+                    self.concurrency.on_success()
+                return result
+            finally:
+                current_call.reset(call_token)
+                if call.started_epoch is not None:
+                    self._counters["provider_calls"] += 1
+                    await self.concurrency.release()
+            print(f"Model call failed ({error_name}), retry {attempt + 1}/{LLM_MAX_RETRIES} in {delay:.1f}s")
+            await asyncio.sleep(delay)
+
+    def metrics(self) -> dict:
+        return {
+            **self._counters,
+            "concurrency_limit" : int(self.concurrency.limit),
+            "in_flight"         : self.concurrency.in_flight,
+            "rpm"               : LLM_RPM,
+            "tpm"               : LLM_TPM,
+        }
+
+# Shared by every node
+model_gateway = ModelGateway()
@@ -4,13 +4,6 @@ This module contains all prompt templates used across the Inbound Logistics work
 """
 
 supervisor_decision_to_route_to_subagents = """
-These are the inbound logistics Data received so far:
-<message>
-{message}
-</message>
-
-Today's date is {date}.
-
 Your role is to act as the Supervisor Agent in the Inbound Logistics system.  
 Your responsibilities are:
 1. Assess the data provided by the user.  
@@ -49,6 +42,15 @@ Keep the verification message professional and concise, e.g.,
 
 """
 
+supervisor_decision_request = """
+These are the inbound logistics Data received so far:
+<message>
+{message}
+</message>
+
+Today's date is {date}.
+"""
+
 supervisor_build_subagent_brief = """
 You are preparing a concise brief for exactly one downstream agent.
 Target agent: {agent}
@@ -66,16 +68,6 @@ Relevant fields for this agent:
 {relevant_fields}
 </relevant_fields>
 
-Conversation history from the user only:
-<user_history>
-{user_chat_history}
-</user_history>
-
-Supervisor routing summary:
-<routing_brief>
-{routing_brief}
-</routing_brief>
-
 Structure the brief in clearly separated sections using this exact format:
 
 [FIELD DATA]
@@ -89,6 +81,18 @@ Skip optional: <skip requested / not requested>
 <any other user instructions, questions, or notes; otherwise, say None>
 """
 
+supervisor_build_subagent_brief_request = """
+Conversation history from the user only:
+<user_history>
+{user_chat_history}
+</user_history>
+
+Supervisor routing summary:
+<routing_brief>
+{routing_brief}
+</routing_brief>
+"""
+
 supervisor_update_subagent_brief = """
 You are updating the brief for exactly one downstream agent.
 Target agent: {agent}
@@ -114,27 +118,11 @@ Rules:
 5. Do not add any fields not present in the current brief or latest user message unless they are directly inferable from the target agent's schema wording.
 6. Return only the updated brief as plain text.
 
-The agent's last request to the user (provided for context only — do NOT
-treat this as user input or user intent):
-<agent_last_request>
-{agent_last_request}
-</agent_last_request>
-
-Latest user message:
-<latest_user_message>
-{latest_user_message}
-</latest_user_message>
-
 Relevant fields for this agent:
 <relevant_fields>
 {relevant_fields}
 </relevant_fields>
 
-Current brief:
-<current_brief>
-{current_brief}
-</current_brief>
-
 Structure the brief in clearly separated sections using this exact format:
 
 [FIELD DATA]
@@ -148,27 +136,29 @@ Skip optional: <skip requested / not requested>
 <any other user instructions, questions, or notes; otherwise, say None>
 """
 
-logistics_agent_tasks = """
-These are the Logistics Data received so far:
+supervisor_update_subagent_brief_request = """
+The agent's last request to the user (provided for context only — do NOT
+treat this as user input or user intent):
+<agent_last_request>
+{agent_last_request}
+</agent_last_request>
 
-<agent_brief>
-{agent_brief}
-</agent_brief>
+Latest user message:
+<latest_user_message>
+{latest_user_message}
+</latest_user_message>
 
+Current brief:
+<current_brief>
+{current_brief}
+</current_brief>
+"""
+
+logistics_agent_tasks = """
 <field_specifications>
 {fields_details}
 </field_specifications>
 
-<mandatory_fields>
-{mandatory_fields}
-</mandatory_fields>
-
-<optional_fields>
-{optional_fields}
-</optional_fields>
-
-Today's date is {date}.
-
 Your role is to act as the logistician Agent in the Inbound Logistics system.  
 Your responsibilities are:
 
@@ -285,31 +275,25 @@ agent_brief: "The input says AWB/BL: DEF789123, and requests to change the Mode
 - Maintain professional tone and be precise in data extraction
 - Reset `"ask_for_optional_fields"` whenever new/updated data is provided.
 
-Now, analyze the provided logistics data and populate the `LogisticsSchema` accordingly.
+Now, analyze the logistics data in the following message and populate the `LogisticsSchema` accordingly.
 
 """
 
-forwarder_agent_tasks = """
-These are the Forwarder Data received so far:
+logistics_agent_request = """
+These are the Logistics Data received so far:
 
 <agent_brief>
 {agent_brief}
 </agent_brief>
 
+Today's date is {date}.
+"""
+
+forwarder_agent_tasks = """
 <field_specifications>
 {fields_details}
 </field_specifications>
 
-<mandatory_fields>
-{mandatory_fields}
-</mandatory_fields>
-
-<optional_fields>
-{optional_fields}
-</optional_fields>
-
-Today's date is {date}.
-
 Your role is to act as the Forwarder Agent in the Inbound Logistics system.  
 Your responsibilities are:
 
@@ -426,8 +410,18 @@ agent_brief: "The user input Shipment Readiness Date: 2025-09-24, and requested
 - Maintain professional tone and be precise in data extraction
 - Reset `"ask_for_optional_fields"` whenever new/updated data is provided.
 
-Now, analyze the provided forwarder data and populate the `ForwarderSchema` accordingly.
+Now, analyze the forwarder data in the following message and populate the `ForwarderSchema` accordingly.
+
+"""
+
+forwarder_agent_request = """
+These are the Forwarder Data received so far:
+
+<agent_brief>
+{agent_brief}
+</agent_brief>
 
+Today's date is {date}.
 """
 
 missing_mandatory_fields_prompt = """
@@ -502,6 +496,86 @@ Here is the collected {agent} information, including the most recent updates:
 
 """
 
+missing_mandatory_fields_template = """⚠️ **Missing Required Information**
+I cannot proceed with the {agent} request until the following required fields are provided:
+
+📌 **Details of Missing Fields**
+{missing_field_details}
+
+**How to provide the information:**
+Please share the missing details in a **clear, structured format**, e.g:
+{example_lines}
+
+💡 **Tip:** If you are unsure about any of the required fields or need clarification, just let me know and I’ll guide you."""
+
+missing_optional_fields_template = """ℹ️ **Additional Information Inquiry**
+I can process your {agent} request with the current information, but some optional fields could enhance the completeness of your record:
+
+📌 **Details of Missing Optional Fields**
+{missing_field_details}
+
+**Your Options**
+- ✅ **Provide the additional information** now → creates a more complete record.
+- ⏭️ **Skip these fields** and proceed → I’ll continue processing with the current data.
+- 🕒 **Add them later** → you can update the record once the information is available.
+
+**How to Provide the optional fields**
+{example_lines}
+- "Skip optional fields and proceed"
+
+Would you like to provide any of this optional information, or should I proceed with the current data?"""
+
+user_confirmation_template = """⚠️ **Confirmation Required**
+
+Here is the collected {agent} information, including the most recent updates:
+
+{information_report}
+
+✅ Please review and confirm if everything is correct so I can proceed with submitting the transaction."""
+
+commit_failed_template = """❌ **Transaction Not Saved**
+
+The {agent} record could not be saved to the database:
+{error}
+
+✏️ Please correct the information above and confirm again so I can resubmit the transaction."""
+
+conversation_summary_prompt = """
+You are compacting an inbound logistics conversation so it can be handed to the Supervisor Agent in fewer tokens.
+Merge the earlier summary with the older messages below into one updated summary.
+
+Earlier summary (empty if this is the first compaction):
+<previous_summary>
+{previous_summary}
+</previous_summary>
+
+Older messages to fold into the summary:
+<messages>
+{messages}
+</messages>
+
+Rules:
+1. Keep every field value the user provided, using the latest value when a field was corrected.
+2. Keep which agent each field belongs to, when it is clear from the conversation.
+3. Keep the latest confirmation and skip-optional status of every agent and any record that was already submitted.
+4. Keep unanswered user questions and open requests from the agents.
+5. Drop greetings, repeated agent prompts and formatting; do not invent values.
+
+Return only the summary as plain text in this exact format:
+
+[LOGISTICS FIELDS]
+<FieldName: Value, one per line; otherwise, say None>
+
+[FORWARDER FIELDS]
+<FieldName: Value, one per line; otherwise, say None>
+
+[STATUS]
+<confirmation, skip-optional and submission status per agent; otherwise, say None>
+
+[OPEN ITEMS]
+<unanswered questions or pending requests; otherwise, say None>
+"""
+
 BRIEF_CRITERIA_PROMPT = """
 <role>
 You are an expert evaluator for an **Inbound Logistics Supervisor Agent**. Your task is to assess whether the agent's output (either an 'agent_brief' or a 'question') **accurately captures a specific user requirement or extracted data point.**
@@ -0,0 +1,63 @@
+"""Prompt-Cache Instrumentation.
+
+Every agent prompt is split into a static SystemMessage, rendered once per process and
+byte-identical across turns and users, followed by a small dynamic HumanMessage tail.
+Providers that cache prompt prefixes (OpenAI applies this automatically above ~1024
+tokens) can then reuse the static part. This module records, per prompt, how many
+input tokens the provider reported as read from its cache.
+"""
+
+import threading
+from collections import defaultdict
+from typing_extensions import Any, Dict, Optional, List
+
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.outputs import LLMResult
+from src.llm_cache import CACHE_HIT_METADATA_KEY
+
+# Tag prefix naming the prompt of a model call, e.g. "prompt:logistics_agent_tasks"
+PROMPT_TAG_PREFIX = "prompt:"
+
+class PromptCacheStats(BaseCallbackHandler):
+    """Callback handler accumulating input and cache-read tokens per prompt."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stats = defaultdict(lambda: {"calls": 0, "cache_hits": 0, "input_tokens": 0, "cache_read_tokens": 0})
+
+    def on_llm_end(self, response: LLMResult, *, tags: Optional[List[str]] = None, **kwargs: Any) -> None:
+        prompt_name = next((tag[len(PROMPT_TAG_PREFIX):] for tag in tags or [] if tag.startswith(PROMPT_TAG_PREFIX)), "untagged")
+        for generations in response.generations:
+            for generation in generations:
+                message = getattr(generation, "message", None)
+                usage = getattr(message, "usage_metadata", None)
+                if not usage or message.response_metadata.get(CACHE_HIT_METADATA_KEY):
+                    continue                    # answered by the local response cache, not the provider
+                cache_read = (usage.get("input_token_details") or {}).get("cache_read") or 0
+                with self._lock:
+                    stats = self._stats[prompt_name]
+                    stats["calls"] += 1
+                    stats["cache_hits"] += cache_read > 0
+                    stats["input_tokens"] += usage.get("input_tokens", 0)
+                    stats["cache_read_tokens"] += cache_read
+
+    def snapshot(self) -> Dict[str, dict]:
+        """Counters per prompt, with the share of input tokens served from the cache."""
+        with self._lock:
+            return {
+                prompt_name: {**stats, "cache_read_ratio": round(stats["cache_read_tokens"] / stats["input_tokens"], 3) if stats["input_tokens"] else 0.0}
+                for prompt_name, stats in self._stats.items()
+            }
+
+    def reset(self) -> None:
+        with self._lock:
+            self._stats.clear()
+
+# Shared instance used by every agent
+prompt_cache_stats = PromptCacheStats()
+
+# Models record their usage by being created with `callbacks=[prompt_cache_stats]`; passing the
+# handler in the call config instead would replace the graph's callbacks (streaming, tracing)
+def prompt_call_config(prompt_name: str) -> dict:
+    """Run config of a model call, tagging it with its prompt."""
+    return {"tags": [f"{PROMPT_TAG_PREFIX}{prompt_name}"]}
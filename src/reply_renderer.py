@@ -0,0 +1,111 @@
+"""Reply Rendering for the Sub Agents.
+
+This module turns a `LogisticsSchema`/`ForwarderSchema` response into the message shown
+to the user when fields are missing or the record needs confirmation. Two modes exist,
+selected per deployment with the REPLY_RENDER_MODE environment variable:
+- "template" (default): the reply is built deterministically from the schema object
+  and the field details, without an extra LLM round trip.
+- "llm": the reply is written by the chat model from the `*_prompt` templates.
+"""
+
+import os
+from typing_extensions import List, Literal
+
+from pydantic import BaseModel
+from langchain_core.messages import AIMessage
+from src.prompt_cache import prompt_call_config
+from src.model_gateway import model_gateway
+from src.prompt import missing_mandatory_fields_prompt, missing_optional_fields_prompt, user_confirmation_prompt, \
+                       missing_mandatory_fields_template, missing_optional_fields_template, user_confirmation_template
+
+REPLY_RENDER_MODE = os.getenv("REPLY_RENDER_MODE", "template").lower()
+
+# Tag of the model calls writing a user-facing reply, whose tokens are streamed to the client
+USER_REPLY_TAG = "user_reply"
+
+ReplyType = Literal["missing_mandatory_fields", "missing_optional_fields", "user_confirmation"]
+
+# ===== UTILITY FUNCTIONS =====
+
+def get_selected_field_details(all_fields, missed_fields):
+    """Return the schema definitions of the fields listed in `missed_fields`."""
+    return [ fields for fields in all_fields if fields['field'] in missed_fields]
+
+def format_field_detail(field_item: dict) -> str:
+    """Render one field definition as a markdown bullet."""
+    line = f"- **{field_item['field']}**: {field_item.get('description', '')}"
+    if field_item.get("dataType") == "date":
+        line += " (YYYY-MM-DD)"
+    if field_item.get("seededValues"):
+        line += f" Allowed values: {', '.join(field_item['seededValues'])}."
+    return line
+
+def format_example_lines(field_details: List[dict]) -> str:
+    """Render a `Field: <value>` example line for each field."""
+    examples = []
+    for field_item in field_details:
+        if field_item.get("dataType") == "date":
+            example = "YYYY-MM-DD"
+        else:
+            example = "<value>"
+        examples.append(f'- "{field_item["field"]}: {example}"')
+    return "\n".join(examples)
+
+def format_information_report(response: BaseModel) -> str:
+    """Render the collected shipment values and the fields still missing."""
+    lines = [f"- **{field_name}**: {value}"
+             for field_name, value in response.shipment.model_dump().items() if value is not None]
+    if response.missing_optional_fields:
+        lines.append(f"\nNot provided (optional): {', '.join(response.missing_optional_fields)}")
+    return "\n".join(lines) if lines else "No field values have been provided yet."
+
+# ===== RENDERING =====
+
+def render_template_reply(reply_type: ReplyType, agent: str, response: BaseModel, all_fields: List[dict]) -> str:
+    """Build the reply text deterministically from the schema response."""
+    if reply_type == "user_confirmation":
+        return user_confirmation_template.format(agent = agent, information_report = format_information_report(response))
+
+    missed_fields = response.missing_mandatory_fields if reply_type == "missing_mandatory_fields" else response.missing_optional_fields
+    field_details = get_selected_field_details(all_fields = all_fields, missed_fields = missed_fields)
+    template = missing_mandatory_fields_template if reply_type == "missing_mandatory_fields" else missing_optional_fields_template
+    return template.format(agent = agent,
+                           missing_field_details = "\n".join(format_field_detail(item) for item in field_details),
+                           example_lines = format_example_lines(field_details))
+
+def render_llm_prompt(reply_type: ReplyType, agent: str, response: BaseModel, all_fields: List[dict]) -> str:
+    """Build the prompt asking the chat model to write the reply."""
+    if reply_type == "missing_mandatory_fields":
+        return missing_mandatory_fields_prompt.format(
+                    agent = agent,
+                    missing_mandatory_fields = response.missing_mandatory_fields,
+                    missing_mandatory_field_details = get_selected_field_details(all_fields = all_fields,
+                                                                                 missed_fields = response.missing_mandatory_fields))
+    if reply_type == "missing_optional_fields":
+        return missing_optional_fields_prompt.format(
+                    agent = agent,
+                    missing_optional_fields = response.missing_optional_fields,
+                    missing_optional_field_details = get_selected_field_details(all_fields = all_fields,
+                                                                                missed_fields = response.missing_optional_fields))
+    return user_confirmation_prompt.format(agent = agent, information_report = response.model_dump())
+
+async def render_agent_reply(model, reply_type: ReplyType, agent: str, response: BaseModel, all_fields: List[dict]) -> AIMessage:
+    """
+    Render the user-facing reply of a sub agent.
+
+    Args:
+        model: Chat model used when REPLY_RENDER_MODE is "llm"
+        reply_type: Which reply to render
+        agent: Display name of the agent ("Logistics" or "Forwarder")
+        response: The agent's `LogisticsSchema`/`ForwarderSchema` response
+        all_fields: The agent's field definitions from IBL_SCHEMA.json
+
+    Returns:
+        The reply as an AIMessage
+    """
+    if REPLY_RENDER_MODE == "llm":
+        config = prompt_call_config(f"{reply_type}_prompt")
+        config["tags"].append(USER_REPLY_TAG)
+        return await model_gateway.ainvoke(model, [AIMessage(content = render_llm_prompt(reply_type, agent, response, all_fields))],
+                                           config = config)
+    return AIMessage(content = render_template_reply(reply_type, agent, response, all_fields))
@@ -0,0 +1,102 @@
+"""Zero-LLM Routing from a Field-Name Index.
+
+Most first messages name their fields explicitly ("AWB/BL: 123, Incoterm: FOB" or "the
+Clearing Number is 42"), and every IBL_SCHEMA.json field belongs to exactly one agent, so
+the routing decision can be read off the field names. This module precomputes an inverted
+index from normalized field names and aliases to the agent owning them and routes such
+messages locally; anything it cannot read with certainty returns None and goes to the
+structured-output routing call instead.
+
+A message is routed locally when:
+- every `Label: value` line or segment starts with a known field name or alias, and
+- at least one field is named, either as such a label or by its full schema name
+  (multi-word names and acronyms like "Clearing Number" or "ETA", not single words
+  such as "Forwarder" that also occur in ordinary sentences), and
+- no other field name or alias in the text belongs to an agent left out, and
+- outside its labels, the text does not name an agent left out ("please update the
+  forwarder record too" next to a logistics label), and
+- it asks no question.
+
+Only the latest message is read, so the supervisor skips the index when that message
+answers one of its own questions (see `supervisor_agent.route_locally`).
+"""
+
+import re
+from typing_extensions import Dict, List, Optional, Set
+
+from src.field_extractor import build_alias_map, normalize_field_key
+
+# `Label: value` at the start of a line or of a comma/semicolon separated segment
+LABEL_PATTERN = re.compile(r"(?:^|[\n,;])\s*(?:[-*•]\s*)?([^:\n,;]{1,60}?)\s*[:=]")
+
+class RoutingIndex:
+    """Inverted index from field names and aliases to the agents owning them."""
+
+    def __init__(self, agent_fields: Dict[str, List[dict]]):
+        """
+        Args:
+            agent_fields: Agent name → its field definitions from IBL_SCHEMA.json
+        """
+        self.agent_names = list(agent_fields)
+        self.label_index: Dict[str, Set[str]] = {}         # normalized name or alias → agents
+        self.name_index: Dict[str, Set[str]] = {}          # normalized full field name → agents
+        for agent_name, fields in agent_fields.items():
+            for key in build_alias_map(fields):
+                self.label_index.setdefault(key, set()).add(agent_name)
+            for field_item in fields:
+                for name in {field_item["field"], re.sub(r"\(.*?\)", "", field_item["field"])}:
+                    if len(name.split()) > 1 or name.strip().isupper():
+                        self.name_index.setdefault(normalize_field_key(name), set()).add(agent_name)
+
+        # Longest names first, so "AWB/BL Date" wins over "AWB/BL"
+        self.name_pattern = self._alternation(self.name_index)
+        self.alias_pattern = self._alternation(self.label_index)
+
+        # Words naming each agent in free text, from its name: "logistics_agent" → "logistics", "logistic"
+        self.agent_patterns = {
+            agent_name: re.compile(r"\b" + re.escape(normalize_field_key(agent_name.removesuffix("_agent")).rstrip("s")) + r"s?\b")
+            for agent_name in self.agent_names
+        }
+
+    @staticmethod
+    def _alternation(keys) -> Optional[re.Pattern]:
+        keys = sorted(keys, key=len, reverse=True)
+        return re.compile(r"\b(" + "|".join(re.escape(key) for key in keys) + r")\b") if keys else None
+
+    def route(self, message: str) -> Optional[List[str]]:
+        """
+        Agents a message is about, in schema order, or None when it is ambiguous.
+
+        Args:
+            message: Text of the user's message
+
+        Returns:
+            Agent names, or None when the routing LLM has to decide
+        """
+        if not message or "?" in message:
+            return None
+
+        mentions = []                                        # owning agents of every named field
+        for match in LABEL_PATTERN.finditer(message):
+            agents = self.label_index.get(normalize_field_key(match.group(1)))
+            if agents is None:
+                return None                                  # a label that is not a field name
+            mentions.append(agents)
+        normalized = normalize_field_key(message)
+        if self.name_pattern is not None:
+            mentions += [self.name_index[match.group(1)] for match in self.name_pattern.finditer(normalized)]
+
+        if not mentions or any(len(agents) > 1 for agents in mentions):
+            return None
+        named_agents = set().union(*mentions)
+
+        # Any other name or alias in the text ("incoterm", "airline", ...) pointing at another agent makes it ambiguous
+        if self.alias_pattern is not None:
+            if any(not self.label_index[match.group(1)] <= named_agents for match in self.alias_pattern.finditer(normalized)):
+                return None
+
+        # So does an agent named in the text around the labels ("Forwarder:" itself is a logistics field)
+        unlabeled = normalize_field_key(LABEL_PATTERN.sub(lambda match: match.group(0)[:match.start(1) - match.start(0)], message))
+        if any(pattern.search(unlabeled) for agent_name, pattern in self.agent_patterns.items() if agent_name not in named_agents):
+            return None
+        return [agent_name for agent_name in self.agent_names if agent_name in named_agents]
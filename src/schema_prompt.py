@@ -0,0 +1,94 @@
+"""Compact Schema Rendering for Agent Prompts.
+
+The agent prompts used to embed the Python repr of every IBL_SCHEMA.json field dict,
+plus separate mandatory/optional lists, and the supervisor rebuilt its field lists on
+every call. This module compiles each agent's fields once, at load time, into:
+
+- a field table for the sub agent prompts, one row per field with a short code,
+  the field name, M(andatory)/O(ptional), the data type, a one-line description
+  and the allowed seeded values
+- a field list for the supervisor prompts, with the field names and short descriptions
+
+The one-line description is the field's "shortDescription" in IBL_SCHEMA.json, written
+for fields whose description does not fit on a line, or else the first sentence of its
+"description". Both renderings are cached strings with their approximate token counts,
+reported per agent by `schema_registry.metrics()`.
+"""
+
+import re
+from typing_extensions import List, NamedTuple
+
+from langchain_core.messages import HumanMessage
+from langchain_core.messages.utils import count_tokens_approximately
+
+# Longest first sentence used as is; longer ones are cut at a word boundary (give the field a shortDescription instead)
+DESCRIPTION_LIMIT = 90
+
+# Header of the field table, explaining its columns to the model
+FIELD_TABLE_HEADER = "code | field | M=mandatory, O=optional | type | description | allowed values"
+
+class CompiledSchema(NamedTuple):
+    field_table: str         # rendering used by the sub agent prompts
+    field_list: str          # rendering used by the supervisor prompts
+    field_table_tokens: int
+    field_list_tokens: int
+
+# ===== UTILITY FUNCTIONS =====
+
+def count_text_tokens(text: str) -> int:
+    """Approximate token count of a prompt fragment."""
+    return count_tokens_approximately([HumanMessage(content=text)])
+
+def short_description(field_item: dict, limit: int = DESCRIPTION_LIMIT) -> str:
+    """The field's shortDescription or the first sentence of its description; "-" when it only repeats the field name."""
+    if field_item.get("shortDescription"):
+        return " ".join(field_item["shortDescription"].split())
+    description = " ".join(field_item.get("description", "").split())
+    first_sentence = re.split(r"(?<=[.!?])\s", description, maxsplit=1)[0].rstrip(".")
+    if first_sentence.lower() == field_item["field"].lower().rstrip("."):
+        return "-"
+    if len(first_sentence) > limit:
+        first_sentence = first_sentence[:limit].rsplit(" ", 1)[0] + "…"
+    return first_sentence or "-"
+
+def render_field_table(fields: List[dict], code_prefix: str) -> str:
+    """One row per field, e.g. "L4 | AWB/BL | M | str | The unique Air Waybill or Bill of Lading number for the shipment | -"."""
+    rows = [FIELD_TABLE_HEADER]
+    for number, field_item in enumerate(fields, start=1):
+        rows.append(" | ".join([
+            f"{code_prefix}{number}",
+            field_item["field"],
+            "M" if field_item.get("required") else "O",
+            "YYYY-MM-DD" if field_item["dataType"] == "date" else field_item["dataType"],
+            short_description(field_item),
+            "; ".join(field_item.get("seededValues") or []) or "-",
+        ]))
+    return "\n".join(rows)
+
+def render_field_list(fields: List[dict]) -> str:
+    """Field names with their short descriptions, one per line."""
+    lines = []
+    for field_item in fields:
+        description = short_description(field_item)
+        lines.append(f"- {field_item['field']}" + (f": {description}" if description != "-" else ""))
+    return "\n".join(lines)
+
+def compile_agent_schema(fields: List[dict], code_prefix: str) -> CompiledSchema:
+    """
+    Compile an agent's field definitions into its cached prompt renderings.
+
+    Args:
+        fields: The agent's field definitions from IBL_SCHEMA.json
+        code_prefix: Prefix of the row codes, e.g. "L" for logistics
+
+    Returns:
+        CompiledSchema with both renderings and their approximate token counts
+    """
+    field_table = render_field_table(fields, code_prefix)
+    field_list = render_field_list(fields)
+    return CompiledSchema(
+        field_table        = field_table,
+        field_list         = field_list,
+        field_table_tokens = count_text_tokens(field_table),
+        field_list_tokens  = count_text_tokens(field_list),
+    )
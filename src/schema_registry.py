@@ -0,0 +1,199 @@
+"""IBL Schema Registry.
+
+IBL_SCHEMA.json used to be parsed at import by five modules, each through the CWD-relative
+path "../IBL_SCHEMA.json" and each rebuilding its own field lists and `create_model`
+classes. This module parses it once and compiles everything derived from it into one
+immutable `SchemaSnapshot`:
+
+- per agent: the field definitions, mandatory/optional field names, the shipment and
+  response pydantic models, the field alias map, the seeded value indexes and the
+  compact prompt renderings
+- the routing index over all agents' field names
+
+`schema_registry.current()` checks the file's mtime (at most every
+SCHEMA_RELOAD_INTERVAL_SECONDS) and, when it changed, compiles a new snapshot and swaps it
+in as a whole, so a reader never sees fields of one version next to models of another.
+An edit that does not parse or compile is reported and the previous snapshot stays in use.
+Values derived by the agent modules (e.g. rendered system messages) are cached on the
+snapshot with `derive`, so they are rebuilt once per version.
+"""
+
+import os
+import json
+import time
+import threading
+from datetime import date
+from pathlib import Path
+from dotenv import load_dotenv
+from typing_extensions import Any, Callable, Dict, List, NamedTuple, Optional, Type
+
+from pydantic import BaseModel, Field, create_model
+from src.schema_prompt import CompiledSchema, compile_agent_schema
+from src.field_extractor import build_alias_map
+from src.seeded_values import SeededValueIndex, build_seeded_value_indexes
+from src.routing_index import RoutingIndex
+
+# Load environment variables
+load_dotenv()
+
+# ===== REGISTRY CONFIGURATION =====
+ROOT_DIR = Path(__file__).resolve().parent.parent
+SCHEMA_PATH = Path(os.getenv("IBL_SCHEMA_PATH", ROOT_DIR / "IBL_SCHEMA.json"))
+SCHEMA_RELOAD_INTERVAL_SECONDS = float(os.getenv("SCHEMA_RELOAD_INTERVAL_SECONDS", "2"))   # 0 checks on every access
+
+DATA_TYPES = {"str": str, "date": date}
+
+class AgentSpec(NamedTuple):
+    display_name: str        # used in the response schema description
+    code_prefix: str         # prefix of the field table row codes
+    module: str              # module exposing the response schema, where checkpoints look it up
+    response_name: str
+
+AGENT_SPECS = {
+    "logistics_agent": AgentSpec("Logistics", "L", "src.logistics_schema", "LogisticsSchema"),
+    "forwarder_agent": AgentSpec("Forwarder", "F", "src.forwarder_schema", "ForwarderSchema"),
+}
+
+# ===== COMPILED SCHEMA =====
+
+class AgentResponseSchema(BaseModel):
+    """Fields shared by the structured responses of the sub agents."""
+    missing_mandatory_fields: List[str] = Field(
+        description = "Fields required by the schema that are missing from the provided data"
+    )
+    missing_optional_fields: List[str] = Field(
+        description = "Optional fields that are missing from the provided data"
+    )
+    ask_for_optional_fields: bool = Field(
+        description = "Specifies whether the user should be prompted for optional fields",
+        default = True
+    )
+    needs_user_confirmation: bool = Field(
+        description = "Specifies whether user confirmation is required for the current record",
+        default = True
+    )
+
+class AgentSchema(NamedTuple):
+    fields: List[dict]                                 # field definitions from IBL_SCHEMA.json
+    mandatory_fields: List[str]
+    optional_fields: List[str]
+    shipment_model: Type[BaseModel]
+    response_schema: Type[BaseModel]                   # LogisticsSchema / ForwarderSchema
+    alias_map: Dict[str, str]
+    seeded_indexes: Dict[str, SeededValueIndex]
+    schema_prompt: CompiledSchema
+
+class SchemaSnapshot:
+    """Everything compiled from one version of IBL_SCHEMA.json."""
+
+    def __init__(self, version: int, mtime: int, raw: dict, agents: Dict[str, AgentSchema]):
+        self.version = version
+        self.mtime = mtime
+        self.raw = raw
+        self.agents = agents
+        self.routing_index = RoutingIndex({agent_name: agent.fields for agent_name, agent in agents.items()})
+        self._derived: Dict[str, Any] = {}
+        self._lock = threading.Lock()
+
+    def derive(self, name: str, build: Callable[["SchemaSnapshot"], Any]) -> Any:
+        """Value computed from this snapshot by `build`, built on first use and cached with the snapshot."""
+        if name not in self._derived:
+            with self._lock:
+                if name not in self._derived:
+                    self._derived[name] = build(self)
+        return self._derived[name]
+
+def compile_agent(agent_name: str, fields: List[dict]) -> AgentSchema:
+    """Compile one agent's field definitions."""
+    spec = AGENT_SPECS[agent_name]
+    shipment_model = create_model(
+        "DynamicShipmentFields",
+        __module__ = spec.module,
+        **{
+            field_item["field"]: (
+                Optional[DATA_TYPES.get(field_item["dataType"], str)],
+                Field(None, description = field_item.get("description", ""))
+            )
+            for field_item in fields
+        }
+    )
+    response_schema = create_model(
+        spec.response_name,
+        __base__   = AgentResponseSchema,
+        __module__ = spec.module,
+        __doc__    = f"Schema for {spec.display_name} Agent.",
+        shipment   = (shipment_model, ...),
+    )
+    return AgentSchema(
+        fields           = fields,
+        mandatory_fields = [item["field"] for item in fields if item.get("required") is True],
+        optional_fields  = [item["field"] for item in fields if item.get("required") is False],
+        shipment_model   = shipment_model,
+        response_schema  = response_schema,
+        alias_map        = build_alias_map(fields),
+        seeded_indexes   = build_seeded_value_indexes(fields),
+        schema_prompt    = compile_agent_schema(fields, code_prefix=spec.code_prefix),
+    )
+
+def compile_snapshot(raw: dict, version: int, mtime: int) -> SchemaSnapshot:
+    return SchemaSnapshot(version = version,
+                          mtime   = mtime,
+                          raw     = raw,
+                          agents  = {agent_name: compile_agent(agent_name, raw.get(agent_name, [])) for agent_name in AGENT_SPECS})
+
+# ===== REGISTRY =====
+
+class SchemaRegistry:
+    """Holds the current SchemaSnapshot and swaps in a new one when the schema file changes."""
+
+    def __init__(self, path: Path = SCHEMA_PATH, reload_interval: float = SCHEMA_RELOAD_INTERVAL_SECONDS):
+        self.path = Path(path)
+        self.reload_interval = reload_interval
+        self._lock = threading.Lock()
+        self._snapshot: Optional[SchemaSnapshot] = None
+        self._checked_at = 0.0
+        self._failed_mtime: Optional[int] = None         # mtime of an edit that did not compile, not retried
+
+    def _load(self, mtime: int) -> SchemaSnapshot:
+        with open(self.path, "r", encoding="utf-8") as schema_file:
+            raw = json.load(schema_file)
+        version = self._snapshot.version + 1 if self._snapshot else 1
+        return compile_snapshot(raw, version, mtime)
+
+    def current(self) -> SchemaSnapshot:
+        """The snapshot of the schema file as of its last modification."""
+        snapshot = self._snapshot
+        if snapshot is not None and time.monotonic() - self._checked_at < self.reload_interval:
+            return snapshot
+        with self._lock:
+            self._checked_at = time.monotonic()
+            mtime = None
+            try:
+                mtime = self.path.stat().st_mtime_ns
+                if self._snapshot is None or mtime not in (self._snapshot.mtime, self._failed_mtime):
+                    self._snapshot = self._load(mtime)
+            except Exception as e:
+                if self._snapshot is None:
+                    raise
+                self._failed_mtime = mtime
+                print(f"Error reloading {self.path.name}, keeping version {self._snapshot.version}: {e}")
+            return self._snapshot
+
+    def agent(self, agent_name: str) -> AgentSchema:
+        return self.current().agents[agent_name]
+
+    def metrics(self) -> dict:
+        """Current schema version and the approximate token counts of each agent's prompt renderings."""
+        snapshot = self.current()
+        return {
+            "version" : snapshot.version,
+            "agents"  : {
+                agent_name: {
+                    "field_table_tokens" : agent.schema_prompt.field_table_tokens,
+                    "field_list_tokens"  : agent.schema_prompt.field_list_tokens,
+                }
+                for agent_name, agent in snapshot.agents.items()
+            },
+        }
+
+schema_registry = SchemaRegistry()
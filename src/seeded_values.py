@@ -0,0 +1,150 @@
+"""Local Fuzzy Matching for Seeded Field Values.
+
+This module precomputes a trigram index over the `seededValues` of every field in
+IBL_SCHEMA.json, so free text such as "hapag lloyd" or "jeddah seaport" can be
+resolved to its canonical seeded value with a confidence score, without putting
+the value lists in front of the LLM. Lookups only score the seeded values that
+share at least one trigram with the input, so they stay fast as seed lists grow.
+"""
+
+import os
+import re
+from collections import defaultdict
+from typing_extensions import Optional, List, Dict, NamedTuple
+
+from pydantic import BaseModel
+
+# Minimum similarity for a match to be accepted without asking the user
+SEEDED_MATCH_THRESHOLD = float(os.getenv("SEEDED_MATCH_THRESHOLD", "0.7"))
+
+# Two different seeded values scoring within this margin are treated as a tie
+SEEDED_MATCH_MARGIN = 0.1
+
+class SeedMatch(NamedTuple):
+    value: Optional[str]   # canonical seeded value, None when unresolved
+    score: float           # similarity of the best candidate (1.0 = exact)
+
+# ===== UTILITY FUNCTIONS =====
+
+def normalize_seed_text(text: str) -> str:
+    """Lowercase and reduce a value to alphanumeric words (degree signs and punctuation dropped)."""
+    text = re.sub(r"[º°]", "", str(text).lower())
+    return re.sub(r"[^0-9a-z]+", " ", text).strip()
+
+def is_seed_code(part: str) -> bool:
+    """Whether one side of a " - " entry is a short code such as "JISP" or "PJO"."""
+    return re.fullmatch(r"[A-Z0-9]{2,4}", part.strip()) is not None
+
+def seed_variants(seeded_value: str) -> List[str]:
+    """
+    Normalized forms a seeded value may be written as.
+
+    Besides the full value this covers the code and name halves of entries such as
+    "JISP - JEDDAH SEAPORT" or "13992-CARE FOR PHARMACEUTICAL AND MEDICAL DISTRIBUTION".
+    Entries of two different names ("DRY PORT - RIYADH") are only matched as a whole:
+    their halves (a bare "RIYADH") may just as well mean another seeded value.
+    """
+    parts = [seeded_value]
+    halves = re.split(r"\s+-\s+", seeded_value)
+    if len(halves) == 2 and (any(is_seed_code(half) for half in halves) or normalize_seed_text(halves[0]) == normalize_seed_text(halves[1])):
+        parts += halves
+    code_prefix = re.match(r"^(\d+)-(.+)$", seeded_value)
+    if code_prefix:
+        parts += [code_prefix.group(1), code_prefix.group(2)]
+    variants = []
+    for part in parts:
+        normalized = normalize_seed_text(part)
+        if normalized and normalized not in variants:
+            variants.append(normalized)
+    return variants
+
+def trigrams(text: str) -> set:
+    """Character trigrams of a normalized string, padded so short codes still index."""
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+# ===== SIMILARITY INDEX =====
+
+class SeededValueIndex:
+    """Trigram inverted index over one field's seeded values."""
+
+    def __init__(self, seeded_values: List[str]):
+        self.exact = defaultdict(set)      # normalized variant → canonical values written that way
+        self.variants = []                 # (canonical value, trigram count) per variant id
+        self.postings = defaultdict(list)  # trigram → variant ids
+        for seeded_value in seeded_values:
+            for variant in seed_variants(seeded_value):
+                self.exact[variant].add(seeded_value)
+                variant_trigrams = trigrams(variant)
+                variant_id = len(self.variants)
+                self.variants.append((seeded_value, len(variant_trigrams)))
+                for gram in variant_trigrams:
+                    self.postings[gram].append(variant_id)
+
+    def resolve(self, text: str, threshold: float = SEEDED_MATCH_THRESHOLD) -> SeedMatch:
+        """
+        Resolve free text to a canonical seeded value.
+
+        Args:
+            text: The value as provided by the user
+            threshold: Minimum similarity required to accept the match
+
+        Returns:
+            SeedMatch with the canonical value, or value=None when the best score is
+            below `threshold` or two different seeded values are equally likely,
+            including an exact match of several seeded values
+        """
+        normalized = normalize_seed_text(text)
+        if normalized in self.exact:
+            exact_values = self.exact[normalized]
+            return SeedMatch(next(iter(exact_values)) if len(exact_values) == 1 else None, 1.0)
+
+        query = trigrams(normalized)
+        overlaps = defaultdict(int)
+        for gram in query:
+            for variant_id in self.postings.get(gram, ()):
+                overlaps[variant_id] += 1
+
+        # Dice similarity per candidate, keeping the best variant of each seeded value
+        scores = {}
+        for variant_id, overlap in overlaps.items():
+            seeded_value, size = self.variants[variant_id]
+            score = 2 * overlap / (len(query) + size)
+            scores[seeded_value] = max(score, scores.get(seeded_value, 0.0))
+        if not scores:
+            return SeedMatch(None, 0.0)
+
+        ranked = sorted(scores.items(), key=lambda item: item[1], reverse=True)
+        best_value, best_score = ranked[0]
+        if best_score < threshold or (len(ranked) > 1 and best_score - ranked[1][1] < SEEDED_MATCH_MARGIN):
+            return SeedMatch(None, best_score)
+        return SeedMatch(best_value, best_score)
+
+def build_seeded_value_indexes(fields: List[dict]) -> Dict[str, SeededValueIndex]:
+    """
+    Build the similarity index of every field that declares `seededValues`.
+
+    Args:
+        fields: The agent's field definitions from IBL_SCHEMA.json
+
+    Returns:
+        Dictionary mapping field name → SeededValueIndex
+    """
+    return {
+        field_item["field"]: SeededValueIndex(field_item["seededValues"])
+        for field_item in fields if field_item.get("seededValues")
+    }
+
+def normalize_seeded_values(shipment: BaseModel, seeded_indexes: Dict[str, SeededValueIndex]) -> BaseModel:
+    """
+    Replace confidently matched shipment values with their canonical seeded value.
+
+    Values that cannot be resolved above the threshold are left untouched.
+    """
+    for field_name, index in seeded_indexes.items():
+        value = getattr(shipment, field_name, None)
+        if isinstance(value, str) and value:
+            match = index.resolve(value)
+            if match.value is not None and match.value != value:
+                setattr(shipment, field_name, match.value)
+    return shipment
@@ -0,0 +1,73 @@
+"""Startup Warm-Up.
+
+Importing the agents is kept cheap: the chat models, the MCP client and the IBL schema
+snapshot are all created on first use. `warm_up()` creates them ahead of the first
+request, and STARTUP_MODE decides when the app runs it:
+
+- "warm" (default): in the FastAPI lifespan, before the server accepts traffic
+- "background": in a task started by the lifespan, so the server accepts traffic right
+  away and `/ready` reports 503 until the warm-up finished (for readiness probes)
+- "lazy": never; the first requests pay for the initialisation
+"""
+
+import os
+import time
+import asyncio
+from dotenv import load_dotenv
+from typing_extensions import Awaitable, Callable, Dict, Optional
+
+from src.schema_registry import schema_registry
+from src.checkpointer import get_checkpointer
+from src.model_factory import model_factory
+from src.mcp_pool import mcp_session_pool
+
+# Load environment variables
+load_dotenv()
+
+# ===== STARTUP CONFIGURATION =====
+STARTUP_MODE = os.getenv("STARTUP_MODE", "warm")                 # "warm", "background" or "lazy"
+
+class StartupStatus:
+    """Progress of the warm-up, for the readiness endpoint."""
+
+    def __init__(self):
+        self.ready = STARTUP_MODE == "lazy"
+        self.error: Optional[str] = None
+        self.step_seconds: Dict[str, float] = {}
+
+    def snapshot(self) -> dict:
+        return {"mode": STARTUP_MODE, "ready": self.ready, "error": self.error, "step_seconds": self.step_seconds}
+
+startup_status = StartupStatus()
+
+# ===== WARM-UP =====
+
+async def timed_step(step_name: str, step: Callable[[], Awaitable]):
+    start = time.perf_counter()
+    try:
+        await step()
+    except Exception as e:
+        startup_status.error = f"{step_name}: {e}"
+        print(f"Error during warm-up ({step_name}): {e}")
+        raise
+    startup_status.step_seconds[step_name] = round(time.perf_counter() - start, 3)
+
+async def warm_up():
+    """Create the schema snapshot, checkpointer, chat models and MCP sessions, concurrently."""
+    await asyncio.gather(
+        timed_step("schema"       , lambda: asyncio.to_thread(schema_registry.current)),
+        timed_step("checkpointer" , lambda: asyncio.to_thread(get_checkpointer)),
+        timed_step("chat_models"  , lambda: asyncio.to_thread(model_factory.build_all)),  # imports the provider SDK, off the event loop
+        timed_step("mcp_sessions" , mcp_session_pool.start),
+    )
+    startup_status.ready = True
+
+async def start_warm_up() -> Optional[asyncio.Task]:
+    """Run the warm-up as configured by STARTUP_MODE; returns the task in "background" mode."""
+    if STARTUP_MODE == "warm":
+        await warm_up()
+    elif STARTUP_MODE == "background":
+        return asyncio.create_task(warm_up())
+    elif STARTUP_MODE != "lazy":
+        raise ValueError(f"Unknown STARTUP_MODE '{STARTUP_MODE}', expected 'warm', 'background' or 'lazy'")
+    return None
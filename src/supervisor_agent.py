@@ -9,113 +9,208 @@ The workflow uses structured output to make deterministic decisions about
 whether sufficient context exists to proceed with Routing.
 """
 
-import json
+import os
+import asyncio
 from dotenv import load_dotenv
 from datetime import datetime
-from typing_extensions import Literal
+from typing_extensions import Literal, List
 
-from langchain.chat_models import init_chat_model
-from langchain_core.messages import HumanMessage, AIMessage, ToolMessage , get_buffer_string
+from langchain_core.messages import SystemMessage, HumanMessage, AIMessage, ToolMessage , get_buffer_string
+from langchain_core.messages.utils import count_tokens_approximately
 from langgraph.graph import StateGraph, START, END
 from langgraph.types import Command
-from langgraph.checkpoint.memory import InMemorySaver
 
-from src.prompt import supervisor_decision_to_route_to_subagents , supervisor_build_subagent_brief , supervisor_update_subagent_brief 
+from src.prompt import supervisor_decision_to_route_to_subagents , supervisor_build_subagent_brief , supervisor_update_subagent_brief , conversation_summary_prompt
+from src.prompt import supervisor_decision_request , supervisor_build_subagent_brief_request , supervisor_update_subagent_brief_request
+from src.prompt_cache import prompt_call_config
 from src.supervisor_schema import AgentState, ClarifyWithUser, AgentInputState, NextAgent
+from src.checkpointer import get_checkpointer
+from src.schema_registry import schema_registry, SchemaSnapshot
+from src.model_gateway import model_gateway
+from src.model_factory import LazyModel, model_for
 
 # Load environment variables
 load_dotenv()
 
-checkpointer = InMemorySaver()
+checkpointer = get_checkpointer()     # shared with every other graph
 
-# ===== IBL FIELDS =====
-try:
-    with open ("../IBL_SCHEMA.json" , "r") as config_file:
-        routing_fields = json.load(config_file)
-except FileNotFoundError:
-    print("Error: config.json not found. Please create it.")
+# ===== CONVERSATION COMPACTION =====
+COMPACTION_TOKEN_THRESHOLD = int(os.getenv("COMPACTION_TOKEN_THRESHOLD", "3000"))  # unsummarized tokens that trigger a compaction
+COMPACTION_KEEP_TURNS      = int(os.getenv("COMPACTION_KEEP_TURNS", "3"))          # most recent user turns kept verbatim
 
-def get_field_names_description(list_of_field_dicts):
-    return [{k: v for k, v in d.items() if k in ['field', 'description']} for d in list_of_field_dicts]
+# Routing unambiguous messages from the schema's field-name index, without the LLM
+ROUTING_FAST_PATH = os.getenv("ROUTING_FAST_PATH", "true").lower() in ("1", "true", "yes")
 
-LOGISTICS_FIELDS = get_field_names_description(routing_fields.get("logistics_agent", []))
-FORWARDER_FIELDS = get_field_names_description(routing_fields.get("forwarder_agent", []))
+# ===== STATIC PROMPT PREFIXES =====
+# Rendered once per IBL_SCHEMA.json version (see src/schema_registry.py), so every call
+# starts with a byte-identical, cacheable system message
 
-AGENT_FIELD_MAP = {
-    NextAgent.LOGISTICS_AGENT.value: LOGISTICS_FIELDS,
-    NextAgent.FORWARDER_AGENT.value: FORWARDER_FIELDS,
-}
+def build_static_prompts(snapshot: SchemaSnapshot) -> dict:
+    """Routing and brief system messages with the field lists of the schema snapshot."""
+    agent_field_map = {
+        NextAgent.LOGISTICS_AGENT.value: snapshot.agents[NextAgent.LOGISTICS_AGENT.value].schema_prompt.field_list,
+        NextAgent.FORWARDER_AGENT.value: snapshot.agents[NextAgent.FORWARDER_AGENT.value].schema_prompt.field_list,
+    }
+    return {
+        "routing": SystemMessage(content=supervisor_decision_to_route_to_subagents.format(
+                                                                            logistics_fields    = agent_field_map[NextAgent.LOGISTICS_AGENT.value],
+                                                                            forwarder_fields    = agent_field_map[NextAgent.FORWARDER_AGENT.value])),
+        "build_brief": {
+            agent_name: SystemMessage(content=supervisor_build_subagent_brief.format(agent=agent_name, relevant_fields=relevant_fields))
+            for agent_name, relevant_fields in agent_field_map.items()
+        },
+        "update_brief": {
+            agent_name: SystemMessage(content=supervisor_update_subagent_brief.format(agent=agent_name, relevant_fields=relevant_fields))
+            for agent_name, relevant_fields in agent_field_map.items()
+        },
+    }
+
+def static_prompts() -> dict:
+    return schema_registry.current().derive("supervisor_static_prompts", build_static_prompts)
 
 # ===== UTILITY FUNCTIONS =====
 def get_today_str() -> str:
     """Get current date in a human-readable format."""
     return datetime.now().strftime("%a %b %#d, %Y")
 
+def get_last_agent_replies(messages) -> str:
+    """Text of the agent messages sent since the previous user message (one per replying sub agent)."""
+    replies = []
+    for message in reversed(messages[:-1]):
+        if isinstance(message, HumanMessage):
+            break
+        if isinstance(message, AIMessage):
+            replies.append(message.content)
+    return "\n\n".join(reversed(replies))
+
+def get_turn_start(messages, keep_turns: int) -> int:
+    """Index of the first message of the last `keep_turns` user turns."""
+    human_indexes = [index for index, message in enumerate(messages) if isinstance(message, HumanMessage)]
+    if len(human_indexes) <= keep_turns:
+        return 0
+    return human_indexes[-keep_turns] if keep_turns > 0 else len(messages)
+
+def route_locally(state: AgentState) -> ClarifyWithUser | None:
+    """The routing decision for the latest user message when its field names settle it, else None."""
+    latest_index = next((index for index in range(len(state["messages"]) - 1, -1, -1) if isinstance(state["messages"][index], HumanMessage)), None)
+    if not ROUTING_FAST_PATH or latest_index is None or not isinstance(state["messages"][latest_index].content, str):
+        return None
+    latest_message = state["messages"][latest_index]
+    # An answer to the supervisor's own question is read with the conversation, by the routing LLM
+    previous_reply = next((message for message in reversed(state["messages"][:latest_index]) if isinstance(message, AIMessage)), None)
+    if previous_reply is not None and isinstance(previous_reply.content, str) and "?" in previous_reply.content:
+        return None
+    agent_names = schema_registry.current().routing_index.route(latest_message.content)
+    if not agent_names:
+        return None
+    return ClarifyWithUser(question    = "",
+                           delegate_to = [NextAgent(agent_name) for agent_name in agent_names],
+                           agent_brief = latest_message.content)
+
+def format_conversation(state: AgentState) -> str:
+    """The compacted summary followed by the messages that have not been summarized yet."""
+    recent_messages = get_buffer_string(messages=state["messages"][state.get("summarized_message_count", 0):])
+    if not state.get("conversation_summary"):
+        return recent_messages
+    return f"[CONVERSATION SUMMARY]\n{state['conversation_summary']}\n\n[RECENT MESSAGES]\n{recent_messages}"
+
 # Set up tools and model binding
 tools = []
 tools_by_name = {tool.name: tool for tool in tools}
 
 # Initialize model
-model = init_chat_model(model="openai:gpt-5.4-mini", temperature=0.0)
-model_with_tools = model.bind_tools(tools)
+model = model_for("supervisor")          # shared connection pool, called through model_gateway
+model_with_tools = LazyModel(lambda: model.bind_tools(tools))   # bound on first use, with the model
 
 # ===== WORKFLOW NODES =====
-def supervisor_agent(state: AgentState):
+async def compact_conversation(state: AgentState):
+    """
+        Folds the older turns of a long conversation into `conversation_summary`, keeping
+        the last COMPACTION_KEEP_TURNS turns verbatim. Runs only once the unsummarized
+        messages exceed COMPACTION_TOKEN_THRESHOLD tokens, and the summary is kept in
+        state, so each message is summarized once.
+    """
+    messages = state["messages"]
+    summarized_message_count = state.get("summarized_message_count", 0)
+    if count_tokens_approximately(messages[summarized_message_count:]) <= COMPACTION_TOKEN_THRESHOLD:
+        return {}
+
+    turn_start = get_turn_start(messages, COMPACTION_KEEP_TURNS)
+    if turn_start <= summarized_message_count:
+        return {}
+
+    summary = await model_gateway.ainvoke(model, [
+        HumanMessage(content=conversation_summary_prompt.format(
+                                                                previous_summary = state.get("conversation_summary", ""),
+                                                                messages         = get_buffer_string(messages=messages[summarized_message_count:turn_start]),
+        ))
+    ], config=prompt_call_config("conversation_summary_prompt"))
+
+    return {
+             "conversation_summary"     : summary.content.strip(),
+             "summarized_message_count" : turn_start
+           }
+
+async def supervisor_agent(state: AgentState):
     """
         Supervisor Agent determines if the input data sufficient to make 
         deterministic decisions and assign the task to the next agent.
     """
 
-    current_agent = None
-    for agent_name, status in state.get("agent_status", {}).items():
-        if status == "pending_response":
-            current_agent = agent_name
-            break
-    if current_agent:
-        updated_briefs = dict(state.get("agent_briefs", {}))                  # Get the agent_briefs
-        updated_briefs[current_agent] = model.invoke([                        # Update the pending agent brief based on the last human message
-            HumanMessage(content=supervisor_update_subagent_brief.format(
-                                                                            agent               = current_agent,
-                                                                            relevant_fields     = AGENT_FIELD_MAP[current_agent],
-                                                                            current_brief       = updated_briefs.get(current_agent, ""),
-                                                                            agent_last_request  = state["messages"][-2].content if len(state["messages"]) >= 2 else "",
+    pending_agents = [agent_name for agent_name, status in state.get("agent_status", {}).items() if status == "pending_response"]
+    if pending_agents:
+        current_briefs = dict(state.get("agent_briefs", {}))                 # Get the agent_briefs
+        agent_last_request = get_last_agent_replies(state["messages"])
+
+        async def update_brief(agent_name):                                  # Update a pending agent brief based on the last human message
+            return (await model_gateway.ainvoke(model, [
+                static_prompts()["update_brief"][agent_name],
+                HumanMessage(content=supervisor_update_subagent_brief_request.format(
+                                                                            current_brief       = current_briefs.get(agent_name, ""),
+                                                                            agent_last_request  = agent_last_request,
                                                                             latest_user_message = state["messages"][-1:],
-            ))
-        ]).content.strip()
+                ))
+            ], config=prompt_call_config("supervisor_update_subagent_brief"))).content.strip()
+
+        # Update every pending agent brief concurrently
+        updated_briefs = await asyncio.gather(*(update_brief(agent_name) for agent_name in pending_agents))
 
         return {
-            "agent_briefs": updated_briefs
+            "agent_briefs": {**current_briefs, **dict(zip(pending_agents, updated_briefs))}
         }
 
-    # Set up structured output model
-    structured_output_model = model_with_tools.with_structured_output(ClarifyWithUser)
-
-    # Invoke the model with clarification instructions
-    response = structured_output_model.invoke([
-        HumanMessage(content=supervisor_decision_to_route_to_subagents.format(
-                                                                            message             = get_buffer_string(messages=state["messages"]), 
-                                                                            date                = get_today_str(),
-                                                                            logistics_fields    = get_field_names_description(routing_fields.get("logistics_agent")),
-                                                                            forwarder_fields    = get_field_names_description(routing_fields.get("forwarder_agent"))
-        ))
-    ])
+    # Messages naming only known fields are routed from the field index; the rest go to the LLM
+    response = route_locally(state)
+    if response is None:
+        # Set up structured output model
+        structured_output_model = model_with_tools.with_structured_output(ClarifyWithUser)
+
+        # Invoke the model with clarification instructions
+        response = await model_gateway.ainvoke(structured_output_model, [
+            static_prompts()["routing"],
+            HumanMessage(content=supervisor_decision_request.format(
+                                                                                message             = format_conversation(state),
+                                                                                date                = get_today_str(),
+            ))
+        ], config=prompt_call_config("supervisor_decision_to_route_to_subagents"))
 
     delegated_agents = [
         agent for agent in list(dict.fromkeys(response.delegate_to))
         if agent in (NextAgent.LOGISTICS_AGENT, NextAgent.FORWARDER_AGENT)
     ]
 
-    agent_briefs = {}
-    for agent in delegated_agents:
-        agent_name = agent.value
-        agent_briefs[agent_name] = model.invoke([
-            HumanMessage(content=supervisor_build_subagent_brief.format(
-                                                                            agent               = agent_name,
-                                                                            relevant_fields     = AGENT_FIELD_MAP[agent_name],
-                                                                            user_chat_history   = state["messages"],
+    async def build_brief(agent_name):
+        return (await model_gateway.ainvoke(model, [
+            static_prompts()["build_brief"][agent_name],
+            HumanMessage(content=supervisor_build_subagent_brief_request.format(
+                                                                            user_chat_history   = format_conversation(state),
                                                                             routing_brief       = response.agent_brief,
             ))
-        ]).content.strip()
+        ], config=prompt_call_config("supervisor_build_subagent_brief"))).content.strip()
+
+    # Build the briefs of all delegated agents concurrently
+    agent_names = [agent.value for agent in delegated_agents]
+    agent_briefs = dict(zip(agent_names, await asyncio.gather(*(build_brief(agent_name) for agent_name in agent_names))))
 
     return {
              "clarification_schemas" : response ,
@@ -125,7 +220,7 @@ def supervisor_agent(state: AgentState):
              "agent_status": {agent.value: "pending_response" for agent in delegated_agents}
            }
 
-def supervisor_tools(state: AgentState):
+async def supervisor_tools(state: AgentState):
     """
         Executes all tool calls from the Supervisor Agent response.
         Returns updated state with tool execution results.
@@ -136,7 +231,7 @@ def supervisor_tools(state: AgentState):
     observations = []
     for tool_call in tool_calls:
         tool = tools_by_name[tool_call["name"]]
-        observations.append(tool.invoke(tool_call["args"]))
+        observations.append(await tool.ainvoke(tool_call["args"]))
 
     # Create tool message outputs
     tool_outputs = [
@@ -149,18 +244,19 @@ def supervisor_tools(state: AgentState):
 
     return {"supervisor_messages": tool_outputs}
 
-def clarify_with_user(state: AgentState):
+async def clarify_with_user(state: AgentState):
     """In Case the user needs to be asked a clarifying question."""
     clarification_schemas = state.get("clarification_schemas")
     if clarification_schemas and clarification_schemas.question:
         question = clarification_schemas.question
     return {"messages": [AIMessage(content=question)]}
 
-def DelegateNextAgent(state: AgentState) -> Literal["logistics_agent", "forwarder_agent", "supervisor_tools", "clarify_with_user"]:
+def DelegateNextAgent(state: AgentState) -> Literal["logistics_agent", "forwarder_agent", "clarify_with_user", "__end__"] | List[str]:
 
     """ 
         A routing logic that uses the supervisor agent's responses to determine 
-        which agent should be assigned the task next 
+        which agents should be assigned the task next. All delegated agents still
+        waiting for a response are returned together so they run in parallel.
     """
 
     list_of_agents = state.get("list_of_agents", [])
@@ -170,21 +266,20 @@ def DelegateNextAgent(state: AgentState) -> Literal["logistics_agent", "forwarde
     if not list_of_agents or not clarification_schemas:
         return "__end__"
 
-    next_agent = list_of_agents[0]
-
-    if next_agent == NextAgent.LOGISTICS_AGENT:
-        return "logistics_agent"
-    elif next_agent == NextAgent.FORWARDER_AGENT:
-        return "forwarder_agent"
-    elif next_agent == NextAgent.CLARIFY_WITH_USER:
+    if list_of_agents[0] == NextAgent.CLARIFY_WITH_USER:
         return "clarify_with_user"
-    else:
-        return "__end__"
 
-def logistics_agent(state: AgentState):
+    agent_status = state.get("agent_status", {})
+    pending_agents = [
+        agent.value for agent in list_of_agents
+        if agent in (NextAgent.LOGISTICS_AGENT, NextAgent.FORWARDER_AGENT) and agent_status.get(agent.value) == "pending_response"
+    ]
+    return pending_agents or "__end__"
+
+async def logistics_agent(state: AgentState):
     pass
 
-def forwarder_agent(state: AgentState):
+async def forwarder_agent(state: AgentState):
     pass
 
 # ===== GRAPH CONSTRUCTION =====
@@ -193,6 +288,7 @@ def forwarder_agent(state: AgentState):
 supervisor_agent_builder = StateGraph(AgentState, input_schema=AgentInputState)
 
 # Add workflow nodes
+supervisor_agent_builder.add_node("compact_conversation", compact_conversation)
 supervisor_agent_builder.add_node("supervisor_agent"  , supervisor_agent)
 supervisor_agent_builder.add_node("supervisor_tools"  , supervisor_tools)
 supervisor_agent_builder.add_node("clarify_with_user" , clarify_with_user)
@@ -200,7 +296,8 @@ supervisor_agent_builder.add_node("logistics_agent"   , logistics_agent)
 supervisor_agent_builder.add_node("forwarder_agent"   , forwarder_agent)
 
 # Add workflow edges
-supervisor_agent_builder.add_edge(START, "supervisor_agent")
+supervisor_agent_builder.add_edge(START, "compact_conversation")
+supervisor_agent_builder.add_edge("compact_conversation", "supervisor_agent")
 supervisor_agent_builder.add_conditional_edges(
     "supervisor_agent",
      DelegateNextAgent,
@@ -37,6 +37,14 @@ class ClarifyWithUser(BaseModel):
         description = "A Brief that will be used to route the task to the next sub-agent",
     )
 
+# ===== STATE REDUCERS =====
+
+def merge_agent_status(current: Optional[dict[str, str]], update: Optional[dict[str, str]]) -> dict[str, str]:
+    """Merge agent status updates so parallel sub-agent branches can each report their own status."""
+    return {**(current or {}), **(update or {})}
+
+# ===== STATE DEFINITIONS =====
+
 class AgentInputState(MessagesState):
     """Input state for the full agent - only contains messages from user input."""
     pass
@@ -52,5 +60,23 @@ class AgentState(MessagesState):
     agent_brief: str
 
     list_of_agents: Optional[List[NextAgent]] = Field(default_factory=list)
-    agent_status: Optional[dict[str,str]] = Field(default_factory=dict)
+    agent_status: Annotated[Optional[dict[str,str]], merge_agent_status] = Field(default_factory=dict)
+    agent_briefs: dict[str, str] = Field(default_factory=dict)
+
+    # Rolling compaction: messages[:summarized_message_count] are folded into conversation_summary
+    conversation_summary: str = ""
+    summarized_message_count: int = 0
+
+class SubAgentInputState(MessagesState):
+    """Input state of the sub-agent subgraphs - the conversation and the agent briefs."""
     agent_briefs: dict[str, str] = Field(default_factory=dict)
+
+class SubAgentOutputState(MessagesState):
+    """
+    Output state of the sub-agent subgraphs.
+
+    Limits what a sub agent hands back to the parent graph to keys with reducers,
+    so the Logistics and Forwarder branches can run in parallel. `agent_status` is
+    not part of the input, so each branch only reports its own status change.
+    """
+    agent_status: Annotated[Optional[dict[str,str]], merge_agent_status] = Field(default_factory=dict)
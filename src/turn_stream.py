@@ -0,0 +1,84 @@
+"""Streaming of One Conversation Turn.
+
+`full_agent.ainvoke` only returns once every node and model call of the turn has finished.
+This module runs the same turn with `astream` instead and turns the graph events into
+Server-Sent Events, so an operator sees progress as soon as the first node starts:
+
+- node_start / node_end: a node (or sub agent node) started or finished, e.g. "LogisticsAgent/logistics_agent"
+- token: a text delta of a user-facing reply, from model calls tagged USER_REPLY_TAG
+- message: a message produced in this turn, once its node has finished
+- done / error: the end of the turn
+"""
+
+import re
+import json
+import uuid
+from typing_extensions import Any, AsyncIterator, List, Sequence, Tuple
+
+from langchain_core.messages import BaseMessage, HumanMessage
+from src.reply_renderer import USER_REPLY_TAG
+from src.concurrency import thread_locks
+
+# Task id suffix of a subgraph namespace entry, e.g. "LogisticsAgent:cf166270-..."
+NAMESPACE_TASK_ID = re.compile(r":[^:]*$")
+
+# ===== UTILITY FUNCTIONS =====
+
+def new_turn_message(content: str) -> HumanMessage:
+    """The user message starting a turn, with an explicit id so the turn's replies can be found after it."""
+    return HumanMessage(content=content, id=str(uuid.uuid4()))
+
+def turn_messages(messages: Sequence[BaseMessage], turn_message_id: str) -> List[BaseMessage]:
+    """Messages produced after the user message `turn_message_id`, i.e. the replies of that turn."""
+    for index in range(len(messages) - 1, -1, -1):
+        if messages[index].id == turn_message_id:
+            return list(messages[index + 1:])
+    return []
+
+def node_path(namespace: Tuple[str, ...], node: str) -> str:
+    """Readable path of a node, e.g. ("LogisticsAgent:<task id>",) + "logistics_agent" → "LogisticsAgent/logistics_agent"."""
+    return "/".join([NAMESPACE_TASK_ID.sub("", entry) for entry in namespace] + [node])
+
+def format_sse(event: str, data: Any) -> str:
+    """One Server-Sent Event frame."""
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+# ===== TURN STREAM =====
+
+async def stream_turn(graph, user_message: str, config: dict) -> AsyncIterator[Tuple[str, Any]]:
+    """
+    Run one turn of `graph` and yield its progress as (event, data) pairs.
+
+    Args:
+        graph: The compiled full agent
+        user_message: Text of the user's message
+        config: Run config with the thread id
+
+    Yields:
+        (event, data) pairs, see the module docstring for the event names
+    """
+    turn_message = new_turn_message(user_message)
+    emitted_ids = set()
+    try:
+        async with thread_locks.hold(config["configurable"]["thread_id"]):       # one turn per thread at a time
+            async for namespace, mode, chunk in graph.astream({"messages": [turn_message]}, config=config,
+                                                              stream_mode=["tasks", "messages", "values"], subgraphs=True):
+                if mode == "tasks":
+                    if "result" not in chunk:
+                        yield "node_start", {"node": node_path(namespace, chunk["name"])}
+                    else:
+                        yield "node_end", {"node": node_path(namespace, chunk["name"]), "error": chunk.get("error")}
+                elif mode == "messages":
+                    message_chunk, metadata = chunk
+                    if USER_REPLY_TAG in (metadata.get("tags") or []) and message_chunk.text():
+                        yield "token", {"node": node_path(namespace, metadata.get("langgraph_node", "")), "content": message_chunk.text()}
+                elif not namespace:       # parent graph state after each step: emit the replies added by that step
+                    for message in turn_messages(chunk.get("messages", []), turn_message.id):
+                        if message.id not in emitted_ids:
+                            emitted_ids.add(message.id)
+                            yield "message", message.model_dump()
+    except Exception as e:
+        print(f"Error while streaming turn: {e}")
+        yield "error", {"error": str(e)}
+        return
+    yield "done", {"thread_id": config["configurable"]["thread_id"]}
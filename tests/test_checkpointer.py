@@ -0,0 +1,51 @@
+import operator
+
+from typing_extensions import Annotated, List, TypedDict
+from langgraph.graph import StateGraph, START, END
+
+from src.checkpointer import BoundedInMemorySaver
+
+class TurnState(TypedDict, total=False):
+    messages: Annotated[List[str], operator.add]
+    status: str
+
+def build_graph(saver: BoundedInMemorySaver, evict_in_turn: set):
+    def receive(state: TurnState):
+        return {"messages": ["received"]}
+
+    def finish(state: TurnState):
+        if evict_in_turn:
+            saver._evict(evict_in_turn.pop())            # memory pressure from another thread's turn
+        return {"status": "done"}
+
+    graph = StateGraph(TurnState)
+    graph.add_node("receive", receive)
+    graph.add_node("finish", finish)
+    graph.add_edge(START, "receive")
+    graph.add_edge("receive", "finish")
+    graph.add_edge("finish", END)
+    return graph.compile(checkpointer=saver)
+
+def test_thread_evicted_mid_turn_starts_empty():
+    saver = BoundedInMemorySaver(spill_dir=None)
+    evict_in_turn = set()
+    graph = build_graph(saver, evict_in_turn)
+    config = {"configurable": {"thread_id": "user-1"}}
+
+    graph.invoke({"messages": ["turn 1"]}, config)
+    evict_in_turn.add("user-1")
+    graph.invoke({"messages": ["turn 2"]}, config)
+
+    assert saver.get_tuple(config) is None                # gone as a whole, not status without messages
+    assert saver.metrics()["orphaned_writes"] > 0
+    assert graph.invoke({"messages": ["turn 3"]}, config)["messages"] == ["turn 3", "received"]
+
+def test_threads_keep_their_history_without_eviction():
+    saver = BoundedInMemorySaver(spill_dir=None)
+    graph = build_graph(saver, set())
+    config = {"configurable": {"thread_id": "user-1"}}
+
+    graph.invoke({"messages": ["turn 1"]}, config)
+    state = graph.invoke({"messages": ["turn 2"]}, config)
+    assert state["messages"] == ["turn 1", "received", "turn 2", "received"]
+    assert saver.metrics()["orphaned_writes"] == 0
@@ -0,0 +1,19 @@
+from src.schema_registry import schema_registry
+from src.field_extractor import extract_field_values
+
+def extract(field_data: str):
+    agent = schema_registry.agent("logistics_agent")
+    return extract_field_values(field_data, agent.fields, agent.alias_map, agent.seeded_indexes)
+
+def test_line_of_known_pairs_is_split():
+    values, unresolved = extract("AWB/BL: 123, Incoterm: FOB")
+    assert values["AWB/BL"] == "123"
+    assert "Incoterm" in values or "Incoterm" in unresolved
+
+def test_line_with_an_unknown_key_goes_to_the_llm():
+    assert extract("AWB/BL: 123, Foo: bar, Incoterm: FOB") is None
+    assert extract("AWB/BL: 123, Incoterm: FOB, fragile") is None
+
+def test_value_containing_commas_stays_intact():
+    values, _ = extract("Remark: fragile, handle with care")
+    assert values["Remark"] == "fragile, handle with care"
@@ -0,0 +1,47 @@
+import os
+import sys
+import json
+import asyncio
+import importlib
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def load_server(monkeypatch, tmp_path):
+    """The DB server module on a copy of IBL_SCHEMA.json and a scratch database."""
+    schema_path = tmp_path / "IBL_SCHEMA.json"
+    with open(os.path.join(ROOT_DIR, "IBL_SCHEMA.json"), "r", encoding="utf-8") as schema_file:
+        schema = json.load(schema_file)
+    schema_path.write_text(json.dumps(schema), encoding="utf-8")
+    monkeypatch.setenv("IBL_SCHEMA_PATH", str(schema_path))
+    monkeypatch.setenv("IBL_DB_PATH", str(tmp_path / "ibl_database.sqlite3"))
+    monkeypatch.delitem(sys.modules, "src.ibl_database_update", raising=False)
+    return importlib.import_module("src.ibl_database_update"), schema_path, schema
+
+def forwarder_record(schema: dict, clearing_number: str) -> dict:
+    """A forwarder record with every required field set."""
+    record = {
+        field_item["field"]: "2025-01-01" if field_item["dataType"] == "date" else "x"
+        for field_item in schema["forwarder_agent"] if field_item.get("required")
+    }
+    return {**record, "Clearing Number": clearing_number}
+
+def test_update_db_accepts_a_field_added_while_running(monkeypatch, tmp_path):
+    server, schema_path, schema = load_server(monkeypatch, tmp_path)
+    record = {**forwarder_record(schema, "C-1"), "Customs Broker": "ACME"}
+    assert asyncio.run(server.UpdateDB(record, "forwarder"))["status"] == "False"
+
+    schema["forwarder_agent"].append({"field": "Customs Broker", "dataType": "str", "required": False, "description": "Customs broker"})
+    schema_path.write_text(json.dumps(schema), encoding="utf-8")
+    os.utime(schema_path, ns=(server.schema_mtime + 10**9, server.schema_mtime + 10**9))
+
+    assert asyncio.run(server.UpdateDB(record, "forwarder"))["status"] == "True"
+    assert server.store.get("forwarder", "C-1")["record"]["Customs Broker"] == "ACME"
+
+def test_invalid_schema_edit_keeps_the_previous_schema(monkeypatch, tmp_path):
+    server, schema_path, schema = load_server(monkeypatch, tmp_path)
+    models = server.record_models
+    schema_path.write_text("{not json", encoding="utf-8")
+    os.utime(schema_path, ns=(server.schema_mtime + 10**9, server.schema_mtime + 10**9))
+
+    assert asyncio.run(server.UpdateDB(forwarder_record(schema, "C-2"), "forwarder"))["status"] == "True"
+    assert server.record_models is models
@@ -0,0 +1,28 @@
+import asyncio
+
+from src.model_factory import LazyModel, ModelFactory, model_factory, model_for
+
+def test_lazy_models_are_rebuilt_after_aclose(monkeypatch):
+    monkeypatch.setenv("OPENAI_API_KEY", "test-key")
+    model = model_for("supervisor")
+    model_with_tools = LazyModel(lambda: model.bind_tools([]))   # as in supervisor_agent
+
+    first_model, first_bound = model.get(), model_with_tools.get()
+    asyncio.run(model_factory.aclose())
+
+    assert first_model.http_async_client.is_closed
+    assert not model.is_built
+    assert model.get() is not first_model
+    assert not model.get().http_async_client.is_closed
+    assert model_with_tools.get() is not first_bound
+    assert model_with_tools.get().bound is model.get()
+    asyncio.run(model_factory.aclose())
+
+def test_aclose_resets_the_http_clients():
+    factory = ModelFactory()
+    clients = factory.http_clients()
+    asyncio.run(factory.aclose())
+
+    assert clients[1].is_closed
+    assert factory.http_clients() is not clients
+    assert not factory.http_clients()[1].is_closed
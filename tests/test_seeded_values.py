@@ -0,0 +1,20 @@
+from src.seeded_values import SeededValueIndex, seed_variants
+
+PORTS = ["JISP - JEDDAH SEAPORT", "KAIA - JEDDAH AIRPORT", "KKIA - RIYADH AIRPORT", "DRY PORT - RIYADH"]
+
+def test_halves_are_split_off_codes_only():
+    assert seed_variants("JISP - JEDDAH SEAPORT") == ["jisp jeddah seaport", "jisp", "jeddah seaport"]
+    assert seed_variants("DRY PORT - RIYADH") == ["dry port riyadh"]
+    assert seed_variants("MAERSK - MAERSK") == ["maersk maersk", "maersk"]
+
+def test_ambiguous_location_is_not_resolved():
+    index = SeededValueIndex(PORTS)
+    assert index.resolve("riyadh").value is None
+    assert index.resolve("jeddah").value is None
+    assert index.resolve("kkia").value == "KKIA - RIYADH AIRPORT"
+    assert index.resolve("dry port riyadh").value == "DRY PORT - RIYADH"
+
+def test_exact_variant_of_several_seeds_is_not_resolved():
+    match = SeededValueIndex(["AB - NORTH", "AB - SOUTH"]).resolve("ab")
+    assert match.value is None
+    assert match.score == 1.0